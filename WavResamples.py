@@ -1,11 +1,28 @@
+import time
+_APP_START_TIME = time.perf_counter() # 起動時間の計測用（このモジュールの読み込み開始時刻）
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import librosa # オーディオ処理ライブラリ
-import soundfile as sf
 import os
 import threading
 import queue
-import numpy as np
+import itertools
+import functools
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from wavresamples import ResampleEngine, perform_single_resample, default_worker_count
+from wavresamples.core import ConversionTarget, TARGET_PROFILES, job_for_file, is_output_filename, is_wav_file, parse_sample_rate, subtype_for_bit_depth
+from wavresamples.channels import DEFAULT_CHANNEL_MAP
+from wavresamples.metadata import MetadataCache
+from wavresamples.journal import JobJournal, DEFAULT_JOURNAL_PATH
+from wavresamples.instrumentation import JobStatsReport
+from wavresamples.scheduler import MemoryBudgetScheduler
+from wavresamples.pipeline import SourcePrefetcher
+from wavresamples.filelist import FileListStore
+from wavresamples.scanner import iter_wav_paths
+from wavresamples.watcher import FolderWatcher
 
 # tkinterdnd2 が利用可能か最初に確認します
 try:
@@ -18,12 +35,91 @@ except ImportError:
     sys.exit(1)
 
 
+# ドロップされたファイルのメタデータ取得に使うスレッド数 (ネットワーク共有での待ち時間を隠すため多めに取る)
+PROBE_MAX_WORKERS = 16
+# メタデータ取得とリストへの追加をまとめて行う単位 (ファイル数)
+INGEST_CHUNK_SIZE = 128
+# 取り込み中に結果を確認する間隔 (ミリ秒)
+INGEST_POLL_INTERVAL_MS = 50
+# 変換結果が届いてからリストに反映するまで待つ時間 (ミリ秒)。この間に届いた結果はまとめて1回で反映する
+RESULTS_FRAME_INTERVAL_MS = 16
+# 変換結果が届いたことをGUIスレッドに知らせる仮想イベント
+RESULTS_READY_EVENT = "<<ResampleResultsReady>>"
+# フォルダ監視中に、監視スレッドが見つけたファイルを確認する間隔 (ミリ秒)
+WATCH_POLL_INTERVAL_MS = 250
+# マウスホイール1ノッチでスクロールする行数
+WHEEL_SCROLL_ROWS = 3
+# 絞り込み文字列の入力が止まってから絞り込みを実行するまでの時間 (ミリ秒)
+FILTER_DEBOUNCE_MS = 150
+# 「出力形式」で上の設定の1形式だけを書き出す選択肢
+SINGLE_TARGET_LABEL = "単一 (上の設定)"
+# 「出力形式」の表示名 -> TARGET_PROFILES のプロファイル名
+OUTPUT_PROFILE_LABELS = {
+    "アセット一式 (22.05kHz/8bit, 44.1kHz/16bit, 48kHz/16bit)": "assets",
+}
+# 「品質」の表示名 -> 変換品質の段階 (QUALITY_TIERS のキー)
+QUALITY_LABELS = {
+    "高品質 (マスター用)": "hq",
+    "高速 (プレビュー用)": "fast",
+}
+# 目標チャンネル数の選択肢 (表示名 -> チャンネル数)
+CHANNEL_LABELS = {
+    "ステレオ (2ch)": 2,
+    "モノラル (1ch)": 1,
+}
+# チャンネルの対応の選択肢 (表示名 -> `wavresamples.channels` のプリセット名)
+CHANNEL_MAP_LABELS = {
+    "自動": "auto",
+    "ITUダウンミックス": "itu",
+    "モノラル合成": "mix",
+    "複製": "duplicate",
+}
+
+
+def _print_scan_error(path, error):
+    """フォルダの探索中に読み込めなかったフォルダをログに出力します。"""
+    print(f"フォルダを読み込めませんでした: {path} - {error}")
+
+
+def _probe_audio_info(metadata_cache, filepath):
+    """WAVファイルのメタデータを取得します。取り込み用のスレッドプールで実行されます。
+
+    Args:
+        metadata_cache (MetadataCache): メタデータのキャッシュ。
+        filepath (str): ファイルの絶対パス。
+
+    Returns:
+        tuple: (AudioMetadata, None)。失敗した場合は (None, 例外)。
+    """
+    try:
+        return metadata_cache.get(filepath), None
+    except Exception as e:
+        return None, e
+
+
 class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能のためにTkinterDnD.Tkを継承
-    def __init__(self):
+    def __init__(self, max_workers=None, warm_up=True, journal_path=DEFAULT_JOURNAL_PATH,
+                 stats_path=None, profile_slowest=0, profile_dir="wavresamples-profiles", memory_budget=None,
+                 watch_dir=None, watch_polling=False):
         """アプリケーションのメインクラスを初期化します。
 
         ウィンドウのタイトル、サイズ、および変換タスクを管理するための
         キューやスレッドなどの内部変数をセットアップします。
+
+        Args:
+            max_workers (int | None): 変換ワーカープロセス数の初期値。Noneの場合はCPUコア数。
+            warm_up (bool): Trueの場合、ウィンドウ表示後にバックグラウンドで
+                ワーカーを起動し、リサンプラーなどのライブラリを事前に読み込みます。
+            journal_path (str | None): 変換ジョブのジャーナルのパス。Noneの場合は記録しません。
+            stats_path (str | None): 指定すると、ファイルごとの段階別の所要時間と読み書きしたバイト数を計測し、
+                終了時にこのパスへ書き出します (拡張子 .csv ならCSV、それ以外はJSON)。
+            profile_slowest (int): 1以上の場合、cProfile でも計測し、所要時間の長い上位N件の
+                プロファイルを終了時に `profile_dir` へ書き出します。
+            profile_dir (str): プロファイル (.prof) の保存先フォルダ。
+            memory_budget (int | None): 同時に変換するファイルのメモリ使用量の上限 (バイト)。
+                Noneの場合は物理メモリの半分です。
+            watch_dir (str | None): 指定すると、起動後にこのフォルダの監視を開始します (「フォルダ監視」と同じ)。
+            watch_polling (bool): Trueの場合、inotify を使わずにポーリングでフォルダを監視します。
         """
         super().__init__()
         self.title("WAVサンプリング周波数・ステレオ・ビット深度変換ツール")
@@ -58,15 +154,66 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         self.geometry(f'{window_width}x{window_height}+{center_x}+{center_y - title_bar_height}')
 
         self.resample_task_queue = queue.Queue()
+        # タスクキューのジョブをメモリ予算の範囲でワーカーに渡すスケジューラー (ディスパッチスレッドだけが使う)
+        self.scheduler = MemoryBudgetScheduler(memory_budget)
+        self._prefetcher = SourcePrefetcher() # ワーカーが変換している間に、次に変換するファイルを先読みする
         self.resample_results_queue = queue.Queue()
-        self.worker_thread = None
+        self.worker_thread = None # タスクキューからエンジンへジョブを送るディスパッチスレッド
+        self.engine = None # 変換ジョブを実行するワーカープール (ResampleEngine)
+        self._engine_lock = threading.Lock() # エンジン作成の排他制御用
+        self._warm_up_enabled = warm_up # ウィンドウ表示後にワーカーをウォームアップするか
+        self.max_workers = max_workers if max_workers else default_worker_count() # 同時に実行する変換ワーカー数
+        self._batches = {} # 手動変換バッチの進捗 (batch_id -> 集計用dict)
+        self._batch_id_counter = itertools.count(1) # バッチID採番用
         self.auto_output_dir = None # 自動変換モード時の出力先
         self.last_individual_output_dir = None # 個別変換モード時の最後の出力先
+        # --- ファイルリスト ---
+        # 全行はPython側のストアに保持し、Treeviewには画面に見えている行だけを表示する
+        self.file_store = FileListStore() # ファイルリストの全行 (アイテムID -> レコード、パスの索引、並べ替え・絞り込み)
+        self._selected_keys = set() # 選択中のアイテムID (画面外の行も含む)
+        self._focus_key = None # キーボード操作の基準となるアイテムID
+        self._anchor_key = None # Shiftによる範囲選択の起点となるアイテムID
+        self._view_top = 0 # Treeviewの先頭に表示している行の表示順での行番号
+        self._row_iids = [] # 表示用に確保しているTreeviewの行 (上から順)
+        self._key_by_row_iid = {} # Treeviewの行ID -> 表示中のアイテムID
+        self._row_iid_by_key = {} # 表示中のアイテムID -> Treeviewの行ID
+        self._heading_height = 25 # 見出し行の高さ (ピクセル)。行を表示した後に実測値で更新する
+        self._render_pending = False # 再描画を予約済みか
+        self._filter_after_id = None # 絞り込みの遅延実行用のタイマーID
+        self.metadata_cache = MetadataCache() # ファイルのメタデータ (mtime・サイズ・inodeで検証)
+        self.journal = self._open_journal(journal_path) # 中断時に再開するための変換ジョブの記録
+        # 変換処理の計測 (任意)。有効な場合、ワーカーは結果と一緒に計測結果を返す
+        self.stats_path = stats_path
+        self.profile_dir = profile_dir
+        self.job_stats = JobStatsReport(profile_slowest) if stats_path or profile_slowest else None
+
+        # --- ドロップされたファイルの取り込み (メタデータの並列取得) ---
+        self._probe_executor = ThreadPoolExecutor(max_workers=PROBE_MAX_WORKERS) # メタデータ取得 (sf.info) を並列実行するスレッドプール
+        self._ingest_queue = queue.Queue() # 取り込み待ちのパス (ファイルまたはフォルダ) のリスト (ドロップ単位)
+        self._ingest_results_queue = queue.Queue() # メタデータ取得結果のチャンク
+        self._ingest_thread = None # 取り込みスレッド
+        self._ingest_pending_paths = set() # 取り込み中 (まだリストにない) のファイルの絶対パス
+        self._ingest_total = 0 # 取り込み対象のファイル数 (フォルダ内のファイルは探索しながら加算)
+        self._ingest_done = 0 # 取り込み済みのファイル数
+        self._ingest_drops_in_flight = 0 # 取り込みが完了していないドロップの数
+        self._ingest_scanning_dirs = 0 # 探索中のフォルダを含むドロップの数
+        self._ingest_stats = {"added": 0, "skipped_non_wav": 0, "skipped_duplicate": 0, "errors": 0}
+        self._ingest_error_shown = False # 取り込み中にエラーメッセージを表示したか
+        self._ingest_poll_id = None # 取り込み結果ポーリング用のタイマーID
         self.is_shutting_down = False # アプリケーション終了処理中フラグ
         self._is_resizing_column = False # カラムリサイズ中フラグ
-        self._process_timer_id = None # 結果ポーリング用のタイマーID
+        self._process_timer_id = None # 変換結果をまとめて反映するタイマーのID
+        self._results_wakeup_lock = threading.Lock() # 結果通知イベントの重複送信防止用
+        self._results_wakeup_pending = False # 結果通知イベントを送信済みで、まだ反映していないか
+        # --- フォルダ監視 (ドロップフォルダ) ---
+        self.folder_watcher = None # 監視中の FolderWatcher
+        self.watch_polling = watch_polling # inotify を使わずにポーリングで監視するか
+        self._watched_files_queue = queue.Queue() # 監視スレッドが見つけた、書き込みが完了したファイルのパスのリスト
+        self._watch_poll_id = None # 監視フォルダのファイルの確認用のタイマーID
 
         self._setup_ui() # UIのセットアップ
+        if watch_dir:
+            self.after(1, self._start_folder_watch, watch_dir)
         # self._apply_theme() # 初期テーマは _setup_ui の最後で after を使って適用する
 
 
@@ -87,14 +234,19 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         list_frame.grid_columnconfigure(0, weight=1)
 
         # Treeview (多列リストボックスとして使用)
+        # 行はストアから画面に見えている分だけを表示する (_render_rows)。見出しをクリックすると並べ替える
         columns = ("filename", "filepath", "samplerate", "channels", "bitdepth", "status") # bitdepth列を追加
         self.tree = ttk.Treeview(list_frame, columns=columns, show="headings")
-        self.tree.heading("filename", text="ファイル名")
-        self.tree.heading("filepath", text="ファイルパス")
-        self.tree.heading("samplerate", text="サンプリング周波数 (Hz)")
-        self.tree.heading("channels", text="チャンネル数") # 新しい列のヘッダー
-        self.tree.heading("bitdepth", text="ビット深度") # 新しい列のヘッダー
-        self.tree.heading("status", text="状態")
+        self._heading_texts = {
+            "filename": "ファイル名",
+            "filepath": "ファイルパス",
+            "samplerate": "サンプリング周波数 (Hz)",
+            "channels": "チャンネル数",
+            "bitdepth": "ビット深度",
+            "status": "状態",
+        }
+        for col_id, text in self._heading_texts.items():
+            self.tree.heading(col_id, text=text, command=lambda c=col_id: self._sort_by_column(c))
 
         self.tree.column("filename", width=250, anchor=tk.W, stretch=tk.NO) # 幅調整
         self.tree.column("filepath", width=540, minwidth=200, anchor=tk.W, stretch=tk.NO) # 自動伸縮を無効化
@@ -104,22 +256,40 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         self.tree.column("status", width=100, minwidth=100, anchor=tk.CENTER, stretch=tk.NO)
 
         # スクロールバー
-        scrollbar_y = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        # 垂直方向はTreeviewではなくストアの表示位置をスクロールする
+        scrollbar_y = ttk.Scrollbar(list_frame, orient="vertical", command=self._on_yscroll)
         self.scrollbar_y = scrollbar_y # インスタンス変数として保持
         self.scrollbar_x = ttk.Scrollbar(list_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=self.scrollbar_x.set)
+        self.tree.configure(xscrollcommand=self.scrollbar_x.set)
 
         # grid を使用して配置
         self.tree.grid(row=0, column=0, sticky="nsew")
         self.scrollbar_y.grid(row=0, column=1, sticky="ns")
         # 水平スクロールバーは _update_horizontal_scrollbar で動的に配置する
 
+        # 絞り込み (ファイル名・パスの部分一致)
+        filter_frame = ttk.Frame(list_frame)
+        filter_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(5, 0))
+        ttk.Label(filter_frame, text="絞り込み:").pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", self._on_filter_change)
+        self.filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var, width=40)
+        self.filter_entry.pack(side=tk.LEFT)
+
         # ドラッグ＆ドロップ設定
         self.tree.drop_target_register(DND_FILES)
         self.tree.dnd_bind('<<Drop>>', self.handle_drop)
         self.tree.bind('<<TreeviewSelect>>', self.on_tree_select) # 選択変更イベント
         self.tree.bind('<Map>', self._on_map) # 初回表示時に一度だけ実行
         self.tree.bind('<Configure>', self._update_horizontal_scrollbar) # ウィジェットサイズ変更時にスクロールバーを更新
+        self.tree.bind('<Configure>', self._schedule_render, "+") # 表示できる行数が変わるため再描画する
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', self._on_mousewheel) # Linux (X11) のホイール
+        self.tree.bind('<Button-5>', self._on_mousewheel)
+        for keysym in ("Up", "Down", "Prior", "Next", "Home", "End"):
+            self.tree.bind(f'<{keysym}>', self._on_tree_key_nav)
+            self.tree.bind(f'<Shift-{keysym}>', self._on_tree_key_nav)
+        self.tree.bind('<Control-a>', self._select_all_rows)
 
         # --- コントロールフレーム ---
         control_frame = ttk.Frame(self)
@@ -135,7 +305,7 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         ttk.Label(control_frame, text="目標ビット深度:").pack(side=tk.LEFT, padx=(10,5))
         self.target_bit_depth_var = tk.StringVar(value="16bit (PCM_16)")
         self.target_bit_depth_combobox = ttk.Combobox(control_frame, textvariable=self.target_bit_depth_var,
-                                                      values=["16bit (PCM_16)", "8bit (PCM_S8)"], width=15, state="readonly")
+                                                      values=["16bit (PCM_16)", "8bit (PCM_U8)"], width=15, state="readonly")
         self.target_bit_depth_combobox.pack(side=tk.LEFT, padx=(0,10))
         self.target_bit_depth_combobox.current(0)
 
@@ -170,6 +340,52 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         )
         self.theme_toggle_check.pack(side=tk.RIGHT, padx=10)
 
+        # --- 変換設定フレーム (コントロールフレームの下の段) ---
+        # 1段にすべて並べるとウィンドウの幅に収まらず、右端の操作ボタンが隠れるため2段に分ける
+        settings_frame = ttk.Frame(self)
+        settings_frame.pack(padx=10, pady=(0, 5), fill="x")
+
+        # 目標チャンネル数と、チャンネルの対応 (5.1ch / 7.1ch からのダウンミックスなど)
+        ttk.Label(settings_frame, text="チャンネル:").pack(side=tk.LEFT, padx=(0,5))
+        self.target_channels_var = tk.StringVar(value=next(iter(CHANNEL_LABELS)))
+        self.target_channels_combobox = ttk.Combobox(settings_frame, textvariable=self.target_channels_var,
+                                                     values=list(CHANNEL_LABELS), width=14, state="readonly")
+        self.target_channels_combobox.pack(side=tk.LEFT, padx=(0,5))
+        self.channel_map_var = tk.StringVar(value=next(iter(CHANNEL_MAP_LABELS)))
+        self.channel_map_combobox = ttk.Combobox(settings_frame, textvariable=self.channel_map_var,
+                                                 values=list(CHANNEL_MAP_LABELS), width=16, state="readonly")
+        self.channel_map_combobox.pack(side=tk.LEFT, padx=(0,10))
+
+        # 出力形式: 上の設定の1形式だけか、プロファイルの全形式をまとめて書き出すか
+        ttk.Label(settings_frame, text="出力形式:").pack(side=tk.LEFT, padx=(10,5))
+        self.output_profile_var = tk.StringVar(value=SINGLE_TARGET_LABEL)
+        self.output_profile_combobox = ttk.Combobox(settings_frame, textvariable=self.output_profile_var,
+                                                    values=[SINGLE_TARGET_LABEL, *OUTPUT_PROFILE_LABELS], width=22, state="readonly")
+        self.output_profile_combobox.pack(side=tk.LEFT, padx=(0,10))
+
+        # 変換品質: マスターは高品質、プレビュー・プロキシ用の素材は高速
+        ttk.Label(settings_frame, text="品質:").pack(side=tk.LEFT, padx=(10,5))
+        self.quality_var = tk.StringVar(value=next(iter(QUALITY_LABELS)))
+        self.quality_combobox = ttk.Combobox(settings_frame, textvariable=self.quality_var,
+                                             values=list(QUALITY_LABELS), width=18, state="readonly")
+        self.quality_combobox.pack(side=tk.LEFT, padx=(0,10))
+        # ディザ: ビット深度を減らすとき (16bit → 8bit など) に TPDF ディザを加える
+        self.dither_var = tk.BooleanVar(value=False)
+        self.dither_check = ttk.Checkbutton(settings_frame, text="ディザ", variable=self.dither_var)
+        self.dither_check.pack(side=tk.LEFT, padx=(0,10))
+
+        # フォルダ監視: 指定したフォルダに置かれたWAVファイルを、書き込みの完了後に自動で取り込む
+        self.watch_var = tk.BooleanVar(value=False)
+        self.watch_check = ttk.Checkbutton(settings_frame, text="フォルダ監視", variable=self.watch_var, command=self.on_watch_toggle)
+        self.watch_check.pack(side=tk.LEFT, padx=(0,10))
+
+        # 並列数（ワーカープロセス数）の指定
+        ttk.Label(settings_frame, text="並列数:").pack(side=tk.LEFT, padx=(10,5))
+        self.max_workers_var = tk.IntVar(value=self.max_workers)
+        self.max_workers_spinbox = ttk.Spinbox(settings_frame, textvariable=self.max_workers_var, from_=1, to=max(64, self.max_workers),
+                                               width=4, state="readonly", command=self.on_max_workers_change)
+        self.max_workers_spinbox.pack(side=tk.LEFT, padx=(0,5))
+
         # --- ステータスバー ---
         self.status_var = tk.StringVar()
         # reliefをFLATに変更し、背景色を少し変える
@@ -177,8 +393,11 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         self.status_label.pack(side=tk.BOTTOM, fill="x", pady=(5,0), ipady=2) # ipadyで少し高さを出す
         self.status_var.set("準備完了。WAVファイルをドラッグ＆ドロップしてください。")
 
+        # 取り込みの進捗表示 (取り込み中のみ表示する)
+        self.progress_bar = ttk.Progressbar(self, mode="determinate")
+
         # self.update_status_and_button_states() # 初期状態は「準備完了」メッセージのままにするため、ここでは呼ばない
-        self._process_timer_id = self.after(100, self.process_resample_results) # 変換結果キューのポーリングを開始
+        self.bind(RESULTS_READY_EVENT, self._on_resample_results_ready) # 変換結果が届いたときだけ呼び出される
         self.protocol("WM_DELETE_WINDOW", self.on_closing) # ウィンドウを閉じる際の処理を登録
         self.after(1, self._apply_theme) # メインループ開始直後に初期テーマを適用する
 
@@ -240,6 +459,9 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         self.style.configure("Treeview.Heading", background=button_bg, foreground=fg_color, relief="flat")
         self.style.map("Treeview.Heading", background=[('active', button_active_bg)])
 
+        # 入力欄 (絞り込み) のスタイル
+        self.style.configure('TEntry', fieldbackground=entry_bg, foreground=fg_color, insertcolor=fg_color)
+
         # スクロールバーのスタイル
         self.style.configure('Vertical.TScrollbar', background=button_bg, troughcolor=bg_color, arrowcolor=fg_color)
         self.style.configure('Horizontal.TScrollbar', background=button_bg, troughcolor=bg_color, arrowcolor=fg_color)
@@ -259,11 +481,81 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         """初回表示時に一度だけファイルパス列の幅を調整します。"""
         self.tree.unbind('<Map>') # 一度実行したら解除
         self._adjust_filepath_column()
+        self.after_idle(self._on_window_ready) # ウィンドウの描画が落ち着いてから起動完了とみなす
         # カラムリサイズを検知するために、ヘッダーのドラッグ・リリースイベントにバインド
         self.tree.bind("<ButtonPress-1>", self._on_column_press, "+")
+        self.tree.bind("<ButtonPress-1>", self._on_row_click, "+")
         self.tree.bind("<B1-Motion>", self._on_column_motion, "+")
         self.tree.bind("<ButtonRelease-1>", self._on_column_release, "+")
 
+    def _on_window_ready(self):
+        """ウィンドウの初回表示完了時に、起動時間を記録してワーカーのウォームアップを開始します。"""
+        startup_seconds = time.perf_counter() - _APP_START_TIME
+        print(f"起動時間: {startup_seconds:.3f} 秒")
+        if self._warm_up_enabled:
+            threading.Thread(target=self._warm_up_engine, daemon=True).start()
+        self._offer_resume_from_journal()
+
+    def _open_journal(self, journal_path):
+        """変換ジョブのジャーナルを開きます。開けない場合は記録せずに続行します。
+
+        Args:
+            journal_path (str | None): ジャーナルのパス。
+
+        Returns:
+            JobJournal | None: ジャーナル。
+        """
+        if not journal_path:
+            return None
+        try:
+            return JobJournal(journal_path)
+        except OSError as e:
+            print(f"ジャーナルを開けませんでした ({journal_path}): {e}")
+            return None
+
+    def _offer_resume_from_journal(self):
+        """前回のセッションで完了しなかった変換ジョブがあれば、再開するかを確認します。
+
+        再開する場合は、ジョブをファイルリストに戻してそのまま変換キューに投入します。
+        出力ファイルは一時ファイル経由で書き出されるため、中断時に処理中だったジョブも
+        最初からやり直すだけで済みます。
+        """
+        if self.journal is None:
+            return
+        pending = self.journal.pending_jobs()
+        if not pending:
+            self.journal.reset()
+            return
+        if not messagebox.askyesno("変換の再開", f"前回中断された変換が {len(pending)} 個あります。\n再開しますか？"):
+            for journal_id, _job, _context in pending:
+                self.journal.cancel(journal_id)
+            self.journal.reset()
+            return
+
+        for journal_id, job, _context in pending:
+            filepath_abs = os.path.abspath(job.filepath)
+            item_id = self.file_store.find(filepath_abs)
+            if item_id is None:
+                item_id = self.file_store.add(filepath_abs, os.path.basename(filepath_abs),
+                                              job.original_sr, job.original_channels, job.original_subtype, "キュー済")
+            else:
+                self._set_item_status(item_id, "キュー済")
+            self._put_resample_task(item_id, job, journal_id=journal_id)
+        self._schedule_render()
+        self.status_var.set(f"中断された {len(pending)} 個のファイルの変換を再開しました。")
+        self.update_status_and_button_states()
+        self._ensure_worker_thread_running()
+
+    def _warm_up_engine(self):
+        """変換エンジンを起動し、ワーカーにオーディオ系ライブラリを事前に読み込ませます。
+
+        バックグラウンドスレッドで実行されます。
+        """
+        try:
+            self._get_engine().warm_up()
+        except Exception as e:
+            print(f"ワーカーのウォームアップに失敗しました: {e}")
+
     def _adjust_filepath_column(self):
         """ファイルパス列の幅を、他の列の幅を引いた残りのスペースに合わせます。"""
         self.update_idletasks()
@@ -322,10 +614,12 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
     def handle_drop(self, event):
         """Treeviewへのファイルドラッグ＆ドロップを処理します。
 
-        ドロップされたファイルパスを取得し、WAVファイルのみをリストに追加します。
-        ファイルのサンプリング周波数とチャンネル数を取得して表示し、
-        重複ファイルは無視します。
-        自動変換モードが有効な場合は、変換タスクをキューに追加します。
+        ドロップされたファイルパスを取得し、WAVファイルのみを取り込み対象とします。
+        フォルダがドロップされた場合は、その中のWAVファイルをサブフォルダも含めて
+        取り込みスレッドで遅延的に探索します (`wavresamples.scanner.iter_wav_paths`)。
+        重複ファイルは無視します。サンプリング周波数などのメタデータ取得は
+        バックグラウンドのスレッドプールで並列に行い、取得できたものから
+        ドロップ順を保ったまままとめてリストに追加します (`_process_ingest_results`)。
 
         Args:
             event: TkinterDnDから渡されるドロップイベントオブジェクト。
@@ -336,99 +630,42 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
             raw_paths = self.tk.splitlist(event.data)
             
             files_to_add = []
+            dirs_to_scan = []
             for path_str in raw_paths:
                 # TkinterDnDからのパスは通常既に正規化されている
                 if os.path.isfile(path_str): # 実際にファイルか確認
                     files_to_add.append(path_str)
+                elif os.path.isdir(path_str): # フォルダは中のWAVファイルを探索する
+                    dirs_to_scan.append(os.path.abspath(path_str))
             
-            if not files_to_add:
+            if not files_to_add and not dirs_to_scan:
                 self.status_var.set("有効なファイルパスがドロップされませんでした。")
                 return
 
-            added_count = 0
             skipped_non_wav = 0
             skipped_duplicate = 0
+            paths_to_probe = []
 
             for file_path in files_to_add:
                 # 拡張子が .wav または .wave のファイルのみを対象とする
-                if not file_path.lower().endswith((".wav", ".wave")):
+                if not is_wav_file(file_path):
                     skipped_non_wav += 1
                     continue
 
-                filename = os.path.basename(file_path)
                 # 重複チェックのために絶対パスを使用
                 filepath_abs = os.path.abspath(file_path) 
 
-                is_duplicate = False # 重複フラグ
-                for item_id_check in self.tree.get_children(): # Renamed item_id to avoid conflict
-                    # valuesのインデックス1がファイルパス
-                    if self.tree.item(item_id_check, "values")[1] == filepath_abs:
-                        is_duplicate = True
-                        skipped_duplicate += 1
-                        break
-                
-                if is_duplicate:
+                # 索引を使って重複をチェック (Treeviewを走査しない)。取り込み中のファイルも重複とみなす
+                if self.file_store.find(filepath_abs) is not None or filepath_abs in self._ingest_pending_paths:
+                    skipped_duplicate += 1
                     continue
 
-                try:
-                    # soundfile.infoでサンプリング周波数とチャンネル数を取得
-                    info = sf.info(filepath_abs)
-                    original_sr = info.samplerate
-                    original_channels = info.channels # チャンネル数を取得
-                    original_subtype = info.subtype # ビット深度（サブタイプ）を取得
-
-                    # Treeviewにアイテムを追加し、そのIDを取得
-                    item_id = self.tree.insert("", tk.END, values=(filename, filepath_abs, original_sr, original_channels, original_subtype, ""))
-                    added_count += 1
-                    
-                    if self.auto_resample_var.get(): # 自動変換モードがONの場合のみキューイング
-                        output_dir_for_task = None
-                        if self.save_to_source_var.get():
-                            output_dir_for_task = os.path.dirname(filepath_abs)
-                        else: # ソース元に保存しない場合 -> auto_output_dir を使う
-                            if not self.auto_output_dir: # auto_output_dir が必須なのに未設定
-                                self.status_var.set("自動変換エラー: 出力先フォルダが未指定です。")
-                                self.tree.set(item_id, column="status", value="出力先未指定")
-                                if self.auto_resample_var.get(): # まだONなら警告しOFFにする
-                                    messagebox.showerror("自動変換エラー", "自動変換用の出力先フォルダが設定されていません。\n「自動で変更する」をOFFにするか、設定を見直してください。")
-                                    self.auto_resample_var.set(False)
-                                    self.update_status_and_button_states()
-                                continue # このファイルのキューイングをスキップ
-                            output_dir_for_task = self.auto_output_dir
-
-                        if output_dir_for_task: # 出力先が確定した場合のみキューへ
-                            try:
-                                target_sr_hz, _ = self._get_target_sr_from_gui() # 現在の目標SRを取得
-                                target_channels = self._get_target_channels_from_gui() # 現在の目標チャンネル数を取得
-                                target_subtype = self._get_target_subtype_from_gui() # 現在の目標ビット深度を取得
-                                self.tree.set(item_id, column="status", value="キュー済")
-                                # タスクキューに渡す情報にビット深度も追加
-                                self.resample_task_queue.put((item_id, filepath_abs, target_sr_hz, target_channels, target_subtype, output_dir_for_task, filename, original_sr, original_channels, original_subtype))
-                                self.status_var.set(f"キュー追加: {filename}")
-                                self._ensure_worker_thread_running()
-                            except ValueError as ve: # 目標SR値やチャンネル値が無効な場合
-                                 self.tree.set(item_id, column="status", value="設定値エラー")
-                                 self.status_var.set(f"変換設定値エラーのためキュー追加失敗: {ve}")
-                        # else の場合、output_dir_for_task が None で、既にエラー処理されているはず
-
-                except Exception as e:
-                    self.status_var.set(f"エラー: {filename} の情報取得失敗 - {e}")
-                    print(f"Error getting info for {filepath_abs}: {e}")
-
-            # 処理結果をステータスバーに表示
-            messages = []
-            if added_count > 0:
-                messages.append(f"{added_count} 個のWAVファイルを追加しました。")
-            if skipped_non_wav > 0:
-                messages.append(f"{skipped_non_wav} 個の非WAVファイルを無視しました。")
-            if skipped_duplicate > 0:
-                messages.append(f"{skipped_duplicate} 個の重複ファイルを無視しました。")
-            
-            if not messages and files_to_add:
-                 self.status_var.set("追加可能なWAVファイルが見つかりませんでした。")
-            elif messages:
-                self.status_var.set(" ".join(messages))
-            # files_to_addが空の場合は最初のifで捕捉される
+                self._ingest_pending_paths.add(filepath_abs)
+                paths_to_probe.append(filepath_abs)
+
+            self._ingest_stats["skipped_non_wav"] += skipped_non_wav
+            self._ingest_stats["skipped_duplicate"] += skipped_duplicate
+            self._start_ingest(paths_to_probe, dirs_to_scan)
 
         except Exception as e:
             self.status_var.set(f"ドロップ処理エラー: {e}")
@@ -437,6 +674,206 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         # update_status_and_button_states() を呼ぶと、ドロップ結果のメッセージが上書きされてしまうため、呼ばない。
         # ボタンの状態は、ユーザーがアイテムを選択した際に on_tree_select() によって更新されるため、ここでは不要。
 
+    def _start_ingest(self, paths, dirs=()):
+        """ファイルの取り込み (メタデータ取得とリストへの追加) を開始します。
+
+        取り込み待ちのパスを取り込みスレッドに渡し、進捗表示と結果のポーリングを開始します。
+        取り込むファイルがない場合は、すぐに結果をステータスバーに表示します。
+
+        Args:
+            paths (list[str]): 取り込むWAVファイルの絶対パス (ドロップ順)。
+            dirs (list[str]): 中のWAVファイルを探索して取り込むフォルダの絶対パス。
+                ファイルの後に、フォルダごとに名前順で取り込みます。
+        """
+        if paths or dirs:
+            self._ingest_total += len(paths)
+            self._ingest_drops_in_flight += 1
+            if dirs:
+                self._ingest_scanning_dirs += 1
+            self._ingest_queue.put((paths, list(dirs)))
+            if self._ingest_thread is None or not self._ingest_thread.is_alive():
+                self._ingest_thread = threading.Thread(target=self._worker_ingest_files, daemon=True)
+                self._ingest_thread.start()
+            self._update_ingest_progress()
+
+        if self._ingest_poll_id is None:
+            self._process_ingest_results()
+
+    # 取り込みスレッドで実行されるメタデータ取得処理のメインループ
+    def _worker_ingest_files(self):
+        """取り込みスレッドのメインループです。
+
+        ドロップごとのパスを順に取り出し、`INGEST_CHUNK_SIZE` 件ずつ
+        スレッドプールで並列に `sf.info` を実行します。`Executor.map` は結果を
+        入力順に返すため、ドロップ順を保ったままチャンク単位で取り込み結果キューに格納します。
+        フォルダはここで遅延的に探索するため、ツリー全体のファイルリストは作りません。
+        フォルダ内の変換後のファイル名 (`is_output_filename`) のファイルは取り込みません。
+        1つのドロップを処理し終えると、結果キューに (None, フォルダを含むか) を格納して完了を通知します。
+        """
+        while not self.is_shutting_down:
+            try:
+                paths, dirs = self._ingest_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                # フォルダ内の変換結果 (同じフォルダに出力した場合など) は取り込まない
+                dir_paths = (p for d in dirs for p in iter_wav_paths(d, on_error=_print_scan_error)
+                             if not is_output_filename(os.path.basename(p)))
+                path_iter = itertools.chain(paths, dir_paths)
+                while not self.is_shutting_down:
+                    chunk = list(itertools.islice(path_iter, INGEST_CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    results = list(self._probe_executor.map(functools.partial(_probe_audio_info, self.metadata_cache), chunk))
+                    self._ingest_results_queue.put(list(zip(chunk, results)))
+            except Exception as e:
+                print(f"取り込みスレッドで予期せぬエラー: {e}")
+            finally:
+                self._ingest_results_queue.put((None, bool(dirs))) # このドロップの取り込み完了
+                self._ingest_queue.task_done()
+
+    def _process_ingest_results(self):
+        """取り込みスレッドからのメタデータ取得結果をリストに反映させます。
+
+        取り込み中は `after` で定期的に呼び出され、届いたチャンクを
+        まとめてファイルリストに追加します。自動変換モードがONの場合は、
+        追加したファイルを変換キューに投入します。
+        すべてのファイルの取り込みが終わると結果をステータスバーに表示します。
+        """
+        self._ingest_poll_id = None
+        try:
+            while True:
+                try:
+                    chunk = self._ingest_results_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if chunk[0] is None: # ドロップ1つ分の取り込み完了通知
+                    self._ingest_drops_in_flight -= 1
+                    if chunk[1]:
+                        self._ingest_scanning_dirs -= 1
+                    continue
+
+                for filepath_abs, (metadata, error) in chunk:
+                    if filepath_abs in self._ingest_pending_paths:
+                        self._ingest_pending_paths.discard(filepath_abs)
+                    else: # フォルダ内から見つかったファイル
+                        self._ingest_total += 1
+                        if self.file_store.find(filepath_abs) is not None:
+                            self._ingest_done += 1
+                            self._ingest_stats["skipped_duplicate"] += 1
+                            continue
+                    self._ingest_done += 1
+                    filename = os.path.basename(filepath_abs)
+                    if error is not None:
+                        self._ingest_stats["errors"] += 1
+                        print(f"Error getting info for {filepath_abs}: {error}")
+                        continue
+
+                    # ストアに行を追加し、そのIDを取得 (Treeviewへの表示はチャンクごとにまとめて行う)
+                    item_id = self.file_store.add(filepath_abs, filename, metadata.samplerate, metadata.channels, metadata.subtype)
+                    self._ingest_stats["added"] += 1
+                    self._schedule_render()
+
+                    if self.auto_resample_var.get(): # 自動変換モードがONの場合のみキューイング
+                        self._queue_auto_resample(item_id, filepath_abs, filename, metadata)
+        finally:
+            if self._ingest_drops_in_flight > 0:
+                self._update_ingest_progress()
+                if not self.is_shutting_down:
+                    self._ingest_poll_id = self.after(INGEST_POLL_INTERVAL_MS, self._process_ingest_results)
+            else:
+                self._finish_ingest()
+
+    def _update_ingest_progress(self):
+        """取り込みの進捗をプログレスバーとステータスバーに表示します。
+
+        フォルダの探索中は総数が確定しないため、プログレスバーを不確定モードで表示します。
+        """
+        if not self.progress_bar.winfo_ismapped():
+            self.progress_bar.pack(side=tk.BOTTOM, fill="x", padx=10, pady=(0, 2), after=self.status_label)
+        if self._ingest_scanning_dirs > 0:
+            if str(self.progress_bar.cget("mode")) != "indeterminate":
+                self.progress_bar.configure(mode="indeterminate")
+                self.progress_bar.start(INGEST_POLL_INTERVAL_MS)
+            self.status_var.set(f"フォルダを探索してファイル情報を取得中... ({self._ingest_done} 個取得済み)")
+        else:
+            if str(self.progress_bar.cget("mode")) != "determinate":
+                self.progress_bar.stop()
+                self.progress_bar.configure(mode="determinate")
+            self.progress_bar.configure(maximum=max(self._ingest_total, 1), value=self._ingest_done)
+            self.status_var.set(f"ファイル情報を取得中... ({self._ingest_done}/{self._ingest_total})")
+
+    def _finish_ingest(self):
+        """取り込み完了時に進捗表示を片付け、結果をステータスバーに表示します。"""
+        if self.progress_bar.winfo_ismapped():
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode="determinate")
+            self.progress_bar.pack_forget()
+
+        stats = self._ingest_stats
+        # 処理結果をステータスバーに表示
+        messages = []
+        if stats["added"] > 0:
+            messages.append(f"{stats['added']} 個のWAVファイルを追加しました。")
+        if stats["skipped_non_wav"] > 0:
+            messages.append(f"{stats['skipped_non_wav']} 個の非WAVファイルを無視しました。")
+        if stats["skipped_duplicate"] > 0:
+            messages.append(f"{stats['skipped_duplicate']} 個の重複ファイルを無視しました。")
+        if stats["errors"] > 0:
+            messages.append(f"{stats['errors']} 個のファイルは情報取得に失敗しました。")
+
+        # 自動変換の設定エラーなど、取り込み中に表示したエラーメッセージは上書きしない
+        if not self._ingest_error_shown:
+            if messages:
+                self.status_var.set(" ".join(messages))
+            else:
+                self.status_var.set("追加可能なWAVファイルが見つかりませんでした。")
+
+        self._ingest_total = 0
+        self._ingest_done = 0
+        self._ingest_error_shown = False
+        self._ingest_stats = dict.fromkeys(self._ingest_stats, 0)
+
+    def _queue_auto_resample(self, item_id, filepath_abs, filename, metadata):
+        """自動変換モードで、リストに追加したファイルを変換キューに投入します。
+
+        Args:
+            item_id (int): ファイルリストのアイテムID。
+            filepath_abs (str): ファイルの絶対パス。
+            filename (str): ファイル名。
+            metadata (AudioMetadata): 取り込み時に取得したメタデータの記録。
+        """
+        output_dir_for_task = None
+        if self.save_to_source_var.get():
+            output_dir_for_task = os.path.dirname(filepath_abs)
+        else: # ソース元に保存しない場合 -> auto_output_dir を使う
+            if not self.auto_output_dir: # auto_output_dir が必須なのに未設定
+                self.status_var.set("自動変換エラー: 出力先フォルダが未指定です。")
+                self._ingest_error_shown = True
+                self._set_item_status(item_id, "出力先未指定")
+                if self.auto_resample_var.get(): # まだONなら警告しOFFにする
+                    messagebox.showerror("自動変換エラー", "自動変換用の出力先フォルダが設定されていません。\n「自動で変更する」をOFFにするか、設定を見直してください。")
+                    self.auto_resample_var.set(False)
+                    self.update_status_and_button_states()
+                return # このファイルのキューイングをスキップ
+            output_dir_for_task = self.auto_output_dir
+
+        try:
+            # 現在の出力形式 (目標SR・チャンネル数・ビット深度) を取得
+            (target_sr_hz, target_channels, target_subtype), *extra_targets = self._get_targets_from_gui()
+            quality = self._get_quality_from_gui()
+            self._set_item_status(item_id, "キュー済")
+            job = job_for_file(filepath_abs, target_sr_hz, target_channels, target_subtype, output_dir_for_task,
+                               metadata=metadata, extra_targets=tuple(extra_targets), quality=quality,
+                               dither=self.dither_var.get(), channel_map=self._get_channel_map_from_gui())
+            self._put_resample_task(item_id, job)
+            self._ensure_worker_thread_running()
+        except ValueError as ve: # 目標SR値やチャンネル値が無効な場合
+            self._set_item_status(item_id, "設定値エラー")
+            self.status_var.set(f"変換設定値エラーのためキュー追加失敗: {ve}")
+            self._ingest_error_shown = True
+
     def _get_target_sr_from_gui(self):
         """GUIから目標サンプリング周波数を読み取ります。
 
@@ -450,32 +887,36 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
             ValueError: パースに失敗した場合や、値が0以下の場合。
         """
         target_sr_input_str = self.target_sr_var.get()
-        try:
-            parts = target_sr_input_str.split()
-            value = float(parts[0])
-            unit = parts[1].lower()
-
-            if unit == "khz":
-                target_sr_hz = int(value * 1000)
-            elif unit == "hz":
-                target_sr_hz = int(value)
-            else:
-                raise ValueError(f"無効な単位です: {parts[1]}")
-
-        except (ValueError, IndexError) as e:
-            raise ValueError(f"目標サンプリング周波数の値 '{target_sr_input_str}' をパースできませんでした。") from e
-
-        if target_sr_hz <= 0:
-            raise ValueError("目標サンプリング周波数は正の整数である必要があります。")
+        target_sr_hz = parse_sample_rate(target_sr_input_str)
         return target_sr_hz, target_sr_input_str
 
     def _get_target_channels_from_gui(self):
-        """目標チャンネル数を取得します。現在はステレオ(2)に固定されています。
+        """GUIから目標チャンネル数を取得します。
+
+        Returns:
+            int: 目標チャンネル数 (2: ステレオ, 1: モノラル)。
+
+        Raises:
+            ValueError: 無効な選択肢の場合。
+        """
+        target_channels = CHANNEL_LABELS.get(self.target_channels_var.get())
+        if target_channels is None:
+            raise ValueError("無効なチャンネル数が選択されています。")
+        return target_channels
+
+    def _get_channel_map_from_gui(self):
+        """GUIからチャンネルの対応 (ダウンミックスなどのプリセット名) を取得します。
 
         Returns:
-            int: 目標チャンネル数 (2: ステレオ)。
+            str: チャンネルの対応 ("auto" / "itu" / "mix" / "duplicate")。
+
+        Raises:
+            ValueError: 無効な選択肢の場合。
         """
-        return 2
+        channel_map = CHANNEL_MAP_LABELS.get(self.channel_map_var.get())
+        if channel_map is None:
+            raise ValueError("無効なチャンネルの対応が選択されています。")
+        return channel_map
 
     def _get_target_subtype_from_gui(self):
         """GUIから目標ビット深度に対応するsubtype文字列を取得します。
@@ -487,17 +928,289 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
             ValueError: 無効な選択肢の場合。
         """
         selected_str = self.target_bit_depth_var.get()
-        if "16bit" in selected_str:
-            return "PCM_16"
-        elif "8bit" in selected_str:
-            return "PCM_S8"
+        # 選択肢の先頭 "16bit" / "8bit" からビット深度を取り出す
+        bit_depth_str = selected_str.split("bit")[0]
+        try:
+            return subtype_for_bit_depth(bit_depth_str)
+        except ValueError as e:
+            raise ValueError("無効なビット深度が選択されています。") from e
+
+    def _get_targets_from_gui(self):
+        """GUIから出力形式のリストを取得します。
+
+        「出力形式」でプロファイルが選ばれている場合はプロファイルの全形式を、
+        そうでなければ目標サンプリング周波数・ビット深度の設定による1形式を返します。
+        先頭の形式が主な出力形式で、残りは同じ元ファイルから続けて書き出す追加の形式です。
+
+        Returns:
+            list[ConversionTarget]: 出力形式のリスト (1件以上)。
+
+        Raises:
+            ValueError: 設定値が無効な場合。
+        """
+        target_channels = self._get_target_channels_from_gui()
+        profile_name = OUTPUT_PROFILE_LABELS.get(self.output_profile_var.get())
+        if profile_name is not None:
+            return [target._replace(channels=target_channels) for target in TARGET_PROFILES[profile_name]]
+        target_sr, _ = self._get_target_sr_from_gui()
+        return [ConversionTarget(target_sr, target_channels, self._get_target_subtype_from_gui())]
+
+    def _get_quality_from_gui(self):
+        """GUIから変換品質の段階を取得します。
+
+        Returns:
+            str: 変換品質の段階 ("hq": 高品質, "fast": 高速)。
+
+        Raises:
+            ValueError: 無効な選択肢の場合。
+        """
+        quality = QUALITY_LABELS.get(self.quality_var.get())
+        if quality is None:
+            raise ValueError("無効な品質が選択されています。")
+        return quality
+
+    def find_item_by_path(self, filepath):
+        """ファイルパスに対応するファイルリストのアイテムIDを返します。
+
+        Args:
+            filepath (str): ファイルパス。
+
+        Returns:
+            int | None: アイテムID。リストにない場合はNone。
+        """
+        return self.file_store.find(os.path.abspath(filepath))
+
+    # --- ファイルリストの表示 (画面に見えている行だけをTreeviewに表示する) ---
+    def _set_item_status(self, item_id, status):
+        """行の「状態」を更新します。画面に表示中の行であればTreeviewにも反映します。
+
+        Args:
+            item_id (int): ファイルリストのアイテムID。
+            status (str): 処理状態。
+        """
+        if self.file_store.set_status(item_id, status):
+            row_iid = self._row_iid_by_key.get(item_id)
+            if row_iid is not None:
+                self.tree.set(row_iid, column="status", value=status)
+
+    def _schedule_render(self, event=None):
+        """ファイルリストの再描画をアイドル時に1回だけ行うように予約します。"""
+        if not self._render_pending and not self.is_shutting_down:
+            self._render_pending = True
+            self.after_idle(self._render_rows)
+
+    def _visible_row_count(self):
+        """Treeviewに一度に表示できる行数を返します。"""
+        row_height = int(self.style.lookup("Treeview", "rowheight") or 25)
+        return max(1, (self.tree.winfo_height() - self._heading_height) // row_height)
+
+    def _render_rows(self):
+        """ストアの表示順のうち、画面に見えている範囲の行だけをTreeviewに表示します。
+
+        Treeviewの行は表示できる行数分だけ確保して使い回し、値と選択状態を書き換えます。
+        行数に関係なく、Treeviewが保持する行は常に画面1枚分です。
+        """
+        self._render_pending = False
+        total = self.file_store.view_length()
+        count = self._visible_row_count()
+        self._view_top = max(0, min(self._view_top, total - count))
+        entries = self.file_store.view_slice(self._view_top, self._view_top + count)
+
+        # 表示用の行を必要な数だけ確保する
+        while len(self._row_iids) < len(entries):
+            self._row_iids.append(self.tree.insert("", tk.END))
+        if len(self._row_iids) > len(entries):
+            self.tree.delete(*self._row_iids[len(entries):])
+            del self._row_iids[len(entries):]
+
+        self._key_by_row_iid = {}
+        self._row_iid_by_key = {}
+        selected_iids = []
+        focus_iid = None
+        for row_iid, entry in zip(self._row_iids, entries):
+            self.tree.item(row_iid, values=entry.values())
+            self._key_by_row_iid[row_iid] = entry.key
+            self._row_iid_by_key[entry.key] = row_iid
+            if entry.key in self._selected_keys:
+                selected_iids.append(row_iid)
+            if entry.key == self._focus_key:
+                focus_iid = row_iid
+        self.tree.selection_set(selected_iids)
+        if focus_iid:
+            self.tree.focus(focus_iid)
+
+        if self._row_iids:
+            # 見出し行の高さを実測し、表示できる行数の計算に使う
+            bbox = self.tree.bbox(self._row_iids[0])
+            if bbox:
+                self._heading_height = bbox[1]
+
+        if total > count:
+            self.scrollbar_y.set(self._view_top / total, (self._view_top + count) / total)
         else:
-            raise ValueError("無効なビット深度が選択されています。")
+            self.scrollbar_y.set(0.0, 1.0)
+
+    def _scroll_to(self, top):
+        """表示位置を変更して再描画します。
+
+        Args:
+            top (int): 先頭に表示する行の表示順での行番号。
+        """
+        top = max(0, min(top, self.file_store.view_length() - self._visible_row_count()))
+        if top != self._view_top:
+            self._view_top = top
+            self._render_rows()
+
+    def _on_yscroll(self, *args):
+        """垂直スクロールバーの操作を処理します。
+
+        Args:
+            *args: ("moveto", 割合) または ("scroll", 量, "units" | "pages")。
+        """
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self.file_store.view_length()))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self._visible_row_count()
+            self._scroll_to(self._view_top + step)
+
+    def _on_mousewheel(self, event):
+        """マウスホイールでファイルリストをスクロールします。"""
+        if event.num == 4:
+            rows = -WHEEL_SCROLL_ROWS
+        elif event.num == 5:
+            rows = WHEEL_SCROLL_ROWS
+        elif abs(event.delta) >= 120: # Windows: 1ノッチ = 120
+            rows = -(event.delta // 120) * WHEEL_SCROLL_ROWS
+        else: # macOS: 1ノッチ = 1
+            rows = -event.delta
+        self._scroll_to(self._view_top + rows)
+        return "break"
+
+    def _on_row_click(self, event):
+        """行のクリックを処理します。
+
+        修飾キーなしのクリックでは、画面外の行も含めて選択を解除してから
+        Treeview標準の処理でクリックした行を選択します。
+        Shift+クリックの範囲選択は、画面外の行も含めてストアの表示順で行います。
+        """
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        key = self._key_by_row_iid.get(self.tree.identify_row(event.y))
+        if key is None:
+            return None
+        if event.state & 0x0001 and self._anchor_key is not None: # Shift
+            self._focus_key = key
+            self._select_range(self._anchor_key, key)
+            return "break"
+        if not event.state & 0x0004: # Ctrlなし
+            self._selected_keys.clear()
+        self._focus_key = key
+        self._anchor_key = key
+        return None
+
+    def _select_range(self, anchor_key, key):
+        """2つの行の間 (両端を含む) をすべて選択します。"""
+        anchor_index = self.file_store.view_index(anchor_key)
+        index = self.file_store.view_index(key)
+        if anchor_index is None or index is None:
+            return
+        start, stop = sorted((anchor_index, index))
+        self._selected_keys = {entry.key for entry in self.file_store.view_slice(start, stop + 1)}
+        self._render_rows()
+        self.on_tree_select()
+
+    def _on_tree_key_nav(self, event):
+        """矢印キーなどによる行の移動を、画面外の行も含めてストアの表示順で処理します。"""
+        total = self.file_store.view_length()
+        if total == 0:
+            return "break"
+        count = self._visible_row_count()
+        current = self.file_store.view_index(self._focus_key) if self._focus_key is not None else None
+        if current is None:
+            current = self._view_top
+            index = current
+        else:
+            moves = {"Up": -1, "Down": 1, "Prior": -count, "Next": count}
+            if event.keysym == "Home":
+                index = 0
+            elif event.keysym == "End":
+                index = total - 1
+            else:
+                index = current + moves[event.keysym]
+        index = max(0, min(index, total - 1))
+
+        self._focus_key = self.file_store.view_slice(index, index + 1)[0].key
+        if index < self._view_top:
+            self._view_top = index
+        elif index >= self._view_top + count:
+            self._view_top = index - count + 1
+        if event.state & 0x0001 and self._anchor_key is not None: # Shift: 範囲選択
+            self._select_range(self._anchor_key, self._focus_key)
+        else:
+            self._anchor_key = self._focus_key
+            self._selected_keys = {self._focus_key}
+            self._render_rows()
+            self.on_tree_select()
+        return "break"
+
+    def _select_all_rows(self, event=None):
+        """表示対象のすべての行を選択します (Ctrl+A)。"""
+        self._selected_keys = set(self.file_store.view_keys())
+        self._render_rows()
+        self.on_tree_select()
+        return "break"
+
+    def _selected_keys_in_view_order(self):
+        """選択中のアイテムIDを表示順に返します。"""
+        if not self._selected_keys:
+            return []
+        return [key for key in self.file_store.view_keys() if key in self._selected_keys]
+
+    def _sort_by_column(self, column):
+        """見出しがクリックされた列でファイルリストを並べ替えます。同じ列を再度クリックすると逆順にします。
+
+        Args:
+            column (str): 列ID。
+        """
+        reverse = self.file_store.sort_column == column and not self.file_store.sort_reverse
+        self.file_store.sort_by(column, reverse=reverse)
+        for col_id, text in self._heading_texts.items():
+            if col_id == column:
+                text += " ▼" if reverse else " ▲"
+            self.tree.heading(col_id, text=text)
+        self._view_top = 0
+        self._render_rows()
+
+    def _on_filter_change(self, *args):
+        """絞り込み文字列の変更を受け取り、入力が止まってから絞り込みを実行するように予約します。"""
+        if self._filter_after_id is not None:
+            self.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.after(FILTER_DEBOUNCE_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        """ファイル名またはパスに絞り込み文字列を含む行だけを表示します。"""
+        self._filter_after_id = None
+        self.file_store.set_filter(self.filter_var.get())
+        # 非表示になった行は選択から外す (「選択消去」などで見えない行を操作しないため)
+        if self._selected_keys:
+            self._selected_keys.intersection_update(self.file_store.view_keys())
+        self._view_top = 0
+        self._render_rows()
+        self.on_tree_select()
+        if self.file_store.filter_text:
+            self.status_var.set(f"{self.file_store.view_length()} / {len(self.file_store)} 個のファイルを表示中。")
 
     def clear_list(self):
-        """ファイルリスト（Treeview）の内容をすべてクリアします。"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """ファイルリストの内容をすべてクリアします。"""
+        self.file_store.clear()
+        self._selected_keys.clear()
+        self._focus_key = None
+        self._anchor_key = None
+        self.metadata_cache.clear()
+        self._view_top = 0
+        self._render_rows()
         self.status_var.set("ファイルリストがクリアされました。")
         self.on_tree_select() # クリア後は何も選択されていないのでボタン状態更新
 
@@ -505,10 +1218,12 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
     def start_resampling_process(self):
         """リスト内のすべてのファイルの変換処理を開始します（一括変換）。
 
-        GUIから設定値を取得し、リスト内の各ファイルに対して変換処理を実行します。
-        処理中はUIを無効化し、完了後に結果をメッセージボックスで表示します。
+        GUIから設定値を取得し、リスト内の各ファイルを変換タスクとして
+        バックグラウンドのワーカーに送ります。処理中はUIを無効化し、
+        すべての結果が揃った時点で `_finish_manual_batch` が結果を表示します。
         """
-        items = self.tree.get_children()
+        # 絞り込み中は、表示されているファイルだけを対象とする
+        items = self.file_store.view_keys()
         if not items:
             # リストが空の場合は警告を表示
             messagebox.showwarning("情報なし", "変換対象のファイルがリストにありません。")
@@ -516,9 +1231,9 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
             return
 
         try:
-            target_sr, _ = self._get_target_sr_from_gui()
-            target_channels = self._get_target_channels_from_gui()
-            target_subtype = self._get_target_subtype_from_gui()
+            targets = self._get_targets_from_gui()
+            quality = self._get_quality_from_gui()
+            channel_map = self._get_channel_map_from_gui()
         except ValueError as e:
             messagebox.showerror("入力エラー", str(e))
             self.status_var.set(str(e))
@@ -532,104 +1247,26 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
                 self.status_var.set("保存先フォルダが選択されませんでした。処理を中止します。")
                 return
 
-        # 処理中はUIを無効化
-        self.resample_button.config(state=tk.DISABLED)
-        self.clear_button.config(state=tk.DISABLED)
-        self.delete_button.config(state=tk.DISABLED) 
-        self.individual_resample_button.config(state=tk.DISABLED) 
-        self.auto_resample_check.config(state=tk.DISABLED) 
-        self.save_to_source_check.config(state=tk.DISABLED) 
-
-        # カウンタの初期化
-        processed_count = 0
-        error_count = 0
-        skipped_count = 0
-        actually_converted_count = 0 
-
-        for item_id in items:
-            values = self.tree.item(item_id, "values")
-            # GUIからはファイル名とパスのみ取得
-            filename, filepath, _, _, _, _ = values
-
-            # GUIの値を信頼せず、処理直前にファイルから直接メタデータを再取得
-            try:
-                info = sf.info(filepath)
-                original_sr = info.samplerate
-                original_channels = info.channels
-                original_subtype = info.subtype
-            except Exception as e:
-                self.tree.set(item_id, column="status", value="エラー")
-                self.status_var.set(f"{filename}: メタデータ読込エラー - {e}")
-                error_count += 1
-                continue # 次のファイルへ
-            # GUIのステータスを更新
-            self.tree.set(item_id, column="status", value="処理中...")
-            self.status_var.set(f"処理中: {filename}...")
-            self.update_idletasks() 
-
-            # 出力先ディレクトリを決定
-            current_output_dir = ""
-            if self.save_to_source_var.get():
-                current_output_dir = os.path.dirname(filepath)
-            else:
-                current_output_dir = output_dir_for_batch 
-
-            # 変換ロジックにビット深度の情報も渡す
-            result_status, message = self._perform_single_resample_logic(filepath, original_sr, original_channels, original_subtype, target_sr, target_channels, target_subtype, current_output_dir, filename)
-            
-            # 結果をGUIに反映
-            self.tree.set(item_id, column="status", value=result_status)
-            self.status_var.set(f"{filename}: {result_status} {(' - ' + message) if message and result_status != '処理中...' else ''}") 
-            self.update_idletasks()
-            
-            if result_status == "処理済":
-                processed_count += 1
-                if "スキップ" in message: 
-                    skipped_count +=1
-                else: 
-                    actually_converted_count +=1
-            elif result_status == "エラー":
-                error_count += 1
-
-        # 処理完了後、UIを再度有効化
-        self.resample_button.config(state=tk.NORMAL)
-        self.clear_button.config(state=tk.NORMAL)
-        self.auto_resample_check.config(state=tk.NORMAL) 
-        self.save_to_source_check.config(state=tk.NORMAL) 
-        self.on_tree_select() 
-
-        # 最終結果をメッセージボックスとステータスバーで表示
-        final_message_parts = [f"{actually_converted_count}個のファイルを変換しました。"]
-        if skipped_count > 0:
-             final_message_parts.append(f"{skipped_count}個スキップ。")
-        if error_count > 0:
-            final_message = f"処理完了。{actually_converted_count}個成功、{error_count}個エラー、{skipped_count}個スキップ。"
-            messagebox.showwarning("処理完了（一部エラーあり）", final_message)
-        else:
-            final_message = f"処理完了。{actually_converted_count}個のファイルが正常に変換されました。"
-            if skipped_count > 0:
-                final_message += f" ({skipped_count}個は目標周波数とチャンネル数と同一のためスキップ)"
-            messagebox.showinfo("処理完了", final_message)
-        
-        self.status_var.set(final_message)
+        self._enqueue_manual_batch("all", items, targets, quality, output_dir_for_batch, channel_map=channel_map)
 
     # 「選択ファイル変換」ボタンが押されたときの処理
     def start_selected_resampling_process(self):
         """リストで選択されているファイルの変換処理を開始します。
 
-        GUIから設定値を取得し、選択された各ファイルに対して変換処理を実行します。
-        処理中はUIを無効化し、完了後に結果をメッセージボックスで表示します。
+        GUIから設定値を取得し、選択された各ファイルを変換タスクとして
+        バックグラウンドのワーカーに送ります。処理中はUIを無効化し、
+        すべての結果が揃った時点で `_finish_manual_batch` が結果を表示します。
         """
-        selected_items = self.tree.selection()
+        selected_items = self._selected_keys_in_view_order()
         if not selected_items:
             messagebox.showwarning("情報なし", "変換対象のファイルが選択されていません。")
             self.status_var.set("選択されたファイルがありません。")
             return
 
         try:
-            target_sr, _ = self._get_target_sr_from_gui()
-            target_channels = self._get_target_channels_from_gui()
-            target_subtype = self._get_target_subtype_from_gui()
+            targets = self._get_targets_from_gui()
+            quality = self._get_quality_from_gui()
+            channel_map = self._get_channel_map_from_gui()
         except ValueError as e:
             messagebox.showerror("入力エラー", str(e))
             self.status_var.set(str(e))
@@ -648,6 +1285,24 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
                 return
             self.last_individual_output_dir = output_dir_for_selected 
 
+        self._enqueue_manual_batch("selected", selected_items, targets, quality, output_dir_for_selected,
+                                   channel_map=channel_map)
+
+    def _enqueue_manual_batch(self, kind, item_ids, targets, quality, output_dir, channel_map=DEFAULT_CHANNEL_MAP):
+        """手動変換（一括・選択）の対象ファイルをワーカーのタスクキューに投入します。
+
+        自動変換と同じ `resample_task_queue` / `resample_results_queue` の経路を使うため、
+        変換中もGUIスレッドはブロックされません。元ファイルのメタデータは
+        取り込み時の記録を渡し、ワーカー側で stat により変更がないことを確認してから使います。
+
+        Args:
+            kind (str): バッチの種類 ("all": 一括変換, "selected": 選択ファイル変換)。
+            item_ids (list[int]): 対象となるファイルリストのアイテムID。
+            targets (list[ConversionTarget]): 出力形式のリスト。先頭が主な出力形式です。
+            quality (str): 変換品質の段階 ("hq": 高品質, "fast": 高速)。
+            output_dir (str | None): 出力先ディレクトリ。Noneの場合はソース元に保存します。
+            channel_map (str): チャンネルの対応 ("auto" / "itu" / "mix" / "duplicate")。
+        """
         # 処理中はUIを無効化
         self.resample_button.config(state=tk.DISABLED)
         self.individual_resample_button.config(state=tk.DISABLED)
@@ -656,92 +1311,145 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         self.auto_resample_check.config(state=tk.DISABLED)
         self.save_to_source_check.config(state=tk.DISABLED)
 
-        # カウンタの初期化
-        processed_count = 0
-        error_count = 0
-        skipped_count = 0
-        actually_converted_count = 0
-
-        for item_id in selected_items:
-            values = self.tree.item(item_id, "values")
-            # GUIからはファイル名とパスのみ取得
-            filename, filepath, _, _, _, _ = values
+        (target_sr, target_channels, target_subtype), *extra_targets = targets
+        batch_id = next(self._batch_id_counter)
+        dither = self.dither_var.get()
+        self._batches[batch_id] = {"kind": kind, "total": len(item_ids), "done": 0,
+                                   "converted": 0, "skipped": 0, "errors": 0}
+
+        for item_id in item_ids:
+            filepath = self.file_store.get(item_id).filepath
+            current_output_dir = output_dir if output_dir else os.path.dirname(filepath)
+            self._set_item_status(item_id, "キュー済")
+            # 取り込み時のメタデータの記録を渡す (検証はワーカーが stat だけで行い、変更があれば再取得する)
+            metadata = self.metadata_cache.peek(filepath)
+            job = job_for_file(filepath, target_sr, target_channels, target_subtype, current_output_dir,
+                               metadata=metadata, extra_targets=tuple(extra_targets), quality=quality, dither=dither,
+                               channel_map=channel_map)
+            self._put_resample_task(item_id, job, batch_id=batch_id)
+
+        self.status_var.set(f"{len(item_ids)} 個のファイルを変換キューに追加しました。")
+        self._ensure_worker_thread_running()
+
+    def _put_resample_task(self, item_id, job, batch_id=None, journal_id=None):
+        """変換ジョブをジャーナルに記録してから、ワーカーのタスクキューに投入します。
 
-            # GUIの値を信頼せず、処理直前にファイルから直接メタデータを再取得
+        Args:
+            item_id (int): ファイルリストのアイテムID。
+            job (ResampleJob): 変換ジョブ。
+            batch_id (int | None): 手動変換バッチのID。自動変換の場合はNone。
+            journal_id (int | None): ジャーナル上のジョブID。Noneの場合は新たに記録します。
+        """
+        if journal_id is None and self.journal is not None:
             try:
-                info = sf.info(filepath)
-                original_sr = info.samplerate
-                original_channels = info.channels
-                original_subtype = info.subtype
-            except Exception as e:
-                self.tree.set(item_id, column="status", value="エラー")
-                self.status_var.set(f"{filename}: メタデータ読込エラー - {e}")
-                error_count += 1
-                continue # 次のファイルへ
-            # GUIのステータスを更新
-            self.tree.set(item_id, column="status", value="処理中...")
-            self.status_var.set(f"処理中: {filename}...")
-            self.update_idletasks()
-
-            # 出力先ディレクトリを決定
-            current_output_dir = os.path.dirname(filepath) if self.save_to_source_var.get() else output_dir_for_selected
-
-            # 変換処理を実行
-            result_status, message = self._perform_single_resample_logic(filepath, original_sr, original_channels, original_subtype, target_sr, target_channels, target_subtype, current_output_dir, filename)
-            # 結果をGUIに反映
-            self.tree.set(item_id, column="status", value=result_status)
-            self.status_var.set(f"{filename}: {result_status} {(' - ' + message) if message and result_status != '処理中...' else ''}")
-            self.update_idletasks()
-
-            if result_status == "処理済":
-                processed_count += 1
-                if "スキップ" in message:
-                    skipped_count +=1
-                else:
-                    actually_converted_count +=1
-            elif result_status == "エラー":
-                error_count += 1
+                journal_id = self.journal.queued(job)
+            except OSError as e:
+                print(f"ジャーナルへの記録に失敗しました: {e}")
+        self.resample_task_queue.put((item_id, job, batch_id, journal_id))
+
+    def _record_batch_result(self, batch_id, status, message):
+        """手動変換バッチの1ファイル分の結果を集計し、全件完了していれば終了処理を行います。
+
+        Args:
+            batch_id (int): 結果が属するバッチのID。
+            status (str): 処理結果のステータス文字列。
+            message (str): 詳細メッセージ。
+        """
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return
+
+        batch["done"] += 1
+        if status == "処理済":
+            if message and "スキップ" in message:
+                batch["skipped"] += 1
+            else:
+                batch["converted"] += 1
+        elif status == "エラー":
+            batch["errors"] += 1
+
+        if batch["done"] >= batch["total"]:
+            del self._batches[batch_id]
+            # 結果ダイアログはポーリング処理の外で表示する
+            self.after_idle(self._finish_manual_batch, batch)
 
+    def _finish_manual_batch(self, batch):
+        """手動変換バッチの完了後にUIを再度有効化し、最終結果を表示します。
+
+        Args:
+            batch (dict): `_record_batch_result` で集計したバッチ情報。
+        """
         # 処理完了後、UIを再度有効化
+        self.resample_button.config(state=tk.NORMAL)
+        self.clear_button.config(state=tk.NORMAL)
         self.auto_resample_check.config(state=tk.NORMAL)
         self.save_to_source_check.config(state=tk.NORMAL)
-        self.clear_button.config(state=tk.NORMAL) 
-        self.update_status_and_button_states() 
-        self.on_tree_select() 
+        self.on_tree_select()
+
+        actually_converted_count = batch["converted"]
+        skipped_count = batch["skipped"]
+        error_count = batch["errors"]
 
         # 最終結果をメッセージボックスとステータスバーで表示
-        final_message = f"選択ファイル処理完了。{actually_converted_count}個成功、{error_count}個エラー、{skipped_count}個スキップ。"
-        messagebox.showinfo("処理完了", final_message)
+        if batch["kind"] == "selected":
+            final_message = f"選択ファイル処理完了。{actually_converted_count}個成功、{error_count}個エラー、{skipped_count}個スキップ。"
+            messagebox.showinfo("処理完了", final_message)
+        elif error_count > 0:
+            final_message = f"処理完了。{actually_converted_count}個成功、{error_count}個エラー、{skipped_count}個スキップ。"
+            messagebox.showwarning("処理完了（一部エラーあり）", final_message)
+        else:
+            final_message = f"処理完了。{actually_converted_count}個のファイルが正常に変換されました。"
+            if skipped_count > 0:
+                final_message += f" ({skipped_count}個は目標周波数とチャンネル数と同一のためスキップ)"
+            messagebox.showinfo("処理完了", final_message)
+
         self.status_var.set(final_message)
 
     # 「選択消去」ボタンが押されたときの処理
     def delete_selected_items(self):
-        """ファイルリスト（Treeview）で選択されているアイテムを削除します。"""
-        selected_items = self.tree.selection()
-        if not selected_items:
+        """ファイルリストで選択されているアイテムを削除します (画面外の選択中の行も含む)。"""
+        if not self._selected_keys:
             self.status_var.set("消去するアイテムが選択されていません。")
             return
 
-        for item_id in selected_items:
-            self.tree.delete(item_id)
-        
-        self.status_var.set(f"{len(selected_items)} 個のアイテムをリストから消去しました。")
+        removed = self.file_store.remove(self._selected_keys) # ストア上でまとめて削除
+        for entry in removed:
+            self.metadata_cache.invalidate(entry.filepath)
+        self._selected_keys.clear()
+        self._render_rows()
+
+        self.status_var.set(f"{len(removed)} 個のアイテムをリストから消去しました。")
         self.on_tree_select() # 削除後、選択状態が変わるのでボタン状態更新
 
     # Treeviewのアイテム選択が変更されたときのイベントハンドラ
     def on_tree_select(self, event=None):
         """ファイルリストのアイテム選択状態の変更をハンドルします。
 
+        Treeviewに表示中の行の選択状態をストア側の選択 (`_selected_keys`) に反映し、
         アイテムが選択されているかどうかに応じて、「選択消去」ボタンと
         「選択ファイル変換」ボタンの有効/無効状態を切り替えます。
+        手動変換バッチの処理中は、どちらのボタンも無効のままにします。
 
         Args:
             event: Tkinterから渡されるイベントオブジェクト（通常は使用しない）。
         """
-        has_selection = bool(self.tree.selection())
+        selected_iids = set(self.tree.selection())
+        for row_iid, key in self._key_by_row_iid.items():
+            if row_iid in selected_iids:
+                self._selected_keys.add(key)
+            else:
+                self._selected_keys.discard(key)
+        focus_key = self._key_by_row_iid.get(self.tree.focus())
+        if focus_key is not None:
+            self._focus_key = focus_key
+        has_selection = bool(self._selected_keys)
         auto_mode = self.auto_resample_var.get()
 
-        if has_selection:
+        if self._batches:
+            # 手動変換バッチの処理中はリスト操作と追加の変換を受け付けない
+            self.delete_button.config(state=tk.DISABLED)
+            self.individual_resample_button.config(state=tk.DISABLED)
+        elif has_selection:
             self.delete_button.config(state=tk.NORMAL)
             self.individual_resample_button.config(state=tk.NORMAL if not auto_mode else tk.DISABLED)
         else:
@@ -770,6 +1478,94 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
                     messagebox.showwarning("出力先未指定", "出力先が指定されなかったため、自動変換をOFFにしました。")
         self.update_status_and_button_states()
 
+    def on_watch_toggle(self):
+        """「フォルダ監視」チェックボックスの状態変更を処理します。
+
+        ONにすると監視するフォルダを選択させて監視を開始し、OFFにすると監視を止めます。
+        """
+        if not self.watch_var.get():
+            self._stop_folder_watch()
+            self.status_var.set("フォルダの監視を終了しました。")
+            return
+        directory = filedialog.askdirectory(title="監視するフォルダを選択")
+        if not directory:
+            self.watch_var.set(False)
+            return
+        self._start_folder_watch(directory)
+
+    def _start_folder_watch(self, directory):
+        """フォルダの監視を開始します。
+
+        監視フォルダに置かれたファイルは、ドラッグ＆ドロップと同じ取り込み処理を通ってリストに追加され、
+        自動変換モードで同じタスクキュー・ワーカープールに投入されます。
+        自動変換モードがOFFの場合はONにします (出力先が未指定なら選択させます)。
+
+        Args:
+            directory (str): 監視するフォルダ。
+        """
+        self._stop_folder_watch()
+        # 監視スレッドはキューに入れるだけで、Tkには触れない (GUIスレッドが after で取り出す)
+        watcher = FolderWatcher(directory, self._watched_files_queue.put, recursive=True, polling=self.watch_polling)
+        try:
+            watcher.start()
+        except OSError as e:
+            self.watch_var.set(False)
+            messagebox.showerror("フォルダ監視エラー", f"フォルダを監視できません: {e}")
+            return
+        self.folder_watcher = watcher
+        self.watch_var.set(True)
+        self._watch_poll_id = self.after(WATCH_POLL_INTERVAL_MS, self._process_watched_files)
+        if not self.auto_resample_var.get():
+            self.auto_resample_var.set(True)
+            self.on_auto_resample_toggle()
+        self.status_var.set(f"フォルダを監視しています ({watcher.backend}): {watcher.root}")
+
+    def _stop_folder_watch(self):
+        """フォルダの監視を止めます (監視していない場合は何もしません)。
+
+        監視スレッドはGUIスレッドを待たないため、終了を待ってもGUIスレッドが止まったままになることはありません。
+        """
+        if self._watch_poll_id is not None:
+            self.after_cancel(self._watch_poll_id)
+            self._watch_poll_id = None
+        if self.folder_watcher is not None:
+            self.folder_watcher.stop()
+            self.folder_watcher = None
+        while True: # 止めた監視で見つかった、まだ取り込んでいないファイルは捨てる
+            try:
+                self._watched_files_queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _process_watched_files(self):
+        """監視フォルダで見つかったファイルを取り込みます (監視中は `WATCH_POLL_INTERVAL_MS` ごとに呼び出されます)。
+
+        新しいファイルはドラッグ＆ドロップと同じくメタデータを取得してリストに追加し、
+        自動変換モードなら変換キューに投入します。リストにあるファイルが上書きされた場合は、
+        自動変換モードなら変換し直します (メタデータはワーカーが読み直します)。
+        """
+        paths_to_probe = []
+        while True:
+            try:
+                paths = self._watched_files_queue.get_nowait()
+            except queue.Empty:
+                break
+            for filepath_abs in paths:
+                if filepath_abs in self._ingest_pending_paths:
+                    continue
+                item_id = self.file_store.find(filepath_abs)
+                if item_id is None:
+                    self._ingest_pending_paths.add(filepath_abs)
+                    paths_to_probe.append(filepath_abs)
+                elif self.auto_resample_var.get():
+                    self._queue_auto_resample(item_id, filepath_abs, os.path.basename(filepath_abs), None)
+        if paths_to_probe:
+            self._start_ingest(paths_to_probe)
+        if self.folder_watcher is not None and not self.is_shutting_down:
+            self._watch_poll_id = self.after(WATCH_POLL_INTERVAL_MS, self._process_watched_files)
+        else:
+            self._watch_poll_id = None
+
     # 「ソース元に保存」チェックボックスの状態が変更されたときの処理
     def on_save_to_source_toggle(self):
         """「ソース元に保存」チェックボックスの状態変更を処理します。
@@ -834,58 +1630,135 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
                 else: 
                     self.status_var.set("手動変換 (指定フォルダへ保存)。「一括変換実行」ボタンで処理。")
 
-    # 自動変換用のワーカースレッドを起動・確認する
+    # 「並列数」スピンボックスが変更されたときの処理
+    def on_max_workers_change(self):
+        """並列数の変更をハンドルします。
+
+        新しいワーカー数は、実行中のジョブがなくなった時点で
+        ワーカープールを作り直すことで反映されます。
+        """
+        self.max_workers = self.max_workers_var.get()
+        self.status_var.set(f"並列数を {self.max_workers} に設定しました。")
+
+    # 変換用のワーカースレッドを起動・確認する
     def _ensure_worker_thread_running(self):
-        """自動変換用のワーカースレッドが実行中でなければ起動します。
+        """変換ジョブのディスパッチスレッドが実行中でなければ起動します。
 
         スレッドが未作成か、すでに終了している場合に新しいスレッドを
-        作成して開始します。これにより、自動変換タスクを非同期で
-        処理できるようになります。
+        作成して開始します。実際の変換はディスパッチスレッドが
+        ワーカープロセスのプールに投入して並列に処理します。
         """
         if self.worker_thread is None or not self.worker_thread.is_alive():
             self.worker_thread = threading.Thread(target=self._worker_resample_files, daemon=True)
             self.worker_thread.start()
             print("ワーカースレッドを開始しました。")
 
+    def _get_engine(self):
+        """変換エンジンを返します。並列数が変更されていれば、アイドル時に作り直します。
+
+        ディスパッチスレッドとウォームアップ用スレッドから呼び出されます。
+
+        Returns:
+            ResampleEngine: 変換ジョブを実行するエンジン。
+        """
+        with self._engine_lock:
+            max_workers = self.max_workers
+            if self.engine is not None and self.engine.max_workers != max_workers and self.engine.in_flight == 0:
+                self.engine.shutdown(wait=False)
+                self.engine = None
+            if self.engine is None:
+                self.engine = ResampleEngine(max_workers=max_workers, instrument=self.job_stats is not None,
+                                             profile=self.job_stats is not None and self.job_stats.profile_slowest > 0)
+                print(f"変換エンジンを開始しました。(ワーカー数: {max_workers})")
+            return self.engine
+
     # ワーカースレッドで実行されるファイル変換処理のメインループ
     def _worker_resample_files(self):
-        """ワーカースレッドのメインループです。
-
-        タスクキューを監視し、追加された変換タスクを一つずつ取り出して
-        `_perform_single_resample_logic` メソッドで処理します。
-        処理結果は結果キューに格納され、メインスレッド（GUI）に通知されます。
+        """ディスパッチスレッドのメインループです。
+
+        タスクキューに追加された変換タスクをメモリ予算のスケジューラーに移し、
+        予算と空きワーカーに収まるものから順に、ワーカープロセスのプールに投入します。
+        大きなファイルが予算の空きを待つ間も、小さなファイルは先に投入されます
+        (`wavresamples.scheduler` を参照)。投入後は次に投入する見込みのファイルを先読みし、
+        ワーカーの計算とストレージの読み込みを重ねます (`wavresamples.pipeline` を参照)。スケジューラーへの追加で元ファイルのヘッダーを
+        読むことがあるため、GUIスレッドではなくこのスレッドで行います。
+        処理結果はエンジンのコールバックから結果キューに格納され、
+        メインスレッド（GUI）に通知されます。
         このループはアプリケーション終了フラグが立つまで継続します。
         """
         print("ワーカースレッド実行中...")
         while not self.is_shutting_down:
-            item_id = None 
-            try:
-                # タスクキューからアイテムを取得 (item_id, filepath, target_sr, target_channels, output_dir, filename, original_sr, original_channels)
-                item_id, filepath, target_sr, target_channels, target_subtype, output_dir, filename, original_sr, original_channels, original_subtype = self.resample_task_queue.get(timeout=1)
-                
-                # GUIに「処理中」であることを通知
-                self.resample_results_queue.put((item_id, "処理中...", None)) 
-
-                result_status, message = self._perform_single_resample_logic(filepath, original_sr, original_channels, original_subtype, target_sr, target_channels, target_subtype, output_dir, filename)
-                # 処理結果を結果キューに入れる
-                self.resample_results_queue.put((item_id, result_status, message))
+            # タスクキューのアイテム (item_id, job, batch_id, journal_id) をスケジューラーに移す
+            # スケジューラーが空の間はタスクキューで待つ
+            block = not len(self.scheduler)
+            while True:
+                try:
+                    item_id, job, batch_id, journal_id = self.resample_task_queue.get(block=block, timeout=1 if block else None)
+                except queue.Empty:
+                    break
+                block = False
+                self.scheduler.put(job, (item_id, batch_id, journal_id))
                 self.resample_task_queue.task_done()
-            except queue.Empty:
-                continue 
+            if not len(self.scheduler):
+                continue
+
+            # 並列数の変更をスケジューラーにも反映する
+            self.scheduler.set_max_running(self.max_workers)
+            entry = self.scheduler.get(timeout=0.2)
+            if entry is None:
+                continue
+            item_id, batch_id, journal_id = entry.context
+
+            try:
+                def _on_start(item_id=item_id, batch_id=batch_id, journal_id=journal_id):
+                    self._journal_call("started", journal_id)
+                    # GUIに「処理中」であることを通知
+                    self._post_resample_result((item_id, "処理中...", None, batch_id, None))
+
+                def _on_done(result_status, message, stats=None, item_id=item_id, batch_id=batch_id, journal_id=journal_id,
+                             entry=entry):
+                    self.scheduler.release(entry)
+                    self._journal_call("finished", journal_id, result_status, message)
+                    # 処理結果 (計測が有効な場合は計測結果も) を結果キューに入れる
+                    self._post_resample_result((item_id, result_status, message, batch_id, stats))
+
+                # 空きワーカーができるまで待つ（終了処理が始まったら投入を諦める）
+                engine = self._get_engine()
+                while not engine.submit(entry.job, _on_done, on_start=_on_start, timeout=0.5):
+                    if self.is_shutting_down:
+                        break
+                # ワーカーが計算している間に、次に投入するファイルをストレージから読み込んでおく
+                self._prefetcher.prefetch(job.filepath for job in self.scheduler.peek(self.max_workers))
             except Exception as e:
                 print(f"ワーカースレッドで予期せぬエラー: {e}")
-                if item_id: 
-                   self.resample_results_queue.put((item_id, "エラー", str(e)))
+                self.scheduler.release(entry)
+                self._journal_call("finished", journal_id, "エラー", str(e))
+                self._post_resample_result((item_id, "エラー", str(e), batch_id, None))
         print("ワーカースレッドを終了します。")
 
+    def _journal_call(self, method, journal_id, *args):
+        """ジャーナルに記録します。ジャーナルがない場合や記録に失敗した場合も変換は続行します。
+
+        ワーカープールの管理スレッドからも呼び出されます。
+
+        Args:
+            method (str): `JobJournal` のメソッド名 ("started" / "finished")。
+            journal_id (int | None): ジャーナル上のジョブID。
+            *args: メソッドに渡す追加の引数。
+        """
+        if self.journal is None or journal_id is None:
+            return
+        try:
+            getattr(self.journal, method)(journal_id, *args)
+        except (OSError, ValueError) as e: # ValueError: 終了処理で閉じた後の書き込み
+            print(f"ジャーナルへの記録に失敗しました: {e}")
+
     # 実際のファイル変換ロジック
     def _perform_single_resample_logic(self, filepath, original_sr, original_channels, original_subtype, target_sr, target_channels, target_subtype, output_dir, filename):
         """単一ファイルのサンプリング周波数・チャンネル変換・ビット深度固定のロジックを実行します。
 
-        librosaを使用してオーディオファイルを読み込み、リサンプリングと
-        チャンネル変換を行い、soundfileを使用して指定されたビット深度（16bit）で
-        新しいファイルとして書き出します。
-        変換が不要な場合はスキップします。
+        実体は `wavresamples.core.perform_single_resample` です。
+        ワーカープロセスからも同じロジックが実行されます。
 
         Args:
             filepath (str): 処理対象のファイルパス。
@@ -901,87 +1774,85 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         Returns:
             tuple[str, str]: (処理結果のステータス文字列, 詳細メッセージ)
         """
-        try:
-            # 1. スキップ判定: 全てのパラメータが目標と一致する場合、ファイル操作を行わずに処理を終了
-            if original_sr == target_sr and original_channels == target_channels and original_subtype == target_subtype:
-                msg = f"スキップ: {filename} (既に目標設定と同一です)"
-                return "処理済", msg
-
-            # 2. 変換処理: スキップされなかった場合は、何らかの変換が必要
-            # librosa.loadでステレオを保持するためにはmono=Falseを明示的に指定
-            # yは(channels, samples)または(samples,)のndarrayになる
-            y, sr_librosa_original = librosa.load(filepath, sr=None, mono=False)
-
-            y_processed = y
-            # サンプリング周波数変換
-            if sr_librosa_original != target_sr:
-                y_processed = librosa.resample(y=y_processed, orig_sr=sr_librosa_original, target_sr=target_sr)
-
-            # チャンネル数変換
-            # y_processedの次元数をチェック (モノラルの場合は1次元、ステレオの場合は2次元)
-            # librosa.load(mono=False) はステレオの場合 (2, samples) の形状になる
-            # soundfile.write は (samples, channels) の形状を期待するため、転置が必要
-            if y_processed.ndim == 1 and target_channels == 2: # モノラルからステレオへ（複製）
-                y_processed = np.vstack([y_processed, y_processed]) # モノラルを複製してステレオにする
-            elif y_processed.ndim == 2 and target_channels == 1: # ステレオからモノラルへ（今回は発生しないはずだが念のため）
-                # ステレオからモノラルへのダウンミックスは librosa に任せるか、平均を取るなど
-                # 今回はターゲットがステレオ固定なので、このパスは基本的には通らない
-                # もし将来的にモノラル変換が必要になった場合のプレースホルダー
-                pass
-            # チャンネル数が既にtarget_channelsと一致している場合は何もしない
-
-            # soundfile.writeは(frames, channels)形式を期待するため、librosaが返す(channels, frames)を転置
-            if y_processed.ndim == 2: # ステレオの場合
-                y_processed = y_processed.T # 転置して(samples, channels)にする
-
-            # 3. ファイル書き出し
-            base, ext = os.path.splitext(filename)
-            bit_depth_str = "16bit" if target_subtype == "PCM_16" else "8bit"
-            output_filename = f"{base}_resampled_{target_sr}Hz_{target_channels}ch_{bit_depth_str}{ext}" # ファイル名にビット深度も追加
-            output_path = os.path.join(output_dir, output_filename)
-
-            # 出力先ディレクトリが存在しない場合は作成
-            if not os.path.exists(output_dir):
-                try:
-                    os.makedirs(output_dir)
-                    print(f"作成された出力ディレクトリ: {output_dir}")
-                except OSError as ose:
-                    error_msg = f"エラー: 出力ディレクトリの作成に失敗しました ({output_dir}) - {ose}"
-                    print(error_msg)
-                    return "エラー", error_msg
-
-            sf.write(output_path, y_processed, target_sr, subtype=target_subtype)
-            success_msg = f"変換成功: {output_filename}"
-            return "処理済", success_msg
-        except Exception as e:
-            error_msg = f"エラー: {filename} の変換に失敗 - {e}"
-            print(error_msg)
-            return "エラー", str(e)
+        return perform_single_resample(filepath, original_sr, original_channels, original_subtype,
+                                       target_sr, target_channels, target_subtype, output_dir, filename)
 
     # ワーカースレッドからの結果をGUIに反映させるためのポーリング処理
+    def _post_resample_result(self, result):
+        """変換結果を結果キューに入れ、GUIスレッドに通知します。
+
+        ワーカープールの管理スレッドやディスパッチスレッドから呼び出されます。
+        GUIスレッドがまだ反映していない通知がある間は、イベントを重ねて送信しません。
+
+        Args:
+            result (tuple): (item_id, status, message, batch_id, stats)
+        """
+        self.resample_results_queue.put(result)
+        with self._results_wakeup_lock:
+            if self._results_wakeup_pending or self.is_shutting_down:
+                return
+            self._results_wakeup_pending = True
+        try:
+            self.event_generate(RESULTS_READY_EVENT, when="tail")
+        except (tk.TclError, RuntimeError) as e: # ウィンドウの破棄後など
+            print(f"変換結果の通知に失敗しました: {e}")
+
+    def _on_resample_results_ready(self, event=None):
+        """変換結果の通知を受け取り、1フレーム分待ってからまとめて反映するように予約します。"""
+        if self._process_timer_id is None and not self.is_shutting_down:
+            self._process_timer_id = self.after(RESULTS_FRAME_INTERVAL_MS, self.process_resample_results)
+
     def process_resample_results(self):
         """ワーカースレッドからの処理結果をGUIに反映させます。
 
-        結果キューを定期的にポーリングし、キューに結果があれば取り出して
-        ファイルリストの「状態」列とステータスバーを更新します。
-        このメソッドは `after` メソッドによって定期的に呼び出されます。
+        結果が届いたときに `_on_resample_results_ready` から予約され、
+        その時点で結果キューにあるすべての結果をまとめて取り出します。
+        同じファイルの結果は最新のものだけをファイルリストの「状態」列に反映し、
+        ステータスバーは最後の結果で1回だけ更新するため、
+        大量のファイルが短時間に完了しても再描画は数回で済みます。
         """
-        try:
-            while not self.resample_results_queue.empty():
-                item_id, status, message = self.resample_results_queue.get_nowait()
-                # Treeviewからアイテムが削除されている可能性を考慮
-                if self.tree.exists(item_id):
-                    self.tree.set(item_id, column="status", value=status)
-                    filename_in_tree = self.tree.item(item_id, "values")[0]
-                    if status == "処理中...":
-                        self.status_var.set(f"{filename_in_tree}: 処理中...")
-                    else:
-                        self.status_var.set(f"{filename_in_tree}: {status} {(' - ' + message) if message else ''}")
-                self.resample_results_queue.task_done()
-        finally:
-            if not self.is_shutting_down:
-                # 100ms後に再度このメソッドを呼び出す
-                self._process_timer_id = self.after(100, self.process_resample_results)
+        self._process_timer_id = None
+        # 取り出しを始める前に通知済みフラグを下ろし、以降に届いた結果で再び通知されるようにする
+        with self._results_wakeup_lock:
+            self._results_wakeup_pending = False
+
+        latest_status = {} # item_id -> 最新の状態 (挿入順 = 到着順)
+        last_result = None
+        finished_any = False
+        while True:
+            try:
+                item_id, status, message, batch_id, stats = self.resample_results_queue.get_nowait()
+            except queue.Empty:
+                break
+            if stats is not None:
+                self.job_stats.record(stats)
+            latest_status.pop(item_id, None)
+            latest_status[item_id] = status
+            last_result = (item_id, status, message)
+            if status != "処理中...":
+                finished_any = True
+                # 手動変換バッチの結果であれば集計する
+                if batch_id is not None:
+                    self._record_batch_result(batch_id, status, message)
+            self.resample_results_queue.task_done()
+
+        for item_id, status in latest_status.items():
+            # リストからアイテムが削除されていれば何もしない
+            self._set_item_status(item_id, status)
+
+        if last_result is not None:
+            item_id, status, message = last_result
+            entry = self.file_store.get(item_id)
+            if entry is not None:
+                filename_in_tree = entry.filename
+                if status == "処理中...":
+                    self.status_var.set(f"{filename_in_tree}: 処理中...")
+                else:
+                    self.status_var.set(f"{filename_in_tree}: {status} {(' - ' + message) if message else ''}")
+
+        # すべてのジョブが完了したら、ジャーナルを空にして肥大化を防ぐ
+        if finished_any and self.journal is not None and self.journal.pending_count == 0:
+            self.journal.reset()
 
     # ウィンドウが閉じられるときの処理
     def on_closing(self):
@@ -993,7 +1864,7 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
         if messagebox.askokcancel("終了確認", "アプリケーションを終了しますか？"):
             self.is_shutting_down = True
 
-            # afterループを止める
+            # 予約済みの結果反映を取り消す
             if self._process_timer_id:
                 self.after_cancel(self._process_timer_id)
 
@@ -1006,9 +1877,50 @@ class AudioResamplerApp(TkinterDnD.Tk): # ドラッグ＆ドロップ機能の
                     print("ワーカースレッドがタイムアウト後も実行中です。")
                 else:
                     print("ワーカースレッドは正常に終了しました。")
+            self._stop_folder_watch()
+            self._probe_executor.shutdown(wait=False)
+            self._prefetcher.shutdown()
+            # ワーカープロセスを停止（実行中の変換の完了は待たない）
+            if self.engine is not None:
+                self.engine.shutdown(wait=False)
+            # 未完了のジョブはジャーナルに残り、次回の起動時に再開できる
+            if self.journal is not None:
+                self.journal.close()
+            self._export_job_stats()
             self.destroy()
 
+    def _export_job_stats(self):
+        """計測が有効な場合、計測結果とプロファイルを書き出します。"""
+        if self.job_stats is None or not len(self.job_stats):
+            return
+        try:
+            if self.stats_path:
+                self.job_stats.export(self.stats_path)
+                print(f"計測結果を書き出しました: {self.stats_path}")
+            for path in self.job_stats.dump_profiles(self.profile_dir):
+                print(f"プロファイルを書き出しました: {path}")
+        except OSError as e:
+            print(f"計測結果を書き出せませんでした: {e}")
+
 if __name__ == "__main__":
     # アプリケーションのエントリーポイント
-    app = AudioResamplerApp()
+    multiprocessing.freeze_support() # PyInstallerでexe化した場合にワーカープロセスを正しく起動するため
+    parser = argparse.ArgumentParser(description="WAVサンプリング周波数・ステレオ・ビット深度変換ツール")
+    parser.add_argument("--stats", default=None, metavar="PATH",
+                        help="ファイルごとの段階別の所要時間を計測し、終了時に書き出す (拡張子 .csv ならCSV、それ以外はJSON)")
+    parser.add_argument("--profile-slowest", type=int, default=0, metavar="N",
+                        help="cProfile で計測し、所要時間の長い上位N件のプロファイルを終了時に書き出す")
+    parser.add_argument("--profile-dir", default="wavresamples-profiles",
+                        help="プロファイル (.prof) の保存先フォルダ [既定: wavresamples-profiles]")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="MB",
+                        help="同時に変換するファイルのメモリ使用量の上限 (MB) [既定: 物理メモリの半分]")
+    parser.add_argument("--watch", default=None, metavar="DIR",
+                        help="起動後にこのフォルダの監視を開始し、置かれたWAVファイルを自動で変換する")
+    parser.add_argument("--watch-poll", action="store_true",
+                        help="inotify を使わずにポーリングでフォルダを監視する (ネットワーク上のフォルダなど)")
+    args = parser.parse_args()
+    memory_budget = args.memory_budget * 1024 ** 2 if args.memory_budget and args.memory_budget > 0 else None
+    app = AudioResamplerApp(stats_path=args.stats, profile_slowest=max(0, args.profile_slowest),
+                            profile_dir=args.profile_dir, memory_budget=memory_budget,
+                            watch_dir=args.watch, watch_polling=args.watch_poll)
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,411 @@
+"""メモリマップでの読み込み (`wavresamples.pcmwav`) と整数のままの量子化 (`wavresamples.quantize`) が、
+soundfile (libsndfile) と完全に一致することを確認するスクリプトです。
+
+使用例:
+    python benchmarks/bit_exactness.py
+    python benchmarks/bit_exactness.py --frames 200001 --json exactness.json
+
+RIFF ヘッダーを直接組み立てたWAVファイルと soundfile で書き出したWAVファイルを一時フォルダに作り、
+`open_pcm_wav` で読み込んだ値を `soundfile.read` の値と比較します。次の形式を含みます。
+
+* PCM_16 / PCM_24 (モノラル・ステレオ・5.1ch)
+* WAVE_FORMAT_EXTENSIBLE のヘッダー (手で組み立てたものと、soundfile の WAVEX の両方)
+* 奇数の大きさのチャンク (パディングのバイトを含む) と、18バイトの `fmt ` チャンク
+* `data` チャンクの大きさがファイルの実際の大きさを超えるファイル (書き込み途中で止まったもの)
+
+メモリマップで読み込めない形式 (PCM_U8 / PCM_32 / FLOAT) は、`open_pcm_wav` がNoneを返す
+(soundfile での読み込みに切り替わる) ことを確認します。
+
+量子化は、16bit / 24bit から 8bit / 16bit / 24bit へのすべての組み合わせと、チャンネルの対応
+(そのまま・モノラルの複製・ステレオと 5.1ch からモノラルへの平均) について、`requantize` の結果を
+次の2つと比較します。
+
+* 整数の演算だけで計算した正確な値 (libsndfile と同じく、目標のビット深度での切り捨てと飽和)
+* float32 の経路 (`convert_channels` の後に libsndfile で書き出した値)。float32 のチャンネル変換で
+  誤差が出る値 (5.1ch の平均など) は比較から除き、その値の差が 1LSB 以内であることを確認します。
+
+ディザ (`requantize` と `quantize_float`) は、同じ種から同じ結果になること、ノイズを加えた値を
+libsndfile で書き出した場合と一致すること、誤差 (LSB) の平均が -0.5 (切り捨ての分)・標準偏差が 0.5
+(TPDF と丸めの和) であることを確認します。
+サンプルは乱数の種を固定して生成し、最大値・最小値を必ず含めます。
+1件でも一致しない場合は終了コード `1` を返します。
+"""
+import argparse
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# サンプル生成の乱数の種
+SAMPLES_SEED = 20240701
+# ブロック単位の読み込みを確認するときのブロックの大きさ (フレーム数)。ブロックの境界がずれるよう奇数にする
+CHECK_BLOCKSIZE = 4097
+
+# 整数のままの変換を確認する (元のビット深度, 元のチャンネル数, 目標のビット深度, 目標のチャンネル数) の組み合わせ
+REQUANTIZE_CASES = tuple((source_bits, source_channels, target_bits, target_channels)
+                         for source_bits in (16, 24) for target_bits in (8, 16, 24)
+                         for source_channels, target_channels in ((1, 1), (2, 2), (1, 2), (2, 1), (6, 1)))
+# ディザの誤差 (LSB) の平均の期待値 (libsndfile と同じ切り捨てのため -0.5)
+DITHER_ERROR_MEAN = -0.5
+# ディザの誤差 (LSB) の標準偏差の期待値 (±1LSB の TPDF の分散 1/6 と、丸めの分散 1/12 の和の平方根)
+DITHER_ERROR_STD = 0.5
+# ディザの誤差の平均・標準偏差の許容差 (LSB)
+DITHER_TOLERANCE = 0.02
+# ビット深度 -> soundfile のサブタイプ名
+_SUBTYPES = {8: "PCM_U8", 16: "PCM_16", 24: "PCM_24"}
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# KSDATAFORMAT_SUBTYPE_PCM の GUID (先頭2バイトが形式の番号)
+_KSDATAFORMAT_SUBTYPE_PCM = bytes.fromhex("0100000000001000800000aa00389b71")
+
+
+def random_samples(frames, channels, bits, rng):
+    """最大値・最小値を含む、(frames, channels) 形式の整数のサンプルを生成します。"""
+    limit = 1 << (bits - 1)
+    samples = rng.integers(-limit, limit, size=(frames, channels), dtype=np.int64)
+    samples[0] = limit - 1
+    samples[1] = -limit
+    return samples
+
+
+def _chunk(chunk_id, body):
+    """RIFF のチャンクを組み立てます (奇数の大きさのチャンクにはパディングの1バイトを加えます)。"""
+    return struct.pack("<4sI", chunk_id, len(body)) + body + (b"\0" if len(body) & 1 else b"")
+
+
+def build_wav(samples, bits, samplerate, extensible=False, fmt_extra=b"", chunks_before=(), chunks_after=(),
+              data_size=None):
+    """整数のサンプルから、PCM形式のWAVファイルの中身を組み立てます。
+
+    Args:
+        samples (np.ndarray): (frames, channels) 形式の整数の配列。
+        bits (int): ビット深度 (16 / 24)。
+        samplerate (int): サンプリング周波数。
+        extensible (bool): WAVE_FORMAT_EXTENSIBLE のヘッダーにするか。
+        fmt_extra (bytes): WAVE_FORMAT_PCM の `fmt ` チャンクの末尾に加えるバイト列 (cbSize など)。
+        chunks_before (Iterable[tuple[bytes, bytes]]): `fmt ` と `data` の間に置く (ID, 中身) のチャンク。
+        chunks_after (Iterable[tuple[bytes, bytes]]): `data` の後に置くチャンク。
+        data_size (int | None): `data` チャンクのヘッダーに書く大きさ。Noneの場合は実際の大きさ。
+
+    Returns:
+        bytes: WAVファイルの中身。
+    """
+    frames, channels = samples.shape
+    width = bits // 8
+    block_align = channels * width
+    if bits == 16:
+        data = samples.astype("<i2").tobytes()
+    else:
+        data = samples.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    fmt = struct.pack("<HHIIHH", _WAVE_FORMAT_EXTENSIBLE if extensible else _WAVE_FORMAT_PCM, channels, samplerate,
+                      samplerate * block_align, block_align, bits)
+    if extensible:
+        channel_mask = (1 << channels) - 1
+        fmt += struct.pack("<HHI", 22, bits, channel_mask) + _KSDATAFORMAT_SUBTYPE_PCM
+    else:
+        fmt += fmt_extra
+    body = b"WAVE" + b"".join(_chunk(chunk_id, chunk) for chunk_id, chunk in ((b"fmt ", fmt), *chunks_before))
+    data_chunk = _chunk(b"data", data)
+    if data_size is not None:
+        data_chunk = struct.pack("<4sI", b"data", data_size) + data
+    body += data_chunk + b"".join(_chunk(chunk_id, chunk) for chunk_id, chunk in chunks_after)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def write_reader_cases(directory, frames, rng):
+    """読み込みを確認するWAVファイルを書き出します。
+
+    Returns:
+        dict[str, str]: ケース名 -> ファイルパス。
+    """
+    cases = {}
+
+    def _write_bytes(name, content):
+        path = os.path.join(directory, f"{name}.wav")
+        with open(path, "wb") as f:
+            f.write(content)
+        cases[name] = path
+
+    def _write_soundfile(name, channels, bits, subtype, file_format="WAV"):
+        path = os.path.join(directory, f"{name}.wav")
+        samples = random_samples(frames, channels, bits, rng)
+        sf.write(path, (samples << (32 - bits)).astype(np.int32), 48000, subtype=subtype, format=file_format)
+        cases[name] = path
+
+    _write_soundfile("sf_pcm16_stereo", 2, 16, "PCM_16")
+    _write_soundfile("sf_pcm24_stereo", 2, 24, "PCM_24")
+    _write_soundfile("sf_pcm24_wavex_6ch", 6, 24, "PCM_24", file_format="WAVEX")
+    odd_frames = frames | 1 # モノラルの PCM_24 で data チャンクの大きさを奇数にする
+    _write_bytes("pcm24_mono_odd_data", build_wav(
+        random_samples(odd_frames, 1, 24, rng), 24, 44100,
+        chunks_after=((b"LIST", b"INFOISFT\x05\0\0\0test\0"),)))
+    _write_bytes("pcm16_odd_chunks", build_wav(
+        random_samples(frames, 2, 16, rng), 16, 44100, fmt_extra=b"\0\0",
+        chunks_before=((b"junk", b"abc"), (b"bext", bytes(range(251))))))
+    _write_bytes("pcm24_extensible_6ch", build_wav(
+        random_samples(frames, 6, 24, rng), 24, 48000, extensible=True, chunks_before=((b"odd ", b"x"),)))
+    _write_bytes("pcm16_extensible_mono", build_wav(random_samples(odd_frames, 1, 16, rng), 16, 22050, extensible=True))
+    # data チャンクの大きさより短く、最後のフレームの途中で止まったファイル
+    _write_bytes("pcm24_truncated", build_wav(
+        random_samples(frames, 2, 24, rng), 24, 96000, data_size=(frames + 1000) * 6)[:-4])
+    return cases
+
+
+def write_fallback_cases(directory, frames, rng):
+    """メモリマップで読み込めない (soundfile で読み込む) 形式のWAVファイルを書き出します。
+
+    Returns:
+        dict[str, str]: ケース名 -> ファイルパス。
+    """
+    cases = {}
+    signal = (rng.random((frames, 2)) - 0.5).astype(np.float32)
+    for subtype in ("PCM_U8", "PCM_32", "FLOAT"):
+        path = os.path.join(directory, f"fallback_{subtype.lower()}.wav")
+        sf.write(path, signal, 48000, subtype=subtype)
+        cases[f"fallback_{subtype.lower()}"] = path
+    return cases
+
+
+def check_reader(path):
+    """`open_pcm_wav` で読み込んだ値を soundfile と比較します。
+
+    Returns:
+        dict: 比較結果 (一致しない値の数など)。ok がFalseの場合は一致しません。
+    """
+    from wavresamples.pcmwav import open_pcm_wav
+
+    info = sf.info(path)
+    expected_float = sf.read(path, dtype="float32", always_2d=True)[0]
+    expected_int = sf.read(path, dtype="int32", always_2d=True)[0]
+    reader = open_pcm_wav(path)
+    if reader is None:
+        return {"ok": False, "error": "open_pcm_wav がNoneを返しました"}
+    with reader:
+        bits = 16 if reader.subtype == "PCM_16" else 24
+        header = (reader.samplerate, reader.channels, reader.frames)
+        result = {
+            "subtype": reader.subtype,
+            "header": list(header),
+            "header_ok": header == (info.samplerate, info.channels, info.frames) and reader.subtype == info.subtype,
+            "float_mismatches": _mismatches(reader.read(), expected_float),
+            "block_mismatches": _mismatches(_concat(reader.blocks(CHECK_BLOCKSIZE)), expected_float),
+            "int_mismatches": _mismatches(_concat(reader.int_blocks(CHECK_BLOCKSIZE)), expected_int >> (32 - bits)),
+        }
+    result["ok"] = result["header_ok"] and not any(result[key] for key in
+                                                   ("float_mismatches", "block_mismatches", "int_mismatches"))
+    return result
+
+
+def _concat(blocks):
+    blocks = list(blocks)
+    return np.concatenate(blocks) if blocks else np.empty((0, 0))
+
+
+def _mismatches(actual, expected):
+    """一致しない値の数を返します (形が違う場合は全要素を数えます)。"""
+    if actual.shape != expected.shape:
+        return int(max(actual.size, expected.size))
+    return int(np.count_nonzero(actual != expected))
+
+
+def floor_quantize(numerator, divisor, bits):
+    """`numerator / divisor` を切り捨て、`bits` の範囲に飽和させます。
+
+    libsndfile は float の値を 2^31 倍して32bitの整数に丸めてから下位のビットを切り捨てるため、
+    元の値が整数の比の場合は、目標のビット深度での切り捨てと同じ結果になります。
+    """
+    limit = 1 << (bits - 1)
+    return np.clip(numerator // divisor, -limit, limit - 1)
+
+
+def _requantize_terms(samples, source_bits, target_bits, target_channels):
+    """`requantize` と同じ (合計, 除数) を、丸めずに整数で返します。"""
+    channels = samples.shape[1]
+    if channels == target_channels or channels == 1:
+        total, count = samples, 1
+    else:
+        total, count = samples.sum(axis=1, keepdims=True), channels
+    return total << max(target_bits - source_bits, 0), count << max(source_bits - target_bits, 0)
+
+
+def _tpdf_noise(rng, divisor, shape):
+    """`requantize` と同じ順序で乱数を引いた、±1LSB (`divisor` 単位) の三角分布のノイズを返します。"""
+    noise = rng.integers(0, divisor, size=shape, dtype=np.int32)
+    noise -= rng.integers(0, divisor, size=shape, dtype=np.int32)
+    return noise.astype(np.int64)
+
+
+def _container_values(block, bits):
+    """`requantize` / `quantize_float` の出力 (上位に詰めた整数) を、目標のビット深度の値に戻します。"""
+    return block.astype(np.int64) >> (8 if bits == 24 else 16 - bits)
+
+
+def libsndfile_quantize(values, bits):
+    """float の値を libsndfile で目標のビット深度のWAVに書き出し、書き込まれた整数を読み返します。"""
+    buffer = io.BytesIO()
+    sf.write(buffer, values, 48000, subtype=_SUBTYPES[bits], format="WAV")
+    buffer.seek(0)
+    return sf.read(buffer, dtype="int32", always_2d=True)[0].astype(np.int64) >> (32 - bits)
+
+
+def check_requantize(samples, source_bits, target_bits, target_channels):
+    """`requantize` の結果を、正確な値と float32 の経路 (libsndfile) の値と比較します。
+
+    Returns:
+        dict: 比較結果。ok がFalseの場合は一致しません。
+    """
+    from wavresamples.channels import convert_channels
+    from wavresamples.quantize import requantize
+
+    actual = _container_values(requantize(samples.astype(np.int32), source_bits, target_bits, target_channels),
+                               target_bits)
+    total, divisor = _requantize_terms(samples, source_bits, target_bits, target_channels)
+    exact = np.broadcast_to(floor_quantize(total, divisor, target_bits), actual.shape)
+
+    # 実際の変換と同じく float32 に正規化してチャンネルを変換し、libsndfile で量子化する
+    converted = convert_channels((samples / (1 << (source_bits - 1))).astype(np.float32), target_channels)
+    through_float = libsndfile_quantize(converted, target_bits)
+    # float32 のチャンネル変換の結果が正確な値 (合計 / 除数) と等しい値だけを比較する
+    exact_float = converted.astype(np.float64) * (1 << (target_bits - 1)) * divisor == total
+    differences = np.abs(through_float - actual)[~exact_float]
+    result = {
+        "exact_mismatches": _mismatches(actual, exact),
+        "libsndfile_mismatches": int(np.count_nonzero((through_float != actual) & exact_float)),
+        "inexact_float_values": int(differences.size),
+        "inexact_float_max_difference": int(differences.max()) if differences.size else 0,
+    }
+    result["ok"] = (not result["exact_mismatches"] and not result["libsndfile_mismatches"]
+                    and result["inexact_float_max_difference"] <= 1)
+    return result
+
+
+def check_dither(samples, source_bits, target_bits, target_channels):
+    """ディザ (`requantize` と `quantize_float`) の再現性・丸め・誤差の統計を確認します。
+
+    Returns:
+        dict: 確認結果。ok がFalseの場合は問題があります。
+    """
+    from wavresamples.channels import convert_channels
+    from wavresamples.quantize import dither_rng, quantize_float, requantize
+
+    key = ("bit_exactness", source_bits, samples.shape[1], target_bits, target_channels)
+    block = samples.astype(np.int32)
+    first = requantize(block, source_bits, target_bits, target_channels, rng=dither_rng(*key))
+    second = requantize(block, source_bits, target_bits, target_channels, rng=dither_rng(*key))
+    actual = _container_values(first, target_bits)
+    total, divisor = _requantize_terms(samples, source_bits, target_bits, target_channels)
+    noise = _tpdf_noise(dither_rng(*key), divisor, total.shape)
+    expected = np.broadcast_to(floor_quantize(total + noise, divisor, target_bits), actual.shape)
+    # ノイズを加えた値を libsndfile で量子化した場合と比べる (float64 で正確に表せる値のみ)
+    dithered = (total + noise) / (divisor << (target_bits - 1))
+    representable = dithered * (divisor << (target_bits - 1)) == total + noise
+    through_libsndfile = libsndfile_quantize(np.broadcast_to(dithered, actual.shape), target_bits)
+    integer_errors = (actual - np.broadcast_to(total / divisor, actual.shape)).ravel()
+
+    # リサンプリングする変換と同じ float32 の信号に、quantize_float でディザを加える
+    signal = convert_channels((samples / (1 << (source_bits - 1))).astype(np.float32), target_channels)
+    float_first = quantize_float(signal, _SUBTYPES[target_bits], dither_rng(*key))
+    float_second = quantize_float(signal, _SUBTYPES[target_bits], dither_rng(*key))
+    float_actual = _container_values(float_first, target_bits)
+    # quantize_float と同じ順序で乱数を引いてノイズを加えた float64 の信号を、libsndfile で量子化する
+    rng = dither_rng(*key)
+    limit = 1 << (target_bits - 1)
+    dithered_signal = signal.astype(np.float64)
+    dithered_signal += rng.random(dithered_signal.shape) / limit
+    dithered_signal -= rng.random(dithered_signal.shape) / limit
+    float_through_libsndfile = libsndfile_quantize(dithered_signal, target_bits)
+    unclipped = (float_actual > -limit) & (float_actual < limit - 1)
+    float_errors = (float_actual - signal.astype(np.float64) * limit)[unclipped]
+
+    result = {
+        "integer_reproducible": bool(np.array_equal(first, second)),
+        "integer_mismatches": _mismatches(actual, expected),
+        "integer_libsndfile_mismatches": int(np.count_nonzero((through_libsndfile != actual)
+                                                              & np.broadcast_to(representable, actual.shape))),
+        "integer_error_mean": float(integer_errors.mean()),
+        "integer_error_std": float(integer_errors.std()),
+        "integer_error_max": float(np.abs(integer_errors).max()),
+        "float_reproducible": bool(np.array_equal(float_first, float_second)),
+        "float_libsndfile_mismatches": _mismatches(float_actual, float_through_libsndfile),
+        "float_error_mean": float(float_errors.mean()),
+        "float_error_std": float(float_errors.std()),
+        "float_error_max": float(np.abs(float_errors).max()),
+    }
+    result["ok"] = (result["integer_reproducible"] and result["float_reproducible"]
+                    and not result["integer_mismatches"] and not result["integer_libsndfile_mismatches"]
+                    and not result["float_libsndfile_mismatches"]
+                    and all(abs(result[f"{path}_error_mean"] - DITHER_ERROR_MEAN) <= DITHER_TOLERANCE
+                            and abs(result[f"{path}_error_std"] - DITHER_ERROR_STD) <= DITHER_TOLERANCE
+                            and result[f"{path}_error_max"] < 2 for path in ("integer", "float")))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="PCM WAVファイルのメモリマップでの読み込みと整数のままの量子化が、soundfile と一致することを確認します。")
+    parser.add_argument("--frames", type=int, default=100000, help="各ファイルのフレーム数 [既定: 100000]")
+    parser.add_argument("--json", dest="json_path", help="確認結果をJSONで書き出すパス")
+    args = parser.parse_args(argv)
+
+    from wavresamples.pcmwav import open_pcm_wav
+
+    rng = np.random.default_rng(SAMPLES_SEED)
+    report = {"soundfile": sf.__version__, "libsndfile": sf.__libsndfile_version__, "reader": {}, "requantize": {},
+              "dither": {}}
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="wavresamples-exactness-") as directory:
+        for name, path in write_reader_cases(directory, args.frames, rng).items():
+            result = check_reader(path)
+            report["reader"][name] = result
+            if result["ok"]:
+                print(f"OK  {name}: {result['subtype']} {result['header'][1]}ch {result['header'][2]} frames")
+            else:
+                failed = True
+                print(f"NG  {name}: {json.dumps(result, ensure_ascii=False)}")
+        for name, path in write_fallback_cases(directory, args.frames, rng).items():
+            ok = open_pcm_wav(path) is None
+            report["reader"][name] = {"ok": ok}
+            if ok:
+                print(f"OK  {name}: soundfile での読み込みに切り替わります")
+            else:
+                failed = True
+                print(f"NG  {name}: メモリマップで読み込めない形式を open_pcm_wav が開きました")
+
+    for source_bits, source_channels, target_bits, target_channels in REQUANTIZE_CASES:
+        name = f"{source_bits}bit_{source_channels}ch_to_{target_bits}bit_{target_channels}ch"
+        samples = random_samples(args.frames, source_channels, source_bits, rng)
+        checks = [("requantize", check_requantize(samples, source_bits, target_bits, target_channels))]
+        if target_bits < source_bits:
+            checks.append(("dither", check_dither(samples, source_bits, target_bits, target_channels)))
+        for section, result in checks:
+            report[section][name] = result
+            if not result["ok"]:
+                failed = True
+                print(f"NG  {section} {name}: {json.dumps(result, ensure_ascii=False)}")
+            elif section == "dither":
+                print(f"OK  {section} {name}: 誤差 (LSB) の平均 {result['integer_error_mean']:+.4f} / "
+                      f"標準偏差 {result['integer_error_std']:.4f} (float32 の経路 {result['float_error_std']:.4f})")
+            else:
+                print(f"OK  {section} {name}" + (f": float32 の経路と 1LSB 違う値 {result['inexact_float_values']}個 "
+                                                 "(float32 のチャンネル変換の誤差)" if result["inexact_float_values"] else ""))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("すべて一致しました。" if not failed else "一致しない結果があります。")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
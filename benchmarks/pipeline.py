@@ -0,0 +1,268 @@
+"""変換処理全体 (読み込みから書き出しまで) の計測スクリプトです。
+
+使用例:
+    python benchmarks/pipeline.py --json pipeline.json
+    python benchmarks/pipeline.py --scale 0.1 --case short_48k_stereo_16
+
+合成信号のWAVファイル群 (コーパス) をその場で生成し、実際の変換と同じ
+`run_resample_job` で1ファイルずつ変換して、次の値を測定します。
+
+* files/s と実時間比 (変換した音声の長さ / 所要時間)
+* ピークメモリ使用量 (RSS)
+* 段階ごとの所要時間 (`wavresamples.stages.STAGES`: probe, decode, resample, channels, quantize, write)
+
+ピークメモリ使用量をケースごとに分けて測るため、各ケースは新しいプロセス (spawn) で実行します。
+RSS は `resource.getrusage` で取得するため、Windows では記録されません (null になります)。
+コーパスは乱数の種を固定して生成するため、同じ引数なら毎回同じ内容になります。
+`--work-dir` を指定すると生成したコーパスを残し、次回の実行で再利用します。
+結果はJSONで保存し、実行環境 (ライブラリのバージョン・CPU数) も一緒に記録します。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# ベンチマークの1ケース: 元ファイルの形式 (本数, 長さ[秒], 周波数, チャンネル数, サブタイプ) と出力形式
+BenchmarkCase = namedtuple(
+    "BenchmarkCase",
+    ["name", "count", "seconds", "sr", "channels", "subtype", "target_sr", "target_channels", "target_subtype"],
+)
+
+# 既定のケース: 短いファイルを大量に変換する場合と、長いファイルを少数変換する場合
+DEFAULT_CASES = (
+    BenchmarkCase("short_48k_stereo_16", 400, 1.0, 48000, 2, "PCM_16", 44100, 2, "PCM_16"),
+    BenchmarkCase("short_44k_mono_16", 400, 1.0, 44100, 1, "PCM_16", 48000, 2, "PCM_16"),
+    BenchmarkCase("short_22k_mono_8", 400, 1.0, 22050, 1, "PCM_U8", 44100, 2, "PCM_16"),
+    BenchmarkCase("short_48k_stereo_24", 200, 2.0, 48000, 2, "PCM_24", 44100, 2, "PCM_16"),
+    BenchmarkCase("long_96k_stereo_24", 2, 120.0, 96000, 2, "PCM_24", 48000, 2, "PCM_16"),
+    BenchmarkCase("long_44k_stereo_16", 2, 300.0, 44100, 2, "PCM_16", 22050, 2, "PCM_U8"),
+)
+
+# 結果のJSONの形式のバージョン
+RESULTS_VERSION = 1
+# コーパス生成の乱数の種
+CORPUS_SEED = 20240601
+
+
+def scale_case(case, scale):
+    """ケースのファイル数と長さを `scale` 倍にします (短時間で試す場合など)。
+
+    短いファイルのケースはファイル数を、長いファイルのケース (ファイル数が10未満) は長さを縮めます。
+
+    Args:
+        case (BenchmarkCase): ケース。
+        scale (float): 倍率。
+
+    Returns:
+        BenchmarkCase: 倍率を適用したケース。
+    """
+    if case.count >= 10:
+        return case._replace(count=max(1, round(case.count * scale)))
+    return case._replace(seconds=max(0.5, case.seconds * scale))
+
+
+def _corpus_dir(work_dir, case):
+    # 形式と長さが変わった場合に古いコーパスを使わないよう、ディレクトリ名に含める
+    return os.path.join(work_dir, f"{case.name}-{case.count}x{case.seconds:g}s-{case.sr}-{case.channels}ch-{case.subtype}")
+
+
+def generate_corpus(work_dir, case):
+    """ケースの元ファイルを生成します。同じ形式のコーパスが既にあれば再利用します。
+
+    信号は複数の正弦波と小さなノイズの和で、ファイルごとに周波数と位相を変えています。
+
+    Args:
+        work_dir (str): コーパスを置くディレクトリ。
+        case (BenchmarkCase): ケース。
+
+    Returns:
+        list[str]: 生成した (または再利用した) ファイルのパス。
+    """
+    import soundfile as sf
+
+    directory = _corpus_dir(work_dir, case)
+    paths = [os.path.join(directory, f"{case.name}_{i:05d}.wav") for i in range(case.count)]
+    if all(os.path.exists(path) for path in paths):
+        return paths
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(CORPUS_SEED)
+    frames = int(case.seconds * case.sr)
+    for path in paths:
+        frequencies = rng.uniform(50.0, 0.4 * case.sr, size=4)
+        phases = rng.uniform(0, 2 * np.pi, size=(4, case.channels))
+        y = np.zeros((frames, case.channels), dtype=np.float32)
+        # 長いファイルでもメモリを使いすぎないよう、1秒ずつ生成する
+        for start in range(0, frames, case.sr):
+            t = (np.arange(start, min(frames, start + case.sr)) / case.sr)[:, None]
+            block = sum(np.sin(2 * np.pi * f * t + p) for f, p in zip(frequencies, phases)) * 0.2
+            block += rng.normal(0.0, 0.01, size=block.shape)
+            y[start:start + len(block)] = block
+        sf.write(path, y, case.sr, subtype=case.subtype)
+    return paths
+
+
+def _peak_rss_bytes():
+    """このプロセスのピークRSS (バイト) を返します。取得できない環境ではNoneを返します。"""
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KiB 単位、macOS はバイト単位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_case(case, paths, output_dir, quality, streaming):
+    """1ケースを変換して測定します。ケースごとに新しいワーカープロセスで実行されます。"""
+    from wavresamples.core import job_for_file, preload_audio_libraries, run_resample_job, STATUS_ERROR
+    from wavresamples.stages import StageTimer
+
+    preload_audio_libraries()
+    baseline_rss = _peak_rss_bytes()
+    timer = StageTimer()
+    errors = 0
+    start = time.perf_counter()
+    for path in paths:
+        # メタデータを渡さず、probe (ヘッダーの読み込み) も計測に含める
+        job = job_for_file(path, case.target_sr, case.target_channels, case.target_subtype, output_dir,
+                           streaming=streaming, quality=quality)
+        status, message = run_resample_job(job, timer=timer)
+        if status == STATUS_ERROR:
+            errors += 1
+            print(f"エラー: {path} - {message}", file=sys.stderr)
+    wall = time.perf_counter() - start
+    audio_seconds = len(paths) * case.seconds
+    return {
+        "name": case.name,
+        "case": case._asdict(),
+        "files": len(paths),
+        "errors": errors,
+        "audio_seconds": audio_seconds,
+        "input_bytes": sum(os.path.getsize(path) for path in paths),
+        "wall_seconds": wall,
+        "files_per_sec": len(paths) / wall,
+        "realtime_factor": audio_seconds / wall,
+        "baseline_rss_bytes": baseline_rss,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "stages": dict(timer.times),
+    }
+
+
+def _environment():
+    import soundfile as sf
+    import soxr
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "soundfile": sf.__version__,
+        "libsndfile": sf.__libsndfile_version__,
+        "soxr": soxr.__version__,
+    }
+
+
+def run_benchmark(cases=DEFAULT_CASES, work_dir=None, quality="hq", streaming=None):
+    """すべてのケースを順に実行し、結果を返します。
+
+    Args:
+        cases (Iterable[BenchmarkCase]): 実行するケース。
+        work_dir (str | None): コーパスを置くディレクトリ。Noneの場合は一時ディレクトリを使い、終了後に削除します。
+        quality (str): 変換品質の段階 (`QUALITY_TIERS` のキー)。
+        streaming (bool | None): ストリーミング変換の指定 (`perform_single_resample` を参照)。
+
+    Returns:
+        dict: 結果 (version, created, environment, settings, cases)。
+    """
+    cleanup = work_dir is None
+    if cleanup:
+        work_dir = tempfile.mkdtemp(prefix="wavresamples-bench-")
+    results = []
+    try:
+        for case in cases:
+            paths = generate_corpus(work_dir, case)
+            output_dir = os.path.join(work_dir, "output", case.name)
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.makedirs(output_dir)
+            # ピークRSSをケースごとに測るため、毎回新しいプロセスで実行する
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(_run_case, case, paths, output_dir, quality, streaming).result()
+            shutil.rmtree(output_dir, ignore_errors=True)
+            results.append(result)
+    finally:
+        if cleanup:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": _environment(),
+        "settings": {"quality": quality, "streaming": streaming},
+        "cases": results,
+    }
+
+
+def _format_bytes(value):
+    return "-" if value is None else f"{value / (1024 * 1024):.0f}MB"
+
+
+def main(argv=None):
+    """コマンドラインからベンチマークを実行し、結果を表示・保存します。
+
+    Args:
+        argv (list[str] | None): コマンドライン引数。Noneの場合は sys.argv を使用します。
+
+    Returns:
+        int: 終了コード (0: 成功, 1: 変換エラーあり)。
+    """
+    parser = argparse.ArgumentParser(
+        description="合成WAVファイルで変換処理全体の速度・メモリ使用量・段階ごとの所要時間を測定します。",
+    )
+    parser.add_argument("--case", action="append", choices=[case.name for case in DEFAULT_CASES], default=None,
+                        help="実行するケース (複数指定可) [既定: すべて]")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="ファイル数 (短いファイル) と長さ (長いファイル) の倍率 [既定: 1.0]")
+    parser.add_argument("--work-dir", default=None,
+                        help="コーパスを生成・再利用するディレクトリ (省略時は一時ディレクトリを使い、終了後に削除)")
+    parser.add_argument("--quality", default="hq", choices=["hq", "fast"], help="変換品質 [既定: hq]")
+    streaming_group = parser.add_mutually_exclusive_group()
+    streaming_group.add_argument("--streaming", dest="streaming", action="store_const", const=True, default=None,
+                                 help="すべてのファイルをストリーミングで変換する")
+    streaming_group.add_argument("--no-streaming", dest="streaming", action="store_const", const=False,
+                                 help="ファイル全体を読み込んで変換する")
+    parser.add_argument("--json", dest="json_path", help="測定結果をJSONで書き出すパス")
+    args = parser.parse_args(argv)
+    if args.scale <= 0:
+        parser.error("--scale には0より大きい値を指定してください。")
+
+    cases = [scale_case(case, args.scale) for case in DEFAULT_CASES if args.case is None or case.name in args.case]
+    report = run_benchmark(cases, work_dir=args.work_dir, quality=args.quality, streaming=args.streaming)
+
+    print(f"{'ケース':<22}{'files':>7}{'files/s':>10}{'実時間比':>10}{'ピークRSS':>10}  段階ごとの割合")
+    for r in report["cases"]:
+        total = sum(r["stages"].values()) or 1.0
+        shares = " ".join(f"{name}={seconds / total:.0%}" for name, seconds in r["stages"].items())
+        print(f"{r['name']:<22}{r['files']:>7}{r['files_per_sec']:>10.1f}{r['realtime_factor']:>9.0f}x"
+              f"{_format_bytes(r['peak_rss_bytes']):>10}  {shares}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if any(r["errors"] for r in report["cases"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
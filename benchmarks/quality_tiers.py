@@ -0,0 +1,161 @@
+"""変換品質の段階 (`QUALITY_TIERS`) ごとの速度と精度の計測スクリプトです。
+
+使用例:
+    python benchmarks/quality_tiers.py --seconds 10 --repeat 3 --json quality.json
+
+音声ファイルは使わず、その場で生成した合成信号 (複数の正弦波・掃引正弦波) を
+実際の変換と同じ `ResamplePlan` でリサンプリングします。
+参照信号は同じ式を目標周波数で直接標本化したもので、リサンプリング結果との差から
+SNR (dB) を求めます。信号の周波数はどちらの周波数のナイキスト周波数よりも十分低くしているため、
+理想的なリサンプラーなら参照信号と一致します。
+フィルタの立ち上がり・立ち下がりの影響を除くため、両端 `EDGE_SECONDS` 秒は評価に含めません。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from wavresamples.resampler import QUALITY_TIERS, get_resample_plan, quality_for_tier # noqa: E402
+
+
+# 既定で測定する (元の周波数, 目標の周波数) の組み合わせ
+DEFAULT_RATE_PAIRS = ((48000, 44100), (44100, 48000), (44100, 22050), (96000, 48000))
+# SNR の評価から除く両端の長さ (秒)
+EDGE_SECONDS = 0.05
+# 信号の最高周波数 (低い方の周波数のナイキスト周波数に対する比)
+MAX_FREQUENCY_RATIO = 0.5
+# 正弦波の振幅の合計 (クリップしないようフルスケールより小さくする)
+SIGNAL_AMPLITUDE = 0.5
+
+
+def synthesize(signal, sr, frames, max_frequency, channels=2):
+    """合成信号を生成します。同じ引数で `sr` だけを変えると、同じ信号を別の周波数で標本化したものになります。
+
+    Args:
+        signal (str): 信号の種類 ("tones": 複数の正弦波, "sweep": 線形の掃引正弦波)。
+        sr (int): サンプリング周波数。
+        frames (int): フレーム数。
+        max_frequency (float): 信号の最高周波数 (Hz)。
+        channels (int): チャンネル数 (各チャンネルは位相をずらした同じ信号)。
+
+    Returns:
+        np.ndarray: (frames, channels) 形式の float64 配列。
+
+    Raises:
+        ValueError: 不明な信号の種類の場合。
+    """
+    t = np.arange(frames) / sr
+    offsets = np.arange(channels) * (np.pi / 3)
+    if signal == "tones":
+        frequencies = np.geomspace(100.0, max_frequency, 5)
+        y = sum(np.sin(2 * np.pi * f * t[:, None] + offsets) for f in frequencies) / len(frequencies)
+    elif signal == "sweep":
+        # 瞬時周波数が 20Hz から max_frequency まで直線的に上がる掃引正弦波
+        duration = frames / sr
+        rate = (max_frequency - 20.0) / duration
+        y = np.sin(2 * np.pi * (20.0 * t + 0.5 * rate * t ** 2)[:, None] + offsets)
+    else:
+        raise ValueError(f"不明な信号の種類です: {signal}")
+    return SIGNAL_AMPLITUDE * y
+
+
+def snr_db(output, reference):
+    """参照信号に対する SNR (dB) を返します。"""
+    noise = np.sum((output.astype(np.float64) - reference) ** 2)
+    if noise == 0:
+        return float("inf")
+    return float(10 * np.log10(np.sum(reference ** 2) / noise))
+
+
+def benchmark_quality_tiers(rate_pairs=DEFAULT_RATE_PAIRS, seconds=10.0, channels=2, repeat=3,
+                            signals=("tones", "sweep"), tiers=None):
+    """変換品質の段階ごとにスループットと SNR を測定します。
+
+    スループットは、フィルタの設計を済ませた (ウォームアップ後の) 状態で
+    `repeat` 回変換したうちの最短時間から求めます。
+
+    Args:
+        rate_pairs (Iterable[tuple[int, int]]): (元の周波数, 目標の周波数) の組み合わせ。
+        seconds (float): 合成信号の長さ (秒)。
+        channels (int): チャンネル数。
+        repeat (int): 測定の繰り返し回数。
+        signals (Iterable[str]): 合成信号の種類 (`synthesize` を参照)。
+        tiers (Iterable[str] | None): 測定する段階。Noneの場合は `QUALITY_TIERS` のすべて。
+
+    Returns:
+        list[dict]: 測定結果 (tier, signal, orig_sr, target_sr, samples_per_sec, realtime_factor, snr_db)。
+    """
+    tiers = list(QUALITY_TIERS) if tiers is None else list(tiers)
+    results = []
+    for orig_sr, target_sr in rate_pairs:
+        frames = int(seconds * orig_sr)
+        target_frames = int(np.ceil(frames * float(target_sr) / orig_sr))
+        edge = int(EDGE_SECONDS * target_sr)
+        max_frequency = MAX_FREQUENCY_RATIO * min(orig_sr, target_sr) / 2
+        for signal in signals:
+            source = synthesize(signal, orig_sr, frames, max_frequency, channels).astype(np.float32)
+            reference = synthesize(signal, target_sr, target_frames, max_frequency, channels)
+            for tier in tiers:
+                plan = get_resample_plan(orig_sr, target_sr, quality_for_tier(tier))
+                output = plan.resample(source) # ウォームアップ (フィルタの設計)
+                best = float("inf")
+                for _ in range(max(1, repeat)):
+                    start = time.perf_counter()
+                    output = plan.resample(source)
+                    best = min(best, time.perf_counter() - start)
+                results.append({
+                    "tier": tier,
+                    "signal": signal,
+                    "orig_sr": orig_sr,
+                    "target_sr": target_sr,
+                    "samples_per_sec": frames * channels / best,
+                    "realtime_factor": seconds / best,
+                    "snr_db": snr_db(output[edge:-edge], reference[edge:-edge]),
+                })
+    return results
+
+
+def main(argv=None):
+    """コマンドラインからベンチマークを実行し、結果を表形式で表示します。
+
+    Args:
+        argv (list[str] | None): コマンドライン引数。Noneの場合は sys.argv を使用します。
+
+    Returns:
+        int: 終了コード。
+    """
+    parser = argparse.ArgumentParser(
+        description="変換品質の段階ごとのリサンプリング速度 (samples/s) と SNR を合成信号で測定します。",
+    )
+    parser.add_argument("--seconds", type=float, default=10.0, help="合成信号の長さ (秒) [既定: 10]")
+    parser.add_argument("--channels", type=int, default=2, help="チャンネル数 [既定: 2]")
+    parser.add_argument("--repeat", type=int, default=3, help="測定の繰り返し回数 (最短時間を採用) [既定: 3]")
+    parser.add_argument("--tier", action="append", choices=list(QUALITY_TIERS), default=None,
+                        help="測定する変換品質 (複数指定可) [既定: すべて]")
+    parser.add_argument("--json", dest="json_path", help="測定結果をJSONで書き出すパス")
+    args = parser.parse_args(argv)
+    if args.seconds <= 2 * EDGE_SECONDS:
+        parser.error(f"--seconds には {2 * EDGE_SECONDS} より大きい値を指定してください。")
+
+    results = benchmark_quality_tiers(seconds=args.seconds, channels=args.channels, repeat=args.repeat, tiers=args.tier)
+    print(f"{'品質':<6}{'信号':<8}{'変換':>16}{'samples/s':>14}{'実時間比':>10}{'SNR(dB)':>10}")
+    for r in results:
+        print(f"{r['tier']:<6}{r['signal']:<8}{r['orig_sr']:>7}->{r['target_sr']:<7}"
+              f"{r['samples_per_sec'] / 1e6:>12.1f}M{r['realtime_factor']:>9.0f}x{r['snr_db']:>10.1f}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "seconds": args.seconds, "channels": args.channels, "results": results},
+                      f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
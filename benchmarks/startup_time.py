@@ -0,0 +1,103 @@
+"""起動時間の計測スクリプトです。
+
+GUIモジュール (`WavResamples`) とコマンドライン (`wavresamples.cli`) のインポートに
+かかる時間を、毎回新しいPythonプロセスで計測します。あわせて、起動時に
+librosa / numba / scipy などの重いライブラリが読み込まれていないことを確認します。
+
+使用例:
+    python benchmarks/startup_time.py --repeat 5 --json startup.json --max-seconds 1.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 起動時に読み込まれてはいけない重いモジュール
+HEAVY_MODULES = ("librosa", "numba", "scipy", "soxr")
+
+# 計測対象: 名前 -> インポートするモジュール
+TARGETS = {
+    "gui": "WavResamples",
+    "cli": "wavresamples.cli",
+}
+
+_PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    """指定モジュールのインポート時間を新しいプロセスで `repeat` 回計測します。
+
+    Args:
+        module (str): インポートするモジュール名。
+        repeat (int): 計測回数。
+
+    Returns:
+        dict: 計測結果 (min / median / max 秒と、読み込まれた重いモジュールの一覧)。
+    """
+    samples = []
+    loaded = set()
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        loaded.update(result["loaded"])
+    return {
+        "module": module,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+        "heavy_modules_loaded": sorted(loaded),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WavResamples の起動時間を計測します。")
+    parser.add_argument("--repeat", type=int, default=5, help="各対象の計測回数 [既定: 5]")
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=sorted(TARGETS),
+                        help="計測対象 [既定: すべて]")
+    parser.add_argument("--json", dest="json_path", help="計測結果をJSONで書き出すパス")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="中央値がこの秒数を超えた場合、終了コード1を返す（回帰検出用）")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.targets:
+        try:
+            results[name] = measure(TARGETS[name], args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{name}: 計測に失敗しました\n{e.stderr}", file=sys.stderr)
+            return 1
+
+    failed = False
+    for name, result in results.items():
+        print(f"{name:4s} ({result['module']}): median {result['median'] * 1000:.1f} ms "
+              f"(min {result['min'] * 1000:.1f} / max {result['max'] * 1000:.1f} ms)")
+        if result["heavy_modules_loaded"]:
+            print(f"  警告: 起動時に重いモジュールが読み込まれています: {', '.join(result['heavy_modules_loaded'])}")
+            failed = True
+        if args.max_seconds is not None and result["median"] > args.max_seconds:
+            print(f"  警告: 中央値が上限 {args.max_seconds:.3f} 秒を超えています。")
+            failed = True
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "results": results}, f, ensure_ascii=False, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""WavResamples の変換コアです。
+
+GUIから独立して利用できる変換ジョブの記述・変換ロジック・並列実行エンジンを提供します。
+tkinter / tkinterdnd2 には依存せず、オーディオ系ライブラリ (librosa など) も
+各APIを最初に参照した時点で読み込むため、パッケージのインポート自体は軽量です。
+"""
+import importlib
+
+
+# 公開API名 -> 定義されているサブモジュール
+_LAZY_EXPORTS = {
+    "ResampleJob": "core",
+    "job_for_file": "core",
+    "ConversionTarget": "core",
+    "TARGET_PROFILES": "core",
+    "perform_multi_resample": "core",
+    "run_resample_job": "core",
+    "perform_single_resample": "core",
+    "build_output_filename": "core",
+    "parse_sample_rate": "core",
+    "subtype_for_bit_depth": "core",
+    "STATUS_DONE": "core",
+    "STATUS_ERROR": "core",
+    "ResampleEngine": "engine",
+    "default_worker_count": "engine",
+    "iter_wav_files": "batch",
+    "build_jobs": "batch",
+    "convert_files": "batch",
+    "watch_jobs": "batch",
+    "iter_wav_paths": "scanner",
+    "FolderWatcher": "watcher",
+    "JobJournal": "journal",
+    "Manifest": "manifest",
+    "MetadataCache": "metadata",
+    "read_metadata": "metadata",
+    "open_pcm_wav": "pcmwav",
+    "convert_channels": "channels",
+    "resolve_channel_map": "channels",
+    "get_resample_plan": "resampler",
+    "QUALITY_TIERS": "resampler",
+    "StageTimer": "stages",
+    "JobStatsReport": "instrumentation",
+    "MemoryBudgetScheduler": "scheduler",
+    "SourcePrefetcher": "pipeline",
+    "resample_plan_cache_info": "resampler",
+}
+
+__all__ = sorted(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """公開APIを初回参照時にサブモジュールから読み込みます。"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
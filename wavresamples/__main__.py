@@ -0,0 +1,10 @@
+"""`python -m wavresamples` のエントリーポイントです。"""
+import sys
+import multiprocessing
+
+from .cli import main
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""出力ファイルのアトミックな書き出しです。
+
+出力先のパスに直接書き込むと、書き込み中に強制終了された場合に
+途中までのWAVファイルが残ります。ここでは同じディレクトリの一時ファイルに書き出し、
+書き込みが完了してから `os.replace` で出力先に置き換えます。
+置き換えは同じファイルシステム内の名前の変更なので、出力先には
+変換前のファイルか、完成したファイルのどちらかしか存在しません。
+"""
+import contextlib
+import os
+
+
+TEMP_SUFFIX = ".part"
+
+
+def soundfile_format(path):
+    """出力ファイルの拡張子から soundfile の書き出し形式 (例: "WAV") を返します。
+
+    一時ファイルの拡張子からは形式を判定できないため、書き出し時に明示的に指定します。
+
+    Args:
+        path (str): 出力ファイルのパス。
+
+    Returns:
+        str: 書き出し形式。
+    """
+    return os.path.splitext(path)[1].lstrip(".").upper() or "WAV"
+
+
+@contextlib.contextmanager
+def atomic_output(output_path):
+    """一時ファイルのパスを返し、ブロックが正常に終了したら出力先に置き換えます。
+
+    例外が発生した場合は一時ファイルを削除し、出力先には手を付けません。
+
+    Args:
+        output_path (str): 出力ファイルのパス。
+
+    Yields:
+        str: 書き込み先の一時ファイルのパス。
+    """
+    directory, filename = os.path.split(output_path)
+    # 一時ファイル名は出力先ごとに固定し、強制終了で残った一時ファイルも再実行時に上書き・回収する
+    tmp_path = os.path.join(directory, f".{filename}{TEMP_SUFFIX}")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,360 @@
+"""GUIを使わずに複数ファイルをまとめて変換するためのライブラリAPIです。
+
+コマンドライン (`python -m wavresamples`) やスクリプトからの利用を想定しています。
+"""
+import os
+import queue
+import time
+
+from .core import job_for_file, is_output_filename, is_wav_file, STATUS_DONE
+from .engine import ResampleEngine
+from .channels import DEFAULT_CHANNEL_MAP
+from .resampler import DEFAULT_QUALITY_TIER
+from .scanner import iter_wav_paths
+from .pipeline import SourcePrefetcher
+from .scheduler import MemoryBudgetScheduler
+from .watcher import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE_SECONDS, FolderWatcher
+
+
+def iter_wav_files(path, recursive=False):
+    """指定されたパスから変換対象のWAVファイルを列挙します。
+
+    ディレクトリの場合、変換後のファイル名 (`is_output_filename`) のファイルは除きます。
+    出力先が入力と同じフォルダでも、再実行で変換結果をさらに変換しないようにするためです。
+
+    Args:
+        path (str): WAVファイルまたはディレクトリのパス。
+        recursive (bool): ディレクトリの場合にサブディレクトリも探索するか。
+
+    Yields:
+        tuple[str, str]: (WAVファイルの絶対パス, 入力ディレクトリからの相対ディレクトリ)
+    """
+    path = os.path.abspath(path)
+    if os.path.isfile(path):
+        if is_wav_file(path):
+            yield path, ""
+        return
+
+    for filepath in iter_wav_paths(path, recursive=recursive):
+        if is_output_filename(os.path.basename(filepath)):
+            continue
+        rel_dir = os.path.relpath(os.path.dirname(filepath), path)
+        yield filepath, ("" if rel_dir == "." else rel_dir)
+
+
+UP_TO_DATE_MESSAGE = "スキップ: {filename} (前回の変換から変更がありません)"
+RESUMED_MESSAGE = "スキップ: {filename} (中断前に変換済みです)"
+# スケジューラーに先読みしておくジョブ数の最小値 (大きなファイルを待つ間に小さなファイルを先に投入できるようにする)
+SCHEDULER_LOOKAHEAD = 64
+# 変換の途中でマニフェストを保存する間隔 (秒)。実行中のジョブがなくなったときにも保存する
+MANIFEST_SAVE_INTERVAL = 30.0
+# 実行中のジョブがなく、次のジョブを待つときに一度に待つ最大の時間 (秒)。
+# Windows ではタイムアウトなしの待機を Ctrl+C で中断できないため、この間隔で待ち直す
+IDLE_WAIT_SECONDS = 1.0
+
+_EXHAUSTED = object() # ジョブの列の終端の目印
+
+
+def convert_files(jobs, max_workers=None, use_processes=True, on_result=None, manifest=None, journal=None, stats=None,
+                  memory_budget=None, prefetch=None, collect_results=True):
+    """変換ジョブをワーカープールで並列に実行し、すべての結果を返します。
+
+    ジョブは `MemoryBudgetScheduler` を通して投入します。実行中のジョブのメモリ使用量の見積もりが
+    `memory_budget` を超えないように、大きなファイルを待たせている間も小さなファイルを先に投入し、
+    予算に対して大きすぎるファイルはストリーミング変換に切り替えます (`wavresamples.scheduler` を参照)。
+    次に投入するファイルは入出力用のスレッドで先読みし、ワーカーの計算とストレージの読み込みを重ねます
+    (`wavresamples.pipeline` を参照)。
+
+    `manifest` を指定すると差分変換を行います。前回の変換から元ファイル・変換設定・
+    出力ファイルのいずれも変わっていないジョブはワーカーに渡さずスキップし、
+    変換に成功したジョブはマニフェストに記録します。マニフェストは変換の途中でも
+    `MANIFEST_SAVE_INTERVAL` 秒ごとと、実行中のジョブがなくなったときに保存し、
+    処理の終了時 (中断された場合も含む) にも保存します。
+
+    `journal` を指定すると、各ジョブの受け付け・開始・完了をジャーナルに記録します。
+    中断された実行を同じジャーナルで再実行すると、中断前に完了したジョブはスキップされます。
+    すべてのジョブが完了した場合 (フォルダの監視では、実行中のジョブがなくなるたび) は、ジャーナルを空にします。
+
+    `stats` を指定すると、ワーカーで変換したジョブごとに段階別の所要時間・読み書きしたバイト数を計測し、
+    結果と一緒に受け取って `stats` に記録します (`wavresamples.instrumentation` を参照)。
+
+    `jobs` は、すぐに渡せるジョブがない間はNoneを返せます (フォルダの監視 `watch_jobs` など)。
+    Noneを受け取った場合は、実行中のジョブの完了を受け取りながら、少し待ってから次のジョブを取り出します。
+    実行中のジョブもない場合は、`jobs` の `wait(timeout)` (あれば) で次のジョブが用意できるまで待ちます。
+    終わりのない `jobs` では `collect_results=False` を指定し、結果は `on_result` で受け取ってください。
+
+    Args:
+        jobs (Iterable[ResampleJob | None]): 変換ジョブ。
+        max_workers (int | None): ワーカー数。Noneの場合はCPUコア数。
+        use_processes (bool): Trueならプロセスプール、Falseならスレッドプールを使用します。
+        on_result (callable | None): 1件完了するごとに `on_result(job, status, message)` で呼び出されます。
+            呼び出し元のスレッドから呼び出されます。
+        manifest (Manifest | None): 差分変換に使うマニフェスト。
+        journal (JobJournal | None): 処理状況を記録するジャーナル。
+        stats (JobStatsReport | None): 計測結果を記録するレポート。
+        memory_budget (int | None): 同時に変換するジョブのメモリ使用量の上限 (バイト)。
+            Noneの場合は物理メモリの半分です。
+        prefetch (int | None): 先読みするファイル数 (これから投入する順)。Noneの場合はワーカー数、0の場合は先読みしません。
+        collect_results (bool): Falseの場合、結果をリストに溜めずにNoneを返します (フォルダの監視など)。
+
+    Returns:
+        list[tuple[ResampleJob, str, str]] | None: (ジョブ, 処理結果のステータス文字列, 詳細メッセージ) のリスト（完了順）。
+            `collect_results` がFalseの場合はNone。
+    """
+    engine = ResampleEngine(max_workers=max_workers, use_processes=use_processes,
+                            instrument=stats is not None, profile=stats is not None and stats.profile_slowest > 0)
+    scheduler = MemoryBudgetScheduler(memory_budget, max_running=engine.max_workers)
+    lookahead = max(SCHEDULER_LOOKAHEAD, engine.max_workers * 4)
+    prefetch = engine.max_workers if prefetch is None else prefetch
+    prefetcher = SourcePrefetcher() if prefetch > 0 else None
+    results_queue = queue.Queue()
+    results = [] if collect_results else None
+    completed = 0
+    manifest_saved_at = time.monotonic()
+
+    def _drain(block):
+        nonlocal completed, manifest_saved_at
+        while True:
+            try:
+                job, status, message, job_stats = results_queue.get(block=block)
+            except queue.Empty:
+                return
+            completed += 1
+            result = (job, status, message)
+            if results is not None:
+                results.append(result)
+            if stats is not None and job_stats is not None:
+                stats.record(job_stats)
+            if manifest is not None and job.filepath in source_fingerprints:
+                # 前回の結果を再利用したジョブは記録済みなので、変換したジョブだけを記録する
+                source = source_fingerprints.pop(job.filepath)
+                if status == STATUS_DONE:
+                    manifest.record(job, source)
+                else:
+                    manifest.forget(job.filepath)
+            if manifest is not None and (completed == submitted or
+                                         time.monotonic() - manifest_saved_at >= MANIFEST_SAVE_INTERVAL):
+                # 長時間の実行 (フォルダの監視など) が強制終了されても、記録を失わないようにする
+                manifest.save()
+                manifest_saved_at = time.monotonic()
+            if on_result is not None:
+                on_result(*result)
+            if block:
+                return
+
+    def _admit(job):
+        """スキップしないジョブをスケジューラーに追加します。スキップしたジョブは結果キューに入れます。"""
+        if manifest is not None:
+            if manifest.is_up_to_date(job):
+                results_queue.put((job, STATUS_DONE, UP_TO_DATE_MESSAGE.format(filename=os.path.basename(job.filepath)), None))
+                return
+            source_fingerprints[job.filepath] = manifest.source_fingerprint(job)
+        job_id = None
+        if journal is not None:
+            if journal.is_done(job):
+                results_queue.put((job, STATUS_DONE, RESUMED_MESSAGE.format(filename=os.path.basename(job.filepath)), None))
+                return
+            job_id = journal.queued(job)
+        # ジャーナル・マニフェスト・結果には元のジョブを使い、ワーカーにはスケジューラーが調整したジョブを渡す
+        scheduler.put(job, (job, job_id))
+
+    submitted = 0
+    source_fingerprints = {}
+    try:
+        jobs = iter(jobs)
+        exhausted = False
+        while True:
+            # 先読みしてスケジューラーに追加する (スキップしたジョブはここで完了する)
+            while not exhausted and len(scheduler) < lookahead:
+                job = next(jobs, _EXHAUSTED)
+                if job is _EXHAUSTED:
+                    exhausted = True
+                    break
+                if job is None: # まだ渡せるジョブがない (フォルダの監視中など)
+                    break
+                submitted += 1
+                _admit(job)
+            _drain(block=False)
+            if exhausted and not len(scheduler):
+                break
+            if not exhausted and completed == submitted and not len(scheduler):
+                # 実行中のジョブがない間は、次のジョブが用意されるまで眠る (フォルダの監視の待機中など)
+                if journal is not None:
+                    # すべて完了した時点でジャーナルを空にし、監視中に記録が増え続けないようにする
+                    journal.reset()
+                wait = getattr(jobs, "wait", None)
+                if wait is not None:
+                    wait(IDLE_WAIT_SECONDS)
+                continue
+            # メモリ予算と空きワーカーに収まるジョブを取り出す。待つ間も完了した結果を順次受け取る
+            entry = scheduler.get(timeout=0.1)
+            if entry is None:
+                continue
+            job, job_id = entry.context
+
+            def _on_done(status, message, job_stats=None, job=job, job_id=job_id, entry=entry):
+                scheduler.release(entry)
+                if job_id is not None:
+                    journal.finished(job_id, status, message)
+                results_queue.put((job, status, message, job_stats))
+
+            def _on_start(job_id=job_id):
+                if job_id is not None:
+                    journal.started(job_id)
+            while not engine.submit(entry.job, _on_done, on_start=_on_start, timeout=0.1):
+                _drain(block=False)
+            if prefetcher is not None:
+                # ワーカーが計算している間に、次に投入するファイルを読み込んでおく
+                prefetcher.prefetch(job.filepath for job in scheduler.peek(prefetch))
+        while completed < submitted:
+            _drain(block=True)
+        if journal is not None:
+            journal.reset()
+    finally:
+        if prefetcher is not None:
+            prefetcher.shutdown()
+        engine.shutdown(wait=True)
+        if manifest is not None:
+            manifest.save()
+    return results
+
+
+def build_jobs(input_path, output_dir, target_sr, target_channels, target_subtype, recursive=False, streaming=None, extra_targets=(),
+               quality=DEFAULT_QUALITY_TIER, dither=False, channel_map=DEFAULT_CHANNEL_MAP):
+    """入力パスから変換ジョブを生成します。
+
+    再帰探索時は、入力ディレクトリからの相対ディレクトリ構成を出力先にも再現します。
+    `output_dir` がNoneの場合は、元ファイルと同じディレクトリに保存します。
+
+    Args:
+        input_path (str): WAVファイルまたはディレクトリのパス。
+        output_dir (str | None): 出力先ディレクトリ。
+        target_sr (int): 目標のサンプリング周波数。
+        target_channels (int): 目標のチャンネル数。
+        target_subtype (str): 目標のビット深度(サブタイプ)。
+        recursive (bool): サブディレクトリも探索するか。
+        streaming (bool | None): ストリーミング変換の指定 (`perform_single_resample` を参照)。
+        extra_targets (Iterable[ConversionTarget]): 同じ読み込みから追加で書き出す出力形式。
+        quality (str): 変換品質の段階 ("hq": マスター用, "fast": プレビュー用)。
+        dither (bool): Trueの場合、ビット深度を減らす量子化の前に TPDF ディザを加えます。
+        channel_map (str): チャンネルの対応 (プリセット名か係数の行列、`wavresamples.channels` を参照)。
+
+    Yields:
+        ResampleJob: 変換ジョブ。
+    """
+    for filepath, rel_dir in iter_wav_files(input_path, recursive=recursive):
+        if output_dir is None:
+            job_output_dir = os.path.dirname(filepath)
+        else:
+            job_output_dir = os.path.join(output_dir, rel_dir) if rel_dir else output_dir
+        yield job_for_file(filepath, target_sr, target_channels, target_subtype, job_output_dir,
+                           streaming=streaming, extra_targets=extra_targets, quality=quality, dither=dither,
+                           channel_map=channel_map)
+
+
+def watch_jobs(input_dir, output_dir, target_sr, target_channels, target_subtype, recursive=False, streaming=None,
+               extra_targets=(), quality=DEFAULT_QUALITY_TIER, dither=False, channel_map=DEFAULT_CHANNEL_MAP,
+               include_existing=True, polling=False, settle=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL):
+    """フォルダの監視を開始し、書き込みが完了したWAVファイルの変換ジョブを生成し続ける反復子を返します。
+
+    `convert_files` に渡すと、監視フォルダに置かれたファイルを同じワーカープールで順次変換します。
+    すぐに渡せるジョブがない間はNoneを返し、`convert_files` は実行中のジョブがなければ
+    `WatchedJobs.wait` で次のファイルを待ちます。`close` を呼ぶと監視を終了します
+    (`wavresamples.watcher.FolderWatcher` を参照)。終わりがないため、`convert_files` には
+    `collect_results=False` を指定してください。
+
+    Args:
+        input_dir (str): 監視するフォルダ。
+        output_dir (str | None): 出力先ディレクトリ。Noneの場合は元ファイルと同じディレクトリに保存します。
+        target_sr (int): 目標のサンプリング周波数。
+        target_channels (int): 目標のチャンネル数。
+        target_subtype (str): 目標のビット深度(サブタイプ)。
+        recursive (bool): サブフォルダも監視し、フォルダ構成を保って出力するか。
+        streaming (bool | None): ストリーミング変換の指定 (`perform_single_resample` を参照)。
+        extra_targets (Iterable[ConversionTarget]): 同じ読み込みから追加で書き出す出力形式。
+        quality (str): 変換品質の段階 ("hq": マスター用, "fast": プレビュー用)。
+        dither (bool): Trueの場合、ビット深度を減らす量子化の前に TPDF ディザを加えます。
+        channel_map (str): チャンネルの対応 (プリセット名か係数の行列、`wavresamples.channels` を参照)。
+        include_existing (bool): 監視の開始時にあるファイルも変換するか。
+        polling (bool): Trueの場合、inotify を使わずにポーリングで監視します。
+        settle (float): 最後の変更から、書き込みが完了したとみなすまでの時間 (秒)。
+        poll_interval (float): ポーリングでフォルダを走査する間隔 (秒)。
+
+    Returns:
+        WatchedJobs: 変換ジョブ (まだ変換できるファイルがない場合はNone) を返す反復子。
+
+    Raises:
+        NotADirectoryError: `input_dir` がフォルダでない場合。
+    """
+    input_dir = os.path.abspath(input_dir)
+
+    def _make_job(filepath):
+        if output_dir is None:
+            job_output_dir = os.path.dirname(filepath)
+        else:
+            rel_dir = os.path.relpath(os.path.dirname(filepath), input_dir)
+            job_output_dir = output_dir if rel_dir == "." else os.path.join(output_dir, rel_dir)
+        return job_for_file(filepath, target_sr, target_channels, target_subtype, job_output_dir,
+                            streaming=streaming, extra_targets=extra_targets, quality=quality, dither=dither,
+                            channel_map=channel_map)
+
+    ready = queue.Queue()
+
+    def _on_files(paths):
+        for path in paths:
+            ready.put(path)
+
+    watcher = FolderWatcher(input_dir, _on_files, recursive=recursive, settle=settle, poll_interval=poll_interval,
+                            include_existing=include_existing, polling=polling)
+    watcher.start()
+    print(f"フォルダを監視しています ({watcher.backend}): {input_dir}")
+    return WatchedJobs(watcher, ready, _make_job)
+
+
+class WatchedJobs:
+    """フォルダの監視で見つかったファイルから変換ジョブを生成する反復子です (`watch_jobs` が返します)。
+
+    Args:
+        watcher (FolderWatcher): 開始済みの監視。`close` で止めます。
+        ready (queue.Queue): 監視スレッドが、書き込みが完了したファイルのパスを入れるキュー。
+        make_job (callable): パスから変換ジョブを作る関数。
+    """
+
+    def __init__(self, watcher, ready, make_job):
+        self.watcher = watcher
+        self._ready = ready
+        self._make_job = make_job
+        self._next_path = None # wait で受け取った、まだジョブにしていないパス
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """次の変換ジョブを返します。まだ変換できるファイルがない場合はNoneを返します (待ちません)。"""
+        filepath, self._next_path = self._next_path, None
+        if filepath is None:
+            try:
+                filepath = self._ready.get_nowait()
+            except queue.Empty:
+                return None
+        return self._make_job(filepath)
+
+    def wait(self, timeout=None):
+        """次のファイルが見つかるまで待ちます。
+
+        Args:
+            timeout (float | None): 最大の待ち時間 (秒)。Noneの場合は無期限に待ちます。
+
+        Returns:
+            bool: 次のジョブを返せる場合はTrue、タイムアウトした場合はFalse。
+        """
+        if self._next_path is None:
+            try:
+                self._next_path = self._ready.get(timeout=timeout)
+            except queue.Empty:
+                return False
+        return True
+
+    def close(self):
+        """フォルダの監視を終了します。"""
+        self.watcher.stop()
@@ -0,0 +1,181 @@
+"""チャンネル数の変換処理です。
+
+データはすべて (frames, channels) 形式 (フレーム優先) で扱います。
+チャンネルの対応 (ダウンミックス・アップミックス) は、(元のチャンネル数, 目標のチャンネル数) 形式の
+ミキシング行列で表し、ブロックごとに1回の行列積 (BLAS) で適用します。
+行列はプリセットの名前か、係数を並べた文字列で指定します (`parse_channel_map` を参照)。
+
+* "auto" (既定): チャンネル数が同じならそのまま、モノラルからは複製、モノラルへは平均、
+  4ch / 5.1ch / 7.1ch からステレオへは ITU ダウンミックスです。
+* "itu": ITU-R BS.775 のダウンミックス (4ch / 5.1ch / 7.1ch → ステレオ・モノラル)。
+  センター・サラウンドを -3dB (0.7071) で左右に加え、LFE は使いません。
+* "mix": すべてのチャンネルの平均 (モノラル合成) を、目標のすべてのチャンネルに書き込みます。
+* "duplicate": 目標のチャンネル i に元のチャンネル i (足りない分は先頭から繰り返し) を複製します。
+
+出力用のバッファは1回だけ確保し、そのままの変換とモノラルからの複製は行列積を使わずに
+直接書き込むため、変換1回あたりのコピーは最大1回です。
+"""
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+
+# 既定のチャンネルの対応
+DEFAULT_CHANNEL_MAP = "auto"
+# チャンネルの対応のプリセット名
+CHANNEL_MAP_PRESETS = ("auto", "itu", "mix", "duplicate")
+
+# ITU-R BS.775 のダウンミックスでセンター・サラウンドに掛ける係数 (-3dB)
+_ITU_COEFFICIENT = 0.7071
+# WAVファイルの既定のチャンネル順 (WAVE_FORMAT_EXTENSIBLE のチャンネルマスク順) ごとの、
+# ステレオの左右に対する係数 (L, R)。LFE は (0, 0)
+_ITU_STEREO_GAINS = {
+    4: ((1, 0), (0, 1), (_ITU_COEFFICIENT, 0), (0, _ITU_COEFFICIENT)), # FL FR BL BR
+    6: ((1, 0), (0, 1), (_ITU_COEFFICIENT, _ITU_COEFFICIENT), (0, 0), # FL FR FC LFE
+        (_ITU_COEFFICIENT, 0), (0, _ITU_COEFFICIENT)), # BL BR (SL SR)
+    8: ((1, 0), (0, 1), (_ITU_COEFFICIENT, _ITU_COEFFICIENT), (0, 0), # FL FR FC LFE
+        (_ITU_COEFFICIENT, 0), (0, _ITU_COEFFICIENT), (_ITU_COEFFICIENT, 0), (0, _ITU_COEFFICIENT)), # BL BR SL SR
+}
+
+# チャンネルの対応を解決した結果。kind は "identity" (そのまま)・"duplicate" (モノラルの複製)・
+# "average" (モノラルへの平均)・"matrix" (それ以外) のいずれか
+ChannelMapping = namedtuple("ChannelMapping", ["matrix", "kind"])
+
+
+def parse_channel_map(text):
+    """チャンネルの対応の指定 (プリセット名か、係数の文字列) を検証し、正規化した文字列を返します。
+
+    係数の文字列は、目標のチャンネルごとの行を ";" で、行内の元のチャンネルごとの係数を "," で区切ります。
+    例: "0.5,0.5;0.5,0.5" (ステレオの両チャンネルに左右の平均を書き込む)
+
+    Args:
+        text (str): プリセット名 (`CHANNEL_MAP_PRESETS` のいずれか) または係数の文字列。
+
+    Returns:
+        str: 正規化した指定 (プリセット名は小文字、係数は float の表記に揃えたもの)。
+
+    Raises:
+        ValueError: 不明なプリセット名や、係数を解析できない場合。
+    """
+    text = text.strip().lower()
+    if text in CHANNEL_MAP_PRESETS:
+        return text
+    rows = _parse_matrix_rows(text)
+    return ";".join(",".join(repr(value) for value in row) for row in rows)
+
+
+def _parse_matrix_rows(text):
+    """係数の文字列を、目標のチャンネルごとの係数のタプルに変換します。"""
+    try:
+        rows = tuple(tuple(float(value) for value in row.split(",")) for row in text.split(";"))
+    except ValueError as e:
+        raise ValueError(f"チャンネルの対応 '{text}' はプリセット名 ({', '.join(CHANNEL_MAP_PRESETS)}) か、"
+                         "係数の行列 (例: 0.5,0.5;0.5,0.5) で指定してください。") from e
+    if len({len(row) for row in rows}) != 1:
+        raise ValueError(f"チャンネルの対応 '{text}' の各行の係数の数が揃っていません。")
+    if not np.all(np.isfinite(rows)):
+        raise ValueError(f"チャンネルの対応 '{text}' に有限でない係数が含まれています。")
+    return rows
+
+
+def _itu_matrix(source_channels, target_channels):
+    gains = _ITU_STEREO_GAINS.get(source_channels)
+    if source_channels == 2:
+        gains = ((1, 0), (0, 1))
+    if gains is None or target_channels not in (1, 2):
+        raise ValueError(f"ITU ダウンミックスは 2ch / 4ch / 5.1ch / 7.1ch から 1ch / 2ch への変換のみ対応しています "
+                         f"({source_channels}ch → {target_channels}ch)。")
+    matrix = np.array(gains, dtype=np.float64)
+    matrix /= matrix.sum(axis=0).max() # 最大の出力チャンネルの係数の合計を1にし、クリップさせない
+    if target_channels == 1:
+        matrix = matrix.mean(axis=1, keepdims=True)
+    return matrix
+
+
+def _preset_matrix(source_channels, target_channels, channel_map):
+    if channel_map == "auto":
+        if source_channels == target_channels:
+            return np.eye(source_channels)
+        if source_channels == 1 or target_channels == 1:
+            return _preset_matrix(source_channels, target_channels, "mix")
+        if source_channels in _ITU_STEREO_GAINS and target_channels == 2:
+            return _itu_matrix(source_channels, target_channels)
+        raise ValueError(f"{source_channels}ch から {target_channels}ch への変換には対応していません "
+                         "(チャンネルの対応を指定してください)。")
+    if channel_map == "itu":
+        return _itu_matrix(source_channels, target_channels)
+    if channel_map == "mix":
+        return np.full((source_channels, target_channels), 1.0 / source_channels)
+    if channel_map == "duplicate":
+        matrix = np.zeros((source_channels, target_channels))
+        matrix[np.arange(target_channels) % source_channels, np.arange(target_channels)] = 1.0
+        return matrix
+    rows = _parse_matrix_rows(channel_map)
+    if len(rows) != target_channels or len(rows[0]) != source_channels:
+        raise ValueError(f"チャンネルの対応の行列は {target_channels}行 × {source_channels}列 "
+                         f"(目標のチャンネル数 × 元のチャンネル数) で指定してください。")
+    return np.array(rows, dtype=np.float64).T
+
+
+@functools.lru_cache(maxsize=64)
+def resolve_channel_map(source_channels, target_channels, channel_map=DEFAULT_CHANNEL_MAP):
+    """チャンネルの対応を、ミキシング行列と変換の種類に解決します。
+
+    Args:
+        source_channels (int): 元のチャンネル数。
+        target_channels (int): 目標のチャンネル数。
+        channel_map (str): チャンネルの対応 (`parse_channel_map` を参照)。
+
+    Returns:
+        ChannelMapping: (元のチャンネル数, 目標のチャンネル数) 形式の float64 の行列 (読み取り専用) と変換の種類。
+
+    Raises:
+        ValueError: 対応していないチャンネル数の組み合わせや、行列の形が合わない場合。
+    """
+    matrix = _preset_matrix(source_channels, target_channels, channel_map)
+    matrix.setflags(write=False)
+    if source_channels == target_channels and np.array_equal(matrix, np.eye(source_channels)):
+        kind = "identity"
+    elif source_channels == 1 and np.all(matrix == 1.0):
+        kind = "duplicate"
+    elif target_channels == 1 and np.all(matrix == 1.0 / source_channels):
+        kind = "average"
+    else:
+        kind = "matrix"
+    return ChannelMapping(matrix, kind)
+
+
+def convert_channels(y, target_channels, frames=None, channel_map=DEFAULT_CHANNEL_MAP):
+    """(frames, channels) 形式の配列を、目標のチャンネル数 (と長さ) の配列に変換します。
+
+    チャンネル数も長さも変わらない場合 (対応がそのままの場合) は、コピーせずに入力をそのまま返します。
+
+    Args:
+        y (np.ndarray): (frames, channels) 形式の配列。
+        target_channels (int): 目標のチャンネル数。
+        frames (int | None): 出力のフレーム数。入力より長い場合は無音で埋め、短い場合は切り詰めます。
+            Noneの場合は入力と同じ長さです。
+        channel_map (str): チャンネルの対応 (`parse_channel_map` を参照)。
+
+    Returns:
+        np.ndarray: (frames, target_channels) 形式の配列。
+
+    Raises:
+        ValueError: 対応していないチャンネル数の組み合わせの場合。
+    """
+    channels = y.shape[1]
+    if frames is None:
+        frames = y.shape[0]
+    mapping = resolve_channel_map(channels, target_channels, channel_map)
+    if mapping.kind == "identity" and y.shape[0] == frames:
+        return y
+
+    n = min(frames, y.shape[0])
+    out = np.empty((frames, target_channels), dtype=y.dtype)
+    if mapping.kind in ("identity", "duplicate"): # そのまま、またはモノラルの複製 (ブロードキャスト)
+        out[:n] = y[:n]
+    else: # ダウンミックス・アップミックス (1回の行列積)
+        np.matmul(y[:n], mapping.matrix.astype(y.dtype, copy=False), out=out[:n])
+    out[n:] = 0 # 長さが足りない分は無音
+    return out
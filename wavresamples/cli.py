@@ -0,0 +1,217 @@
+"""GUIを使わずに変換を実行するコマンドラインインターフェースです。
+
+使用例:
+    python -m wavresamples in/ out/ --sr 44100 --bits 16 --jobs 8
+    python -m wavresamples drop/ out/ --watch   # drop/ に置かれたファイルを変換し続ける
+
+tkinter / tkinterdnd2 は一切読み込まないため、ディスプレイのない環境でも動作します。
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+
+def build_parser():
+    """コマンドライン引数のパーサーを作成します。
+
+    Returns:
+        argparse.ArgumentParser: 引数パーサー。
+    """
+    parser = argparse.ArgumentParser(
+        prog="wavresamples",
+        description="WAVファイルのサンプリング周波数・チャンネル数・ビット深度を一括変換します。",
+    )
+    parser.add_argument("input", help="変換するWAVファイル、またはWAVファイルを含むフォルダ")
+    parser.add_argument("output", nargs="?", default=None,
+                        help="変換後のファイルの保存先フォルダ (省略時はソース元に保存)")
+    parser.add_argument("--sr", default="44100",
+                        help="目標サンプリング周波数 (例: 44100, 44.1kHz) [既定: 44100]")
+    parser.add_argument("--bits", type=int, default=16, choices=[16, 8],
+                        help="目標ビット深度 [既定: 16]")
+    parser.add_argument("--channels", type=int, default=2,
+                        help="目標チャンネル数 [既定: 2]")
+    parser.add_argument("--channel-map", default="auto", metavar="MAP",
+                        help="チャンネルの対応。auto (そのまま・複製・平均・5.1/7.1chからステレオへのITUダウンミックス)、"
+                             "itu (ITUダウンミックス)、mix (全チャンネルの平均)、duplicate (複製)、"
+                             "または目標のチャンネルごとの係数の行列 (例: 0.5,0.5;0.5,0.5) [既定: auto]")
+    targets_group = parser.add_mutually_exclusive_group()
+    targets_group.add_argument("-t", "--target", action="append", default=None, metavar="SR/BITS",
+                               help="出力形式 (例: 22.05kHz/8)。複数指定すると1回の読み込みからすべての形式を書き出す "
+                                    "(指定時は --sr / --bits を無視)")
+    targets_group.add_argument("--profile", default=None,
+                               help="出力形式の組み合わせ (assets: 22.05kHz/8bit, 44.1kHz/16bit, 48kHz/16bit)")
+    parser.add_argument("--quality", default="hq", choices=["hq", "fast"],
+                        help="変換品質 (hq: マスター用の高品質, fast: プレビュー・プロキシ用の高速) [既定: hq]")
+    parser.add_argument("--dither", action="store_true",
+                        help="ビット深度を減らすときに TPDF ディザを加える (8bit への変換などで小さな音の歪みを抑える)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="並列に変換するワーカー数 [既定: CPUコア数]")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="サブフォルダも探索し、フォルダ構成を保って出力する")
+    streaming_group = parser.add_mutually_exclusive_group()
+    streaming_group.add_argument("--streaming", dest="streaming", action="store_const", const=True, default=None,
+                                 help="すべてのファイルをブロック単位のストリーミングで変換する")
+    streaming_group.add_argument("--no-streaming", dest="streaming", action="store_const", const=False,
+                                 help="ファイルサイズに関係なくファイル全体を読み込んで変換する")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="MB",
+                        help="同時に変換するファイルのメモリ使用量の上限 (MB)。上限に収まらないファイルは空きを待つ間に"
+                             "小さなファイルを先に変換し、上限に対して大きすぎるファイルはストリーミングで変換する [既定: 物理メモリの半分]")
+    parser.add_argument("--prefetch", type=int, default=None, metavar="N",
+                        help="ワーカーが変換している間に、次に変換するN個のファイルを先読みする (0で無効) [既定: ワーカー数]")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="入力フォルダを監視し続け、置かれたWAVファイルを書き込みの完了後に変換する (Ctrl+C で終了)。"
+                             "監視の開始時にあるファイルも変換する")
+    parser.add_argument("--watch-poll", action="store_true",
+                        help="inotify を使わずにポーリングで監視する (ネットワーク上のフォルダなど)")
+    parser.add_argument("--settle", type=float, default=None, metavar="SECONDS",
+                        help="監視中のファイルの最後の変更から、書き込みが完了したとみなすまでの秒数 [既定: 2]")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="前回の実行から変更のないファイルをスキップする (マニフェストに変換結果を記録)")
+    parser.add_argument("--manifest", default=None,
+                        help="差分変換のマニフェストのパス (--incremental を暗黙に有効化) "
+                             "[既定: 出力先フォルダの .wavresamples-manifest.json]")
+    parser.add_argument("--journal", default=None,
+                        help="処理状況を記録するジャーナルのパス。中断された実行を同じパスで再実行すると、"
+                             "変換済みのファイルをスキップして再開する")
+    parser.add_argument("--stats", default=None, metavar="PATH",
+                        help="ファイルごとの段階別の所要時間と読み書きしたバイト数を書き出す (拡張子 .csv ならCSV、それ以外はJSON)")
+    parser.add_argument("--profile-slowest", type=int, default=0, metavar="N",
+                        help="cProfile で計測し、所要時間の長い上位N件のプロファイルを書き出す")
+    parser.add_argument("--profile-dir", default="wavresamples-profiles",
+                        help="プロファイル (.prof) の保存先フォルダ [既定: wavresamples-profiles]")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="ファイルごとの結果を表示しない")
+    return parser
+
+
+def main(argv=None):
+    """コマンドラインから変換を実行します。
+
+    Args:
+        argv (list[str] | None): コマンドライン引数。Noneの場合は sys.argv を使用します。
+
+    Returns:
+        int: 終了コード (0: 全件成功, 1: エラーあり, 2: 引数エラー)。
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # 変換エンジンはオーディオ系ライブラリを読み込むため、引数の検証後にインポートする
+    from .core import parse_sample_rate, parse_target, subtype_for_bit_depth, TARGET_PROFILES, STATUS_DONE, STATUS_ERROR
+    from .batch import build_jobs, convert_files, watch_jobs
+    from .channels import parse_channel_map
+
+    try:
+        channel_map = parse_channel_map(args.channel_map)
+        if args.profile is not None:
+            if args.profile not in TARGET_PROFILES:
+                raise ValueError(f"不明なプロファイルです: {args.profile} (選択肢: {', '.join(TARGET_PROFILES)})")
+            targets = [target._replace(channels=args.channels) for target in TARGET_PROFILES[args.profile]]
+        elif args.target:
+            targets = [parse_target(text, args.channels) for text in args.target]
+        else:
+            targets = [(parse_sample_rate(args.sr), args.channels, subtype_for_bit_depth(args.bits))]
+    except ValueError as e:
+        parser.error(str(e))
+    target_sr, target_subtype = targets[0][0], targets[0][2] # チャンネル数は args.channels を使う
+    extra_targets = targets[1:]
+    if args.channels < 1:
+        parser.error("--channels には1以上の値を指定してください。")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs には1以上の値を指定してください。")
+    if args.profile_slowest < 0:
+        parser.error("--profile-slowest には0以上の値を指定してください。")
+    if args.memory_budget is not None and args.memory_budget < 1:
+        parser.error("--memory-budget には1以上の値を指定してください。")
+    if args.prefetch is not None and args.prefetch < 0:
+        parser.error("--prefetch には0以上の値を指定してください。")
+    if args.watch and not os.path.isdir(args.input):
+        parser.error("--watch には監視するフォルダを指定してください。")
+    if args.settle is not None and args.settle < 0:
+        parser.error("--settle には0以上の値を指定してください。")
+
+    counts = {"converted": 0, "skipped": 0, "errors": 0}
+
+    def _on_result(job, status, message):
+        if status == STATUS_DONE:
+            counts["skipped" if message and "スキップ" in message else "converted"] += 1
+        elif status == STATUS_ERROR:
+            counts["errors"] += 1
+        if not args.quiet or status == STATUS_ERROR:
+            print(f"{job.filepath}: {status}{(' - ' + message) if message else ''}", flush=True)
+
+    manifest = None
+    if args.incremental or args.manifest:
+        from .manifest import Manifest, DEFAULT_MANIFEST_FILENAME
+        manifest_path = args.manifest
+        if manifest_path is None:
+            if args.output is not None:
+                manifest_dir = args.output
+            elif os.path.isdir(args.input):
+                manifest_dir = args.input
+            else:
+                manifest_dir = os.path.dirname(os.path.abspath(args.input))
+            manifest_path = os.path.join(manifest_dir, DEFAULT_MANIFEST_FILENAME)
+        manifest = Manifest(manifest_path)
+
+    journal = None
+    if args.journal:
+        from .journal import JobJournal
+        journal = JobJournal(args.journal)
+        if journal.pending_count:
+            print(f"中断された実行を再開します (未完了 {journal.pending_count}件)。")
+            # 未完了のジョブは以下で改めて受け付けるため、古い記録は再開しない
+            for job_id, _job, _context in journal.pending_jobs():
+                journal.cancel(job_id)
+
+    stats = None
+    if args.stats or args.profile_slowest:
+        from .instrumentation import JobStatsReport
+        stats = JobStatsReport(profile_slowest=args.profile_slowest)
+
+    job_options = dict(recursive=args.recursive, streaming=args.streaming, extra_targets=extra_targets,
+                       quality=args.quality, dither=args.dither, channel_map=channel_map)
+    if args.watch:
+        watch_options = {"polling": args.watch_poll}
+        if args.settle is not None:
+            watch_options["settle"] = args.settle
+        jobs = watch_jobs(args.input, args.output, target_sr, args.channels, target_subtype, **job_options, **watch_options)
+    else:
+        jobs = build_jobs(args.input, args.output, target_sr, args.channels, target_subtype, **job_options)
+    results = None
+    try:
+        with contextlib.closing(jobs):
+            results = convert_files(jobs, max_workers=args.jobs, on_result=_on_result, manifest=manifest, journal=journal,
+                                    stats=stats, memory_budget=args.memory_budget * 1024 ** 2 if args.memory_budget else None,
+                                    prefetch=args.prefetch, collect_results=not args.watch)
+    except KeyboardInterrupt:
+        if not args.watch:
+            raise
+        print("フォルダの監視を終了しました。")
+    finally:
+        if journal is not None:
+            journal.close()
+
+    if results is not None and not results:
+        print("変換対象のWAVファイルが見つかりませんでした。", file=sys.stderr)
+        return 1
+
+    print(f"処理完了。{counts['converted']}個成功、{counts['errors']}個エラー、{counts['skipped']}個スキップ。")
+    if stats is not None and len(stats):
+        _report_stats(stats, args)
+    return 1 if counts["errors"] else 0
+
+
+def _report_stats(stats, args):
+    """計測結果の合計を表示し、指定されたファイルに書き出します。"""
+    summary = stats.summary()
+    total = sum(summary["stages"].values()) or 1.0
+    stages = ", ".join(f"{name} {seconds:.2f}秒 ({seconds / total:.0%})" for name, seconds in summary["stages"].items())
+    print(f"段階別の所要時間 (ワーカーの合計): {stages}")
+    print(f"読み込み {summary['bytes_read'] / (1024 * 1024):.1f}MB、書き出し {summary['bytes_written'] / (1024 * 1024):.1f}MB")
+    if args.stats:
+        stats.export(args.stats)
+        print(f"計測結果を書き出しました: {args.stats}")
+    for path in stats.dump_profiles(args.profile_dir):
+        print(f"プロファイルを書き出しました: {path}")
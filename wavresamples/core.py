@@ -0,0 +1,552 @@
+"""WAVファイル変換のコアロジックです。
+
+GUI (`WavResamples.py`) から切り離された、単一ファイルの変換処理と
+ワーカープロセスに渡すジョブ記述をまとめています。
+ここに置く関数はプロセスプールから呼び出されるため、すべてモジュールの
+トップレベルに定義し、引数・戻り値はpickle可能な値のみとしています。
+"""
+import contextlib
+import os
+import re
+from collections import namedtuple
+
+import soundfile as sf
+
+from .streaming import stream_resample_to_targets, STREAMING_MIN_FILE_SIZE
+from .resampler import DEFAULT_QUALITY_TIER, get_resample_plan, quality_for_tier
+from .channels import DEFAULT_CHANNEL_MAP, convert_channels, parse_channel_map, resolve_channel_map
+from .atomic import atomic_output, soundfile_format
+from .metadata import read_metadata, file_fingerprint
+from .pcmwav import MEMMAP_SUBTYPES, open_pcm_wav
+from .pipeline import WriteBehind
+from .quantize import SUBTYPE_BITS, dither_rng, quantize_float
+from .stages import NULL_TIMER
+
+# リサンプラー (soxr) は起動時間短縮のため、実際に変換する時点
+# (またはワーカーのウォームアップ時) に初めて読み込みます。
+
+
+# 処理結果のステータス文字列 (GUIの「状態」列にそのまま表示されます)
+STATUS_DONE = "処理済"
+STATUS_ERROR = "エラー"
+
+# 変換対象とするファイルの拡張子
+WAV_EXTENSIONS = (".wav", ".wave")
+
+# 目標ビット深度 (bit) と soundfile のサブタイプの対応
+# WAVの8bit PCMは符号なし (PCM_U8) のみ規定されており、PCM_S8 では書き出せない
+BIT_DEPTH_SUBTYPES = {16: "PCM_16", 8: "PCM_U8"}
+
+# 変換後のファイル名の末尾 (`build_output_filename` を参照)
+_OUTPUT_FILENAME_PATTERN = re.compile(r"_resampled_\d+Hz_\d+ch_\d+bit(\.[^.]*)?$", re.IGNORECASE)
+
+# 出力形式 (目標のサンプリング周波数, チャンネル数, ビット深度(サブタイプ)) の組
+ConversionTarget = namedtuple("ConversionTarget", ["sr", "channels", "subtype"])
+
+# 1回の読み込みからまとめて書き出す出力形式の組み合わせ (プロファイル名 -> 出力形式のタプル)
+TARGET_PROFILES = {
+    "assets": (
+        ConversionTarget(22050, 2, BIT_DEPTH_SUBTYPES[8]),
+        ConversionTarget(44100, 2, BIT_DEPTH_SUBTYPES[16]),
+        ConversionTarget(48000, 2, BIT_DEPTH_SUBTYPES[16]),
+    ),
+}
+
+# ワーカープロセスに渡す変換ジョブの記述。
+# 元ファイルのメタデータ (original_*) がNoneの場合は、ワーカー側で処理直前に取得します。
+# source_fingerprint はメタデータを取得した時点のファイルの指紋で、ワーカーは stat だけで
+# ファイルが書き換えられていないことを確認し、ヘッダーを読み直さずにメタデータを使います。
+# streaming がNoneの場合は、ファイルサイズに応じてストリーミング変換を自動選択します。
+# extra_targets には target_* に加えて書き出す出力形式 (ConversionTarget) を指定します。
+# 元ファイルの読み込みは出力形式の数に関係なく1回だけです。
+# quality は変換品質の段階 (`QUALITY_TIERS` のキー: "hq" はマスター用、"fast" はプレビュー用) です。
+# original_frames は元ファイルのフレーム数で、スケジューラーがメモリ使用量の見積もりに使います。
+# dither がTrueの場合は、ビット深度を減らす量子化の前に TPDF ディザを加えます (`wavresamples.quantize` を参照)。
+# channel_map はチャンネルの対応 (ダウンミックスのプリセット名か係数の行列、`wavresamples.channels` を参照) です。
+ResampleJob = namedtuple(
+    "ResampleJob",
+    ["filepath", "target_sr", "target_channels", "target_subtype", "output_dir",
+     "original_sr", "original_channels", "original_subtype", "streaming", "source_fingerprint", "extra_targets",
+     "quality", "original_frames", "dither", "channel_map"],
+    defaults=(None, None, None, None, None, (), DEFAULT_QUALITY_TIER, None, False, DEFAULT_CHANNEL_MAP),
+)
+
+
+def job_for_file(filepath, target_sr, target_channels, target_subtype, output_dir, metadata=None, streaming=None, extra_targets=(),
+                 quality=DEFAULT_QUALITY_TIER, dither=False, channel_map=DEFAULT_CHANNEL_MAP):
+    """変換ジョブを作成します。メタデータの記録があれば、指紋と一緒にジョブへ埋め込みます。
+
+    Args:
+        filepath (str): 処理対象のファイルパス。
+        target_sr (int): 目標のサンプリング周波数。
+        target_channels (int): 目標のチャンネル数。
+        target_subtype (str): 目標のビット深度(サブタイプ)。
+        output_dir (str): 出力先ディレクトリ。
+        metadata (AudioMetadata | None): 取得済みのメタデータの記録。
+        streaming (bool | None): ストリーミング変換の指定。
+        extra_targets (Iterable[ConversionTarget]): 同じ読み込みから追加で書き出す出力形式。
+        quality (str): 変換品質の段階 (`QUALITY_TIERS` のキー)。
+        dither (bool): Trueの場合、ビット深度を減らす量子化の前に TPDF ディザを加えます。
+        channel_map (str): チャンネルの対応 (`wavresamples.channels.parse_channel_map` を参照)。
+
+    Returns:
+        ResampleJob: 変換ジョブ。
+
+    Raises:
+        ValueError: 不明な変換品質の場合や、チャンネルの対応を解析できない場合。
+    """
+    quality_for_tier(quality) # 不明な段階はワーカーに渡す前にエラーにする
+    channel_map = parse_channel_map(channel_map)
+    extra_targets = tuple(ConversionTarget(*target) for target in extra_targets)
+    job = ResampleJob(filepath, target_sr, target_channels, target_subtype, output_dir,
+                      streaming=streaming, extra_targets=extra_targets, quality=quality, dither=bool(dither),
+                      channel_map=channel_map)
+    return job if metadata is None else job_with_metadata(job, metadata)
+
+
+def job_with_metadata(job, metadata):
+    """変換ジョブにメタデータの記録 (と指紋) を埋め込みます。
+
+    Args:
+        job (ResampleJob): 変換ジョブ。
+        metadata (AudioMetadata): メタデータの記録。
+
+    Returns:
+        ResampleJob: メタデータを埋め込んだ変換ジョブ。
+    """
+    return job._replace(original_sr=metadata.samplerate, original_channels=metadata.channels,
+                        original_subtype=metadata.subtype, original_frames=metadata.frames,
+                        source_fingerprint=metadata.fingerprint)
+
+
+def job_targets(job):
+    """変換ジョブのすべての出力形式を返します。
+
+    Args:
+        job (ResampleJob): 変換ジョブ。
+
+    Returns:
+        tuple[ConversionTarget, ...]: 出力形式 (先頭は target_* の出力形式)。
+    """
+    return (ConversionTarget(job.target_sr, job.target_channels, job.target_subtype),) + tuple(job.extra_targets)
+
+
+def is_wav_file(path):
+    """拡張子から変換対象のWAVファイルかどうかを判定します。
+
+    Args:
+        path (str): ファイルパス。
+
+    Returns:
+        bool: 拡張子が .wav または .wave の場合はTrue。
+    """
+    return path.lower().endswith(WAV_EXTENSIONS)
+
+
+def converts_by_blocks(filepath, original_sr, original_subtype, targets):
+    """リサンプリングが不要で、元ファイルをメモリマップで読み込める変換かどうかを判定します。
+
+    チャンネル数・ビット深度の変更だけの変換は、ファイル全体を float32 に変換せずに、
+    メモリマップからブロック単位で変換 (ストリーミング変換) します。
+
+    Args:
+        filepath (str): 元ファイルのパス。
+        original_sr (int): 元のサンプリング周波数。
+        original_subtype (str): 元のビット深度(サブタイプ)。
+        targets (Iterable[ConversionTarget]): 出力形式。
+
+    Returns:
+        bool: ブロック単位で変換する場合はTrue。
+    """
+    return (original_subtype in MEMMAP_SUBTYPES and is_wav_file(filepath)
+            and all(target.sr == original_sr for target in targets))
+
+
+def _keeps_channels(channels, channel_map):
+    """チャンネル数が同じ変換で、チャンネルの対応がそのまま (変換不要) かどうかを判定します。"""
+    try:
+        return resolve_channel_map(channels, channels, channel_map).kind == "identity"
+    except ValueError:
+        return False # 行列の形が合わない場合は変換時にエラーとして報告する
+
+
+def parse_sample_rate(text):
+    """サンプリング周波数の文字列を Hz 単位の整数に変換します。
+
+    "44.1 kHz" / "44100 Hz" のような単位付きの表記と、"44100" のような数値のみの表記を受け付けます。
+
+    Args:
+        text (str): サンプリング周波数の文字列。
+
+    Returns:
+        int: Hz単位のサンプリング周波数。
+
+    Raises:
+        ValueError: パースに失敗した場合や、値が0以下の場合。
+    """
+    try:
+        parts = text.split()
+        if len(parts) == 1 and parts[0].lower().endswith("khz"):
+            parts = [parts[0][:-3], "khz"]
+        elif len(parts) == 1 and parts[0].lower().endswith("hz"):
+            parts = [parts[0][:-2], "hz"]
+        value = float(parts[0])
+        unit = parts[1].lower() if len(parts) > 1 else "hz"
+
+        if unit == "khz":
+            sr_hz = int(round(value * 1000))
+        elif unit == "hz":
+            sr_hz = int(value)
+        else:
+            raise ValueError(f"無効な単位です: {parts[1]}")
+
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"目標サンプリング周波数の値 '{text}' をパースできませんでした。") from e
+
+    if sr_hz <= 0:
+        raise ValueError("目標サンプリング周波数は正の整数である必要があります。")
+    return sr_hz
+
+
+def subtype_for_bit_depth(bit_depth):
+    """目標ビット深度に対応する soundfile のサブタイプ文字列を返します。
+
+    Args:
+        bit_depth (int): 目標ビット深度 (16 または 8)。
+
+    Returns:
+        str: soundfileで利用可能なサブタイプ文字列 (例: "PCM_16")
+
+    Raises:
+        ValueError: 対応していないビット深度の場合。
+    """
+    try:
+        return BIT_DEPTH_SUBTYPES[int(bit_depth)]
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"無効なビット深度です: {bit_depth}") from e
+
+
+def parse_target(text, channels=2):
+    """出力形式の文字列 ("サンプリング周波数/ビット深度") を解析します。
+
+    例: "44.1kHz/16" -> ConversionTarget(44100, 2, "PCM_16")
+
+    Args:
+        text (str): 出力形式の文字列。ビット深度の "bit" は省略できます。
+        channels (int): 目標のチャンネル数。
+
+    Returns:
+        ConversionTarget: 出力形式。
+
+    Raises:
+        ValueError: 解析に失敗した場合。
+    """
+    sr_text, sep, bits_text = text.partition("/")
+    if not sep:
+        raise ValueError(f"出力形式 '{text}' は「サンプリング周波数/ビット深度」の形式で指定してください。")
+    bits_text = bits_text.strip().lower()
+    if bits_text.endswith("bit"):
+        bits_text = bits_text[:-3]
+    return ConversionTarget(parse_sample_rate(sr_text.strip()), channels, subtype_for_bit_depth(bits_text))
+
+
+def build_output_filename(filename, target_sr, target_channels, target_subtype):
+    """変換後のファイル名を生成します。
+
+    例: "sample.wav" -> "sample_resampled_44100Hz_2ch_16bit.wav"
+
+    Args:
+        filename (str): 元のファイル名。
+        target_sr (int): 目標のサンプリング周波数。
+        target_channels (int): 目標のチャンネル数。
+        target_subtype (str): 目標のビット深度(サブタイプ)。
+
+    Returns:
+        str: 変換後のファイル名。
+    """
+    base, ext = os.path.splitext(filename)
+    bit_depth_str = "16bit" if target_subtype == "PCM_16" else "8bit"
+    return f"{base}_resampled_{target_sr}Hz_{target_channels}ch_{bit_depth_str}{ext}" # ファイル名にビット深度も追加
+
+
+def is_output_filename(filename):
+    """`build_output_filename` で生成した変換後のファイル名かどうかを判定します。
+
+    Args:
+        filename (str): ファイル名。
+
+    Returns:
+        bool: 変換後のファイル名の場合はTrue。
+    """
+    return _OUTPUT_FILENAME_PATTERN.search(filename) is not None
+
+
+def job_output_path(job):
+    """変換ジョブの出力ファイル (target_* の出力形式) の絶対パスを返します。
+
+    Args:
+        job (ResampleJob): 変換ジョブ。
+
+    Returns:
+        str: 出力ファイルの絶対パス。
+    """
+    return job_output_paths(job)[0]
+
+
+def job_output_paths(job):
+    """変換ジョブのすべての出力ファイルの絶対パスを、`job_targets` と同じ順に返します。
+
+    Args:
+        job (ResampleJob): 変換ジョブ。
+
+    Returns:
+        list[str]: 出力ファイルの絶対パス。
+    """
+    filename = os.path.basename(job.filepath)
+    return [os.path.abspath(os.path.join(job.output_dir, build_output_filename(filename, *target)))
+            for target in job_targets(job)]
+
+
+def preload_audio_libraries():
+    """変換に使用するオーディオ系ライブラリを読み込みます。
+
+    ワーカーの起動直後に呼び出しておくと、最初の変換時の待ち時間をなくせます。
+    何度呼び出しても2回目以降はすぐに戻ります。
+
+    Returns:
+        int: 呼び出したプロセスのID。
+    """
+    import soxr # noqa: F401 (リサンプラーを読み込んでおく)
+    return os.getpid()
+
+
+def run_resample_job(job, timer=None):
+    """変換ジョブを1件実行します。プロセスプールのワーカーから呼び出されます。
+
+    Args:
+        job (ResampleJob): 変換ジョブの記述。
+        timer (StageTimer | None): 段階ごとの所要時間を計測する場合に指定します。
+
+    Returns:
+        tuple[str, str]: (処理結果のステータス文字列, 詳細メッセージ)
+    """
+    filename = os.path.basename(job.filepath)
+    original_sr = job.original_sr
+    original_channels = job.original_channels
+    original_subtype = job.original_subtype
+    if timer is None:
+        timer = NULL_TIMER
+
+    try:
+        # メタデータがない場合や、取得後にファイルが書き換えられた場合 (指紋の不一致) のみ
+        # ヘッダーを読み直す。指紋の確認は stat だけで済む
+        with timer.stage("probe"):
+            needs_probe = original_sr is None
+            if not needs_probe and job.source_fingerprint is not None:
+                needs_probe = file_fingerprint(job.filepath) != job.source_fingerprint
+            if needs_probe:
+                metadata = read_metadata(job.filepath)
+                original_sr = metadata.samplerate
+                original_channels = metadata.channels
+                original_subtype = metadata.subtype
+    except Exception as e:
+        return STATUS_ERROR, f"メタデータ読込エラー - {e}"
+
+    if not job.extra_targets:
+        return perform_single_resample(job.filepath, original_sr, original_channels, original_subtype,
+                                       job.target_sr, job.target_channels, job.target_subtype,
+                                       job.output_dir, filename, streaming=job.streaming, quality=job.quality,
+                                       timer=timer, dither=job.dither, channel_map=job.channel_map)
+
+    # 複数の出力形式の結果を1件の結果にまとめる (1つでも失敗すればエラー)
+    results = perform_multi_resample(job.filepath, original_sr, original_channels, original_subtype,
+                                     job_targets(job), job.output_dir, filename, streaming=job.streaming,
+                                     quality=job.quality, timer=timer, dither=job.dither,
+                                     channel_map=job.channel_map)
+    status = STATUS_ERROR if any(status == STATUS_ERROR for status, _message in results) else STATUS_DONE
+    return status, " / ".join(message for _status, message in results)
+
+
+def perform_single_resample(filepath, original_sr, original_channels, original_subtype, target_sr, target_channels, target_subtype, output_dir, filename, streaming=None,
+                            quality=DEFAULT_QUALITY_TIER, timer=None, dither=False, channel_map=DEFAULT_CHANNEL_MAP):
+    """単一ファイルのサンプリング周波数・チャンネル変換・ビット深度固定のロジックを実行します。
+
+    soundfileを使用してオーディオファイルを (frames, channels) 形式で読み込み、
+    リサンプリングとチャンネル変換を行い、指定されたビット深度で
+    新しいファイルとして書き出します。
+    変換が不要な場合はスキップします。
+    ストリーミングモードでは、ファイル全体を読み込まずにブロック単位で
+    変換します (`wavresamples.streaming` を参照)。
+
+    Args:
+        filepath (str): 処理対象のファイルパス。
+        original_sr (int): 元のサンプリング周波数。
+        original_channels (int): 元のチャンネル数。
+        original_subtype (str): 元のビット深度(サブタイプ)。
+        target_sr (int): 目標のサンプリング周波数。
+        target_channels (int): 目標のチャンネル数。
+        target_subtype (str): 目標のビット深度(サブタイプ)。
+        output_dir (str): 出力先ディレクトリ。
+        filename (str): 元のファイル名。
+        streaming (bool | None): Trueならストリーミングで変換します。
+            Noneの場合は `STREAMING_MIN_FILE_SIZE` 以上のファイルと、リサンプリングが不要な
+            PCM_16 / PCM_24 のWAVファイル (`converts_by_blocks`) のみストリーミングで変換します。
+        quality (str): 変換品質の段階 (`QUALITY_TIERS` のキー)。
+        timer (StageTimer | None): 段階ごとの所要時間を計測する場合に指定します。
+        dither (bool): Trueの場合、ビット深度を減らす量子化の前に TPDF ディザを加えます。
+        channel_map (str): チャンネルの対応 (`wavresamples.channels.parse_channel_map` を参照)。
+
+    Returns:
+        tuple[str, str]: (処理結果のステータス文字列, 詳細メッセージ)
+    """
+    return perform_multi_resample(filepath, original_sr, original_channels, original_subtype,
+                                  [ConversionTarget(target_sr, target_channels, target_subtype)],
+                                  output_dir, filename, streaming=streaming, quality=quality, timer=timer,
+                                  dither=dither, channel_map=channel_map)[0]
+
+
+def perform_multi_resample(filepath, original_sr, original_channels, original_subtype, targets, output_dir, filename, streaming=None,
+                           quality=DEFAULT_QUALITY_TIER, timer=None, dither=False, channel_map=DEFAULT_CHANNEL_MAP):
+    """1回の読み込みから、複数の出力形式のファイルを書き出します。
+
+    元ファイルの読み込み (デコード) は出力形式の数に関係なく1回だけです。
+    リサンプリング結果は目標サンプリング周波数ごとに、チャンネル変換結果は
+    (周波数, チャンネル数) ごとに1回だけ計算し、同じ組み合わせの出力形式で共有します。
+    元ファイルと同じ形式の出力形式はスキップします。
+
+    Args:
+        filepath (str): 処理対象のファイルパス。
+        original_sr (int): 元のサンプリング周波数。
+        original_channels (int): 元のチャンネル数。
+        original_subtype (str): 元のビット深度(サブタイプ)。
+        targets (Sequence[ConversionTarget]): 出力形式。
+        output_dir (str): 出力先ディレクトリ。
+        filename (str): 元のファイル名。
+        streaming (bool | None): ストリーミング変換の指定 (`perform_single_resample` を参照)。
+        quality (str): 変換品質の段階 (`QUALITY_TIERS` のキー)。
+        timer (StageTimer | None): 段階ごとの所要時間を計測する場合に指定します。
+        dither (bool): Trueの場合、ビット深度を減らす量子化の前に TPDF ディザを加えます。
+        channel_map (str): チャンネルの対応 (`wavresamples.channels.parse_channel_map` を参照)。
+
+    Returns:
+        list[tuple[str, str]]: 出力形式ごとの (処理結果のステータス文字列, 詳細メッセージ)。
+    """
+    if timer is None:
+        timer = NULL_TIMER
+    results = [None] * len(targets)
+    pending = [] # (出力形式の番号, 出力形式, 出力ファイル名, 出力パス)
+    for index, target in enumerate(targets):
+        # 1. スキップ判定: 全てのパラメータが目標と一致する場合、ファイル操作を行わずに処理を終了
+        if (original_sr == target.sr and original_channels == target.channels and original_subtype == target.subtype
+                and _keeps_channels(original_channels, channel_map)):
+            results[index] = (STATUS_DONE, f"スキップ: {filename} (既に目標設定と同一です)")
+            continue
+        output_filename = build_output_filename(filename, target.sr, target.channels, target.subtype)
+        pending.append((index, target, output_filename, os.path.join(output_dir, output_filename)))
+    if not pending:
+        return results
+
+    try:
+        # 出力先ディレクトリが存在しない場合は作成
+        if not os.path.exists(output_dir):
+            try:
+                os.makedirs(output_dir, exist_ok=True) # 複数ワーカーが同時に作成しても失敗しないようにする
+                print(f"作成された出力ディレクトリ: {output_dir}")
+            except OSError as ose:
+                error_msg = f"エラー: 出力ディレクトリの作成に失敗しました ({output_dir}) - {ose}"
+                print(error_msg)
+                for index, _target, _name, _path in pending:
+                    results[index] = (STATUS_ERROR, error_msg)
+                return results
+
+        if streaming is None:
+            streaming = (os.path.getsize(filepath) >= STREAMING_MIN_FILE_SIZE
+                         or converts_by_blocks(filepath, original_sr, original_subtype,
+                                               [target for _index, target, _name, _path in pending]))
+        if streaming:
+            # 長いファイルはブロック単位で変換し、ピークメモリ使用量を一定に保つ
+            # リサンプリングが不要なPCMのWAVファイルは、メモリマップからブロックごとに変換するだけで済む
+            stream_resample_to_targets(filepath, [(path, target.sr, target.channels, target.subtype)
+                                                  for _index, target, _name, path in pending],
+                                       quality=quality, timer=timer, dither=dither, channel_map=channel_map)
+            timer.add_read(filepath)
+            for index, _target, output_filename, output_path in pending:
+                timer.add_written(output_path)
+                results[index] = (STATUS_DONE, f"変換成功: {output_filename}")
+            return results
+
+        # 2. 変換処理: スキップされなかった場合は、何らかの変換が必要
+        # (frames, channels) 形式の float32 として読み込む。PCM_16 / PCM_24 のWAVファイルはメモリマップから
+        # 直接変換し、それ以外は soundfile で読み込む (どちらも値は同じ)。
+        # 以降もフレーム優先のまま処理し、転置や np.vstack による余分なコピーを作らない
+        with timer.stage("decode"):
+            reader = open_pcm_wav(filepath)
+            if reader is not None:
+                with reader:
+                    y, file_sr = reader.read(), reader.samplerate
+            else:
+                y, file_sr = sf.read(filepath, dtype="float32", always_2d=True)
+        timer.add_read(filepath)
+
+        def _write_target(index, data, target, output_filename, output_path):
+            # 一時ファイルに書き出してから置き換え、中断されても途中までのファイルを残さない
+            # 書き出しの失敗はその出力形式だけのエラーとし、残りの出力形式の書き出しは続ける
+            try:
+                with atomic_output(output_path) as tmp_path:
+                    sf.write(tmp_path, data, target.sr, subtype=target.subtype, format=soundfile_format(output_path))
+                timer.add_written(output_path)
+                results[index] = (STATUS_DONE, f"変換成功: {output_filename}")
+            except Exception as e:
+                print(f"エラー: {filename} の変換に失敗 ({output_filename}) - {e}")
+                results[index] = (STATUS_ERROR, str(e))
+
+        # 同じ周波数の出力形式が続くように並べ、使い終わった中間結果をすぐに解放する
+        pending.sort(key=lambda item: (item[1].sr, item[1].channels))
+        resampled_sr = None
+        resampled = None
+        converted = {} # チャンネル数 -> チャンネル変換結果 (現在の周波数のもの)
+        # 複数の出力形式がある場合は、書き出しを別スレッドで行い、次の形式のリサンプリングと重ねる
+        # (書き出し待ちは1件までとし、保持する中間結果が増えすぎないようにする)
+        overlap = WriteBehind(depth=1, timer=timer) if len(pending) > 1 else contextlib.nullcontext()
+        with overlap as write_behind:
+            for index, target, output_filename, output_path in pending:
+                if target.sr != resampled_sr:
+                    # サンプリング周波数変換
+                    # 同じ周波数比・品質のフィルタは設計済みのものを再利用する (既定は librosa.resample と同じ soxr HQ フィルタ)
+                    resampled_sr = target.sr
+                    resampled, output_frames = y, y.shape[0]
+                    if file_sr != target.sr:
+                        plan = get_resample_plan(file_sr, target.sr, quality_for_tier(quality))
+                        output_frames = plan.output_length(y.shape[0])
+                        with timer.stage("resample"):
+                            resampled = plan.resample(y, fix_length=False) # 長さの調整はチャンネル変換と同時に行う
+                    converted = {}
+
+                # チャンネル数変換 (モノラルからステレオへの複製・ダウンミックスなど) と長さの調整
+                # 出力用のバッファを1回だけ確保し、不要な場合はコピーしない
+                if target.channels not in converted:
+                    with timer.stage("channels"):
+                        converted[target.channels] = convert_channels(resampled, target.channels, frames=output_frames,
+                                                                      channel_map=channel_map)
+
+                data = converted[target.channels]
+                if dither and target.subtype in SUBTYPE_BITS:
+                    # TPDF ディザを加えて量子化する (ディザなしの場合は書き出し時に libsndfile が量子化する)
+                    with timer.stage("quantize"):
+                        data = quantize_float(data, target.subtype,
+                                              dither_rng(filename, target.sr, target.channels, target.subtype))
+
+                # 3. ファイル書き出し
+                if write_behind is not None:
+                    write_behind.submit(_write_target, index, data, target, output_filename, output_path)
+                else:
+                    with timer.stage("write"):
+                        _write_target(index, data, target, output_filename, output_path)
+        return results
+    except Exception as e:
+        error_msg = f"エラー: {filename} の変換に失敗 - {e}"
+        print(error_msg)
+        for index, _target, _name, _path in pending:
+            if results[index] is None:
+                results[index] = (STATUS_ERROR, str(e))
+        return results
@@ -0,0 +1,150 @@
+"""変換ジョブを並列に実行するエンジンです。
+
+リサンプリング処理はGILを長時間保持するため、既定ではプロセスプールで
+ジョブを実行し、CPUコア数に応じてスループットが伸びるようにしています。
+"""
+import os
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .core import run_resample_job, preload_audio_libraries, STATUS_ERROR
+from .instrumentation import run_instrumented_job
+
+
+def default_worker_count():
+    """既定のワーカー数（CPUコア数）を返します。
+
+    Returns:
+        int: 1以上のワーカー数。
+    """
+    return max(1, os.cpu_count() or 1)
+
+
+def _ignore_interrupt():
+    """ワーカープロセスで Ctrl+C (SIGINT) を無視します。中断は親プロセスがプールを終了して行います。"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class ResampleEngine:
+    """変換ジョブをワーカープール（プロセスまたはスレッド）で実行するエンジンです。
+
+    同時に実行中のジョブ数を `max_workers` 個までに制限するため、
+    `submit` は空きワーカーができるまでブロックします。これにより、
+    呼び出し側のタスクキューに残ったジョブを終了時に安全に破棄できます。
+    """
+
+    def __init__(self, max_workers=None, use_processes=True, instrument=False, profile=False):
+        """エンジンを初期化します。ワーカーは最初のジョブ投入時に起動されます。
+
+        Args:
+            max_workers (int | None): ワーカー数。Noneの場合はCPUコア数。
+            use_processes (bool): Trueならプロセスプール、Falseならスレッドプールを使用します。
+            instrument (bool): Trueの場合、ジョブごとに段階別の所要時間などを計測し、
+                コールバックに計測結果 (`JobStats`) も渡します。
+            profile (bool): Trueの場合、計測に加えて cProfile でもプロファイルします (`instrument` を暗黙に有効化)。
+        """
+        self.max_workers = max_workers if max_workers else default_worker_count()
+        self.use_processes = use_processes
+        self.instrument = instrument or profile
+        self.profile = profile
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def _get_executor(self):
+        """ワーカープールを返します。未作成であれば作成します。"""
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    # Tkのスレッドを抱えたプロセスをforkしないよう、全OSでspawnを使用する
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"),
+                                                         initializer=_ignore_interrupt)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def warm_up(self):
+        """ワーカーを起動し、オーディオ系ライブラリを事前に読み込ませます。
+
+        アプリケーションの起動後にバックグラウンドで呼び出すことで、
+        最初の変換時にライブラリの読み込みを待たずに済みます。
+        ウォームアップ用のタスクは同時実行数の制限に含まれません。
+        """
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(preload_audio_libraries)
+
+    @property
+    def in_flight(self):
+        """実行中（投入済みで未完了）のジョブ数を返します。"""
+        return self._in_flight
+
+    def submit(self, job, callback, on_start=None, timeout=None):
+        """ジョブを投入します。完了時に `callback(status, message)` が呼び出されます。
+
+        計測を有効にしたエンジンでは `callback(status, message, stats)` が呼び出されます
+        (`stats` は `JobStats`。ワーカーの異常終了時はNone)。
+
+        コールバックはワーカープールの管理スレッドから呼び出されるため、
+        GUIを直接操作せず、キューなどを経由して結果を受け渡してください。
+
+        Args:
+            job (ResampleJob): 変換ジョブの記述。
+            callback (callable): 結果を受け取る関数。
+            on_start (callable | None): 空きワーカーを確保し、ジョブを投入する直前に呼び出される関数。
+            timeout (float | None): 空きワーカーを待つ最大秒数。
+
+        Returns:
+            bool: 投入できた場合はTrue、タイムアウトした場合はFalse。
+        """
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        with self._lock:
+            self._in_flight += 1
+        if on_start is not None:
+            on_start()
+
+        def _on_done(future):
+            stats = None
+            try:
+                if self.instrument:
+                    status, message, stats = future.result()
+                else:
+                    status, message = future.result()
+            except Exception as e: # ワーカープロセスの異常終了など
+                status, message = STATUS_ERROR, str(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._slots.release()
+            if self.instrument:
+                callback(status, message, stats)
+            else:
+                callback(status, message)
+
+        try:
+            if self.instrument:
+                future = self._get_executor().submit(run_instrumented_job, job, self.profile)
+            else:
+                future = self._get_executor().submit(run_resample_job, job)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(_on_done)
+        return True
+
+    def shutdown(self, wait=True):
+        """ワーカープールを停止します。
+
+        Args:
+            wait (bool): 実行中のジョブの完了を待つ場合はTrue。
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
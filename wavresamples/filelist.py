@@ -0,0 +1,309 @@
+"""GUIのファイルリストの内容を保持するストアです。
+
+Treeview に全行を登録すると、数万行を超えたあたりから
+スクロールや `get_children()`・全削除が極端に遅くなります。
+ここでは全行を `__slots__` を使った小さなレコードとしてPython側に保持し、
+並べ替え・絞り込みもこのストア上で行います。
+GUIは `view_slice` で画面に見えている範囲の行だけを取り出して Treeview に表示します。
+
+tkinter には依存しないため、GUIなしでも利用・検証できます。
+"""
+import bisect
+
+
+# 表示列 (Treeview の列IDと同じ)
+COLUMNS = ("filename", "filepath", "samplerate", "channels", "bitdepth", "status")
+# 数値として並べ替える列
+NUMERIC_COLUMNS = frozenset(("samplerate", "channels"))
+
+
+class FileEntry:
+    """ファイルリストの1行分のレコードです。
+
+    Attributes:
+        key (int): ストア内で一意なアイテムID。
+        filename (str): ファイル名。
+        filepath (str): ファイルの絶対パス。
+        samplerate (int | None): 元のサンプリング周波数。
+        channels (int | None): 元のチャンネル数。
+        subtype (str | None): 元のビット深度(サブタイプ)。
+        status (str): 処理状態。
+    """
+
+    __slots__ = ("key", "filename", "filepath", "samplerate", "channels", "subtype", "status")
+
+    def __init__(self, key, filename, filepath, samplerate, channels, subtype, status=""):
+        self.key = key
+        self.filename = filename
+        self.filepath = filepath
+        self.samplerate = samplerate
+        self.channels = channels
+        self.subtype = subtype
+        self.status = status
+
+    def values(self):
+        """Treeview の各列に表示する値を返します。
+
+        Returns:
+            tuple: `COLUMNS` の順の表示値。
+        """
+        return (self.filename, self.filepath,
+                "" if self.samplerate is None else self.samplerate,
+                "" if self.channels is None else self.channels,
+                self.subtype or "", self.status)
+
+    def column_value(self, column):
+        """列IDに対応する値を返します。"""
+        if column == "bitdepth":
+            return self.subtype
+        return getattr(self, column)
+
+
+def _sort_value(entry, column):
+    """並べ替えに使う値を返します。値のない行は常に先頭 (昇順時) に並べます。"""
+    value = entry.column_value(column)
+    if column in NUMERIC_COLUMNS:
+        return (0, -1) if value is None else (1, value)
+    return (0, "") if not value else (1, str(value).casefold())
+
+
+class FileListStore:
+    """ファイルリストの全行と、並べ替え・絞り込み後の表示順を保持します。
+
+    行は追加順に `key` (1から始まる整数) で識別します。
+    表示順 (ビュー) は並べ替え・絞り込みの条件を満たす行のキーのリストで、
+    並べ替え中に追加された行は二分探索で正しい位置に挿入します。
+    """
+
+    def __init__(self):
+        self._entries = {} # key -> FileEntry (追加順)
+        self._key_by_path = {} # ファイルの絶対パス -> key (重複チェック用の索引)
+        self._next_key = 1
+        self._sort_column = None
+        self._sort_reverse = False
+        self._filter_text = ""
+        self._view = [] # 表示順 (昇順) のキー
+        self._view_sort_values = [] # 並べ替え中のみ、_view と同じ順の (並べ替え値, key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """キーに対応するレコードを返します。
+
+        Args:
+            key (int): アイテムID。
+
+        Returns:
+            FileEntry | None: レコード。削除済みの場合はNone。
+        """
+        return self._entries.get(key)
+
+    def find(self, filepath_abs):
+        """ファイルの絶対パスに対応するアイテムIDを返します。
+
+        Args:
+            filepath_abs (str): ファイルの絶対パス。
+
+        Returns:
+            int | None: アイテムID。リストにない場合はNone。
+        """
+        return self._key_by_path.get(filepath_abs)
+
+    def keys(self):
+        """すべての行のアイテムIDを追加順に返します。"""
+        return list(self._entries)
+
+    @property
+    def sort_column(self):
+        """並べ替えの基準の列ID。並べ替えていない場合はNone。"""
+        return self._sort_column
+
+    @property
+    def sort_reverse(self):
+        """降順で並べ替えているか。"""
+        return self._sort_reverse
+
+    @property
+    def filter_text(self):
+        """絞り込みの文字列。"""
+        return self._filter_text
+
+    def _matches(self, entry):
+        if not self._filter_text:
+            return True
+        return self._filter_text in entry.filename.casefold() or self._filter_text in entry.filepath.casefold()
+
+    def add(self, filepath_abs, filename, samplerate=None, channels=None, subtype=None, status=""):
+        """行を追加します。
+
+        Args:
+            filepath_abs (str): ファイルの絶対パス。
+            filename (str): ファイル名。
+            samplerate (int | None): 元のサンプリング周波数。
+            channels (int | None): 元のチャンネル数。
+            subtype (str | None): 元のビット深度(サブタイプ)。
+            status (str): 処理状態。
+
+        Returns:
+            int: 追加した行のアイテムID。
+        """
+        key = self._next_key
+        self._next_key += 1
+        entry = FileEntry(key, filename, filepath_abs, samplerate, channels, subtype, status)
+        self._entries[key] = entry
+        self._key_by_path[filepath_abs] = key
+        if self._matches(entry):
+            if self._sort_column is None:
+                self._view.append(key)
+            else:
+                sort_value = (_sort_value(entry, self._sort_column), key)
+                index = bisect.bisect_right(self._view_sort_values, sort_value)
+                self._view_sort_values.insert(index, sort_value)
+                self._view.insert(index, key)
+        return key
+
+    def set_status(self, key, status):
+        """行の処理状態を更新します。
+
+        並べ替えの基準が「状態」列の場合でも、表示中の行が入れ替わらないよう、
+        並び順は次に並べ替えるまで変更しません。
+
+        Args:
+            key (int): アイテムID。
+            status (str): 処理状態。
+
+        Returns:
+            bool: 行が存在した場合はTrue。
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        entry.status = status
+        return True
+
+    def remove(self, keys):
+        """行をまとめて削除します。
+
+        Args:
+            keys (Iterable[int]): 削除するアイテムID。
+
+        Returns:
+            list[FileEntry]: 削除したレコード。
+        """
+        removed = []
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._key_by_path.pop(entry.filepath, None)
+                removed.append(entry)
+        if removed:
+            # ビューは一度の走査でまとめて詰める
+            if self._sort_column is None:
+                self._view = [key for key in self._view if key in self._entries]
+            else:
+                kept = [i for i, key in enumerate(self._view) if key in self._entries]
+                self._view = [self._view[i] for i in kept]
+                self._view_sort_values = [self._view_sort_values[i] for i in kept]
+        return removed
+
+    def clear(self):
+        """すべての行を削除します。並べ替え・絞り込みの条件は維持します。"""
+        self._entries.clear()
+        self._key_by_path.clear()
+        self._view = []
+        self._view_sort_values = []
+
+    def _rebuild_view(self):
+        entries = [entry for entry in self._entries.values() if self._matches(entry)]
+        if self._sort_column is None:
+            self._view = [entry.key for entry in entries]
+            self._view_sort_values = []
+        else:
+            self._view_sort_values = sorted((_sort_value(entry, self._sort_column), entry.key) for entry in entries)
+            self._view = [key for _value, key in self._view_sort_values]
+
+    def sort_by(self, column, reverse=False):
+        """表示順を列の値で並べ替えます。
+
+        Args:
+            column (str | None): 列ID。Noneの場合は追加順に戻します。
+            reverse (bool): 降順にする場合はTrue。
+
+        Raises:
+            ValueError: 不明な列IDの場合。
+        """
+        if column is not None and column not in COLUMNS:
+            raise ValueError(f"不明な列です: {column}")
+        self._sort_column = column
+        self._sort_reverse = bool(reverse) and column is not None
+        self._rebuild_view()
+
+    def set_filter(self, text):
+        """ファイル名またはパスに文字列を含む行だけを表示します (大文字・小文字は区別しません)。
+
+        Args:
+            text (str): 絞り込みの文字列。空文字列の場合はすべての行を表示します。
+        """
+        text = (text or "").strip().casefold()
+        if text == self._filter_text:
+            return
+        self._filter_text = text
+        self._rebuild_view()
+
+    def view_length(self):
+        """表示対象の行数を返します。"""
+        return len(self._view)
+
+    def view_slice(self, start, stop):
+        """表示順で `start` 行目から `stop` 行目の手前までのレコードを返します。
+
+        Args:
+            start (int): 先頭の行番号 (0始まり)。
+            stop (int): 末尾の行番号 (この行は含まない)。
+
+        Returns:
+            list[FileEntry]: レコードのリスト。
+        """
+        n = len(self._view)
+        start = max(0, start)
+        stop = min(n, stop)
+        if start >= stop:
+            return []
+        if self._sort_reverse:
+            keys = self._view[n - start - 1:n - stop - 1 if n - stop > 0 else None:-1]
+        else:
+            keys = self._view[start:stop]
+        return [self._entries[key] for key in keys]
+
+    def view_keys(self):
+        """表示対象のすべての行のアイテムIDを表示順に返します。"""
+        return self._view[::-1] if self._sort_reverse else list(self._view)
+
+    def view_index(self, key):
+        """アイテムIDの表示順での行番号を返します。
+
+        Args:
+            key (int): アイテムID。
+
+        Returns:
+            int | None: 行番号。表示対象でない場合はNone。
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._sort_column is None:
+            # 追加順のビューはキーの昇順に並んでいる
+            index = bisect.bisect_left(self._view, key)
+        else:
+            index = bisect.bisect_left(self._view_sort_values, (_sort_value(entry, self._sort_column), key))
+        if index >= len(self._view) or self._view[index] != key:
+            # 「状態」列で並べ替えた後に状態が変わった行は、並べ替え値が古いため線形に探す
+            try:
+                index = self._view.index(key)
+            except ValueError:
+                return None
+        return len(self._view) - index - 1 if self._sort_reverse else index
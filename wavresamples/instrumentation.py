@@ -0,0 +1,199 @@
+"""変換処理の計測 (ファイルごとの段階別の所要時間・読み書きしたバイト数・プロファイル) です。
+
+一括変換が遅いときに、時間が読み込み (decode)・リサンプリング (resample)・
+チャンネル変換 (channels)・量子化 (quantize)・書き出し (write) のどこで掛かっているかを調べるためのものです。
+計測は任意で、`ResampleEngine(instrument=True)` のときだけワーカーで
+`run_instrumented_job` が使われ、ファイルごとの `JobStats` が結果と一緒に返されます。
+
+`profile=True` を指定すると、各ジョブを `cProfile` で計測し、その統計を結果と一緒に返します。
+`JobStatsReport` は所要時間の長い上位のファイルのプロファイルだけを保持し、
+`dump_profiles` で `pstats` / snakeviz などで読める `.prof` ファイルに書き出します。
+"""
+import cProfile
+import csv
+import heapq
+import itertools
+import json
+import marshal
+import os
+import threading
+import time
+from collections import namedtuple
+
+from .core import run_resample_job
+from .stages import STAGES, StageTimer
+
+
+# 1ファイル分の計測結果
+# stages は段階 -> 秒の辞書、profile は cProfile の統計を marshal したもの (プロファイルしない場合はNone)
+JobStats = namedtuple("JobStats",
+                      ["filepath", "status", "wall_seconds", "stages", "bytes_read", "bytes_written", "profile"])
+
+
+def run_instrumented_job(job, profile=False):
+    """変換ジョブを計測しながら1件実行します。プロセスプールのワーカーから呼び出されます。
+
+    Args:
+        job (ResampleJob): 変換ジョブの記述。
+        profile (bool): Trueの場合、cProfile でも計測します。
+
+    Returns:
+        tuple[str, str, JobStats]: (処理結果のステータス文字列, 詳細メッセージ, 計測結果)
+    """
+    timer = StageTimer()
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        status, message = run_resample_job(job, timer=timer)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    wall = time.perf_counter() - start
+    profile_data = None
+    if profiler is not None:
+        profiler.create_stats()
+        profile_data = marshal.dumps(profiler.stats)
+    stats = JobStats(job.filepath, status, wall, dict(timer.times), timer.bytes_read, timer.bytes_written, profile_data)
+    return status, message, stats
+
+
+class JobStatsReport:
+    """ファイルごとの計測結果を集計し、CSV / JSON に書き出します。複数のスレッドから呼び出せます。
+
+    Args:
+        profile_slowest (int): プロファイルを保持する、所要時間の長い上位のファイル数。
+            0の場合はプロファイルを保持しません (ワーカーでのプロファイルも不要です)。
+    """
+
+    def __init__(self, profile_slowest=0):
+        self.profile_slowest = max(0, int(profile_slowest))
+        self._lock = threading.Lock()
+        self._records = []
+        self._profiles = [] # 所要時間の短い順のヒープ: (所要時間, 連番, ファイルパス, プロファイル)
+        self._counter = itertools.count()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
+
+    def record(self, stats):
+        """1ファイル分の計測結果を追加します。
+
+        Args:
+            stats (JobStats): 計測結果。
+        """
+        with self._lock:
+            self._records.append(stats._replace(profile=None))
+            if stats.profile is None or not self.profile_slowest:
+                return
+            item = (stats.wall_seconds, next(self._counter), stats.filepath, stats.profile)
+            if len(self._profiles) < self.profile_slowest:
+                heapq.heappush(self._profiles, item)
+            elif item[0] > self._profiles[0][0]:
+                heapq.heapreplace(self._profiles, item)
+
+    def records(self):
+        """計測結果を記録順に返します (プロファイルは含みません)。
+
+        Returns:
+            list[JobStats]: 計測結果のリスト。
+        """
+        with self._lock:
+            return list(self._records)
+
+    def summary(self):
+        """全ファイルの合計を返します。
+
+        段階ごとの時間は各ワーカーの処理時間の合計のため、並列に変換した場合は
+        経過時間より長くなります。
+
+        Returns:
+            dict: files / wall_seconds / stages (段階 -> 秒) / bytes_read / bytes_written。
+        """
+        records = self.records()
+        stages = dict.fromkeys(STAGES, 0.0)
+        for stats in records:
+            for name, seconds in stats.stages.items():
+                stages[name] = stages.get(name, 0.0) + seconds
+        return {
+            "files": len(records),
+            "wall_seconds": sum(stats.wall_seconds for stats in records),
+            "stages": stages,
+            "bytes_read": sum(stats.bytes_read for stats in records),
+            "bytes_written": sum(stats.bytes_written for stats in records),
+        }
+
+    def slowest(self, n):
+        """所要時間の長い順に `n` 件の計測結果を返します。
+
+        Args:
+            n (int): 件数。
+
+        Returns:
+            list[JobStats]: 計測結果のリスト。
+        """
+        return heapq.nlargest(n, self.records(), key=lambda stats: stats.wall_seconds)
+
+    def write_csv(self, path):
+        """ファイルごとの計測結果をCSVで書き出します。
+
+        Args:
+            path (str): 書き出し先のパス。
+        """
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["filepath", "status", "wall_seconds", *STAGES, "bytes_read", "bytes_written"])
+            for stats in self.records():
+                writer.writerow([stats.filepath, stats.status, f"{stats.wall_seconds:.6f}",
+                                 *(f"{stats.stages.get(name, 0.0):.6f}" for name in STAGES),
+                                 stats.bytes_read, stats.bytes_written])
+
+    def write_json(self, path):
+        """合計とファイルごとの計測結果をJSONで書き出します。
+
+        Args:
+            path (str): 書き出し先のパス。
+        """
+        files = [stats._asdict() for stats in self.records()]
+        for record in files:
+            del record["profile"]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "files": files}, f, ensure_ascii=False, indent=2)
+
+    def export(self, path):
+        """拡張子に応じて、CSV (.csv) またはJSON (それ以外) で書き出します。
+
+        Args:
+            path (str): 書き出し先のパス。
+        """
+        if os.path.splitext(path)[1].lower() == ".csv":
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+    def dump_profiles(self, directory):
+        """保持している上位のファイルのプロファイルを `.prof` ファイルに書き出します。
+
+        ファイル名は所要時間の長い順の順位と元のファイル名です (例: `01_voice.wav.prof`)。
+
+        Args:
+            directory (str): 書き出し先のディレクトリ。
+
+        Returns:
+            list[str]: 書き出したファイルのパス (所要時間の長い順)。
+        """
+        with self._lock:
+            profiles = sorted(self._profiles, reverse=True)
+        if not profiles:
+            return []
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for rank, (_wall, _seq, filepath, data) in enumerate(profiles, start=1):
+            path = os.path.join(directory, f"{rank:02d}_{os.path.basename(filepath)}.prof")
+            # cProfile.Profile.dump_stats と同じ形式 (marshal した統計) で書き出す
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+        return paths
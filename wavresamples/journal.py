@@ -0,0 +1,210 @@
+"""変換ジョブのジャーナル (追記専用の処理記録) です。
+
+ジョブを受け付けた時 (queued)・ワーカーに投入した時 (started)・完了した時 (done) に
+1行ずつJSONで追記します。アプリケーションが強制終了・クラッシュした場合でも、
+次回の起動時にジャーナルを読み直せば、完了していないジョブだけを再開できます。
+出力ファイルは一時ファイルに書き出してから置き換えるため (`wavresamples.atomic` を参照)、
+処理中だったジョブを最初からやり直しても、途中までのWAVファイルが残ることはありません。
+
+完了済みのジョブは、受け付けた時点の元ファイルの指紋 (`wavresamples.metadata.FileFingerprint`) と
+一緒に記録します。再開するまでに元ファイルが書き換えられた場合は、完了済みとはみなさずに変換し直します。
+
+書き込み中に強制終了されて最終行が途中で切れている場合、その行は読み飛ばします。
+"""
+import json
+import os
+import threading
+
+from .core import ConversionTarget, ResampleJob, STATUS_DONE, job_output_paths, job_targets
+from .metadata import FileFingerprint, file_fingerprint
+
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".wavresamples", "journal.jsonl")
+
+OP_QUEUED = "queued"
+OP_STARTED = "started"
+OP_DONE = "done"
+OP_CANCELLED = "cancelled"
+
+
+def _job_to_record(job):
+    return job._asdict()
+
+
+def _job_from_record(record):
+    job = ResampleJob(**record)
+    if job.source_fingerprint is not None:
+        job = job._replace(source_fingerprint=FileFingerprint(*job.source_fingerprint))
+    return job._replace(extra_targets=tuple(ConversionTarget(*target) for target in job.extra_targets))
+
+
+def _job_key(job):
+    """同じ変換かどうかを判定するためのキー (元ファイル, 出力ファイル, 出力形式, 変換品質, ディザ, チャンネルの対応) を返します。"""
+    return (os.path.abspath(job.filepath), tuple(job_output_paths(job)), job_targets(job), job.quality, job.dither,
+            job.channel_map)
+
+
+def _source_fingerprint(job):
+    """元ファイルの現在の指紋を返します。ファイルがない場合はNoneです。"""
+    try:
+        return file_fingerprint(job.filepath)
+    except OSError:
+        return None
+
+
+class JobJournal:
+    """変換ジョブのジャーナルです。複数のスレッドから呼び出せます。
+
+    既存のジャーナルファイルがあれば、開いた時点で読み直して
+    未完了のジョブ (`pending_jobs`) と完了済みのジョブを復元します。
+
+    Args:
+        path (str): ジャーナルファイルのパス。
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self._pending = {} # ジョブID -> (ResampleJob, 付加情報, 受け付けた時点の元ファイルの指紋)
+        self._done_keys = {} # 完了済みのジョブのキー -> 受け付けた時点の元ファイルの指紋
+        self._next_id = 1
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _replay(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+                op = record["op"]
+                job_id = record["id"]
+            except (ValueError, KeyError, TypeError):
+                continue # 強制終了で途中まで書かれた行
+            self._next_id = max(self._next_id, job_id + 1)
+            if op == OP_QUEUED:
+                try:
+                    job = _job_from_record(record["job"])
+                except (KeyError, TypeError):
+                    continue
+                fingerprint = record.get("fingerprint")
+                self._pending[job_id] = (job, record.get("context"),
+                                         FileFingerprint(*fingerprint) if fingerprint else None)
+            elif op in (OP_DONE, OP_CANCELLED):
+                entry = self._pending.pop(job_id, None)
+                if entry is not None and op == OP_DONE and record.get("status") == STATUS_DONE:
+                    self._done_keys[_job_key(entry[0])] = entry[2]
+
+    def _append(self, record):
+        # 1件ごとに書き出し、プロセスが強制終了されても記録が失われないようにする
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    @property
+    def pending_count(self):
+        """未完了のジョブの件数。"""
+        with self._lock:
+            return len(self._pending)
+
+    def pending_jobs(self):
+        """未完了のジョブを受け付け順に返します。
+
+        Returns:
+            list[tuple[int, ResampleJob, object]]: (ジョブID, ジョブ, 付加情報) のリスト。
+        """
+        with self._lock:
+            return [(job_id, job, context) for job_id, (job, context, _fingerprint) in sorted(self._pending.items())]
+
+    def is_done(self, job):
+        """同じ変換がこのジャーナルで既に完了しているかを返します。
+
+        完了を記録したときから元ファイルが書き換えられている場合 (指紋が違う場合) はFalseです。
+
+        Args:
+            job (ResampleJob): 変換ジョブ。
+
+        Returns:
+            bool: 完了済みの場合はTrue。
+        """
+        fingerprint = _source_fingerprint(job)
+        if fingerprint is None:
+            return False
+        with self._lock:
+            return self._done_keys.get(_job_key(job)) == fingerprint
+
+    def queued(self, job, context=None):
+        """ジョブの受け付けを記録します。
+
+        Args:
+            job (ResampleJob): 変換ジョブ。
+            context (object | None): 再開時に必要な付加情報 (JSONで保存できる値)。
+
+        Returns:
+            int: ジョブID。
+        """
+        # 変換する内容の指紋。ワーカーが読み込む前に書き換えられても、再開時に古い指紋と比べて変換し直す
+        fingerprint = job.source_fingerprint or _source_fingerprint(job)
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._pending[job_id] = (job, context, fingerprint)
+            self._append({"op": OP_QUEUED, "id": job_id, "job": _job_to_record(job), "context": context,
+                          "fingerprint": fingerprint})
+            return job_id
+
+    def started(self, job_id):
+        """ジョブをワーカーに投入したことを記録します。
+
+        Args:
+            job_id (int): ジョブID。
+        """
+        with self._lock:
+            self._append({"op": OP_STARTED, "id": job_id})
+
+    def finished(self, job_id, status, message=None):
+        """ジョブの完了を記録します。
+
+        Args:
+            job_id (int): ジョブID。
+            status (str): 処理結果のステータス文字列。
+            message (str | None): 詳細メッセージ。
+        """
+        with self._lock:
+            entry = self._pending.pop(job_id, None)
+            if entry is not None and status == STATUS_DONE and entry[2] is not None:
+                self._done_keys[_job_key(entry[0])] = entry[2]
+            self._append({"op": OP_DONE, "id": job_id, "status": status, "message": message})
+
+    def cancel(self, job_id):
+        """ジョブを再開しないことを記録します。
+
+        Args:
+            job_id (int): ジョブID。
+        """
+        with self._lock:
+            self._pending.pop(job_id, None)
+            self._append({"op": OP_CANCELLED, "id": job_id})
+
+    def reset(self):
+        """未完了のジョブがなければ、ジャーナルを空にします。
+
+        Returns:
+            bool: 空にした場合はTrue。
+        """
+        with self._lock:
+            if self._pending:
+                return False
+            if self._file.tell() > 0:
+                self._file.truncate(0)
+                self._file.seek(0)
+            self._done_keys.clear()
+            return True
+
+    def close(self):
+        """ジャーナルファイルを閉じます。"""
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,150 @@
+"""差分変換 (インクリメンタルモード) のためのマニフェストです。
+
+`make` と同じ考え方で、前回変換したときの
+「元ファイルの指紋・変換設定・出力ファイルの指紋」をファイルごとに記録しておき、
+次回の実行では、いずれかが変わったファイルだけを変換し直します。
+判定は `os.stat` のみで行い、音声ファイルの中身やヘッダーは読みません。
+
+マニフェストはJSON形式で保存します。書き込みは一時ファイルへの書き出しと
+`os.replace` で行うため、保存中に中断されても前回のマニフェストが壊れることはありません。
+"""
+import json
+import os
+
+from .channels import DEFAULT_CHANNEL_MAP
+from .core import job_output_paths, job_targets
+from .metadata import file_fingerprint
+
+
+MANIFEST_VERSION = 3
+DEFAULT_MANIFEST_FILENAME = ".wavresamples-manifest.json"
+
+
+def _optional_fingerprint(path):
+    """ファイルの指紋をJSONに保存できる形式で取得します。ファイルがなければNoneを返します。"""
+    try:
+        return list(file_fingerprint(path))
+    except FileNotFoundError:
+        return None
+
+
+class Manifest:
+    """前回の変換結果を記録するマニフェストです。
+
+    Args:
+        path (str): マニフェストファイルのパス。存在すれば読み込みます。
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._entries = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            # 壊れたマニフェストは使わず、すべてのファイルを変換し直す
+            print(f"警告: マニフェストを読み込めませんでした ({self.path}) - {e}")
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self._entries = data.get("entries", {})
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _settings(job):
+        settings = {"targets": [list(target) for target in job_targets(job)], "quality": job.quality}
+        if job.dither:
+            # ディザなしの記録はディザの追加前と同じ形式のままにし、既存のマニフェストを無効にしない
+            settings["dither"] = True
+        if job.channel_map != DEFAULT_CHANNEL_MAP:
+            settings["channel_map"] = job.channel_map
+        return settings
+
+    def is_up_to_date(self, job):
+        """前回の変換結果がそのまま使えるかを判定します。
+
+        元ファイル・変換設定 (すべての出力形式・変換品質・ディザ・チャンネルの対応)・出力先・出力ファイルのすべてが前回の記録と一致する場合にTrueを返します。
+        変換不要でスキップされたファイル (出力ファイルなし) は、出力ファイルがまだ存在しないことも確認します。
+
+        Args:
+            job (ResampleJob): 変換ジョブ。
+
+        Returns:
+            bool: 変換を省略できる場合はTrue。
+        """
+        entry = self._entries.get(os.path.abspath(job.filepath))
+        if entry is None or entry["settings"] != self._settings(job):
+            return False
+        output_paths = job_output_paths(job)
+        if entry["output_paths"] != output_paths:
+            return False
+        try:
+            source = list(file_fingerprint(job.filepath))
+        except OSError:
+            return False
+        return entry["source"] == source and entry["outputs"] == [_optional_fingerprint(path) for path in output_paths]
+
+    def source_fingerprint(self, job):
+        """変換前の元ファイルの指紋を取得します。`record` に渡すために変換の開始前に呼び出します。
+
+        変換中に元ファイルが書き換えられた場合でも、次回の実行で確実に変換し直されるよう、
+        指紋は変換の前に取得します。
+
+        Args:
+            job (ResampleJob): 変換ジョブ。
+
+        Returns:
+            list | None: 元ファイルの指紋。取得できない場合はNone。
+        """
+        try:
+            return list(file_fingerprint(job.filepath))
+        except OSError:
+            return None
+
+    def record(self, job, source):
+        """変換に成功したジョブを記録します。
+
+        Args:
+            job (ResampleJob): 変換ジョブ。
+            source (list | None): `source_fingerprint` で取得した変換前の元ファイルの指紋。
+        """
+        key = os.path.abspath(job.filepath)
+        if source is None:
+            self.forget(key)
+            return
+        output_paths = job_output_paths(job)
+        self._entries[key] = {
+            "source": source,
+            "settings": self._settings(job),
+            "output_paths": output_paths,
+            "outputs": [_optional_fingerprint(path) for path in output_paths],
+        }
+        self._dirty = True
+
+    def forget(self, filepath):
+        """ファイルの記録を削除します。次回の実行で必ず変換し直されます。
+
+        Args:
+            filepath (str): 元ファイルのパス。
+        """
+        if self._entries.pop(os.path.abspath(filepath), None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """変更があればマニフェストを保存します。"""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,142 @@
+"""WAVファイルのメタデータ (ヘッダー情報) のキャッシュです。
+
+`sf.info` はファイルを開いてヘッダーを読むため、ネットワーク共有上では
+1回あたり数十ミリ秒かかります。ここでは取得したメタデータを
+ファイルの更新時刻 (mtime)・サイズ・inode と一緒に記録し、
+`os.stat` の結果が一致する間は記録を再利用します。
+ファイルが書き換えられると stat の結果が変わるため、記録は自動的に無効になります。
+
+PCM形式のWAVファイルは、libsndfile を使わずに RIFF ヘッダーを直接読みます
+(`wavresamples.pcmwav` を参照)。それ以外の形式は `sf.info` で読みます。
+"""
+import os
+import threading
+from collections import namedtuple
+
+import soundfile as sf
+
+from .pcmwav import read_wav_header
+
+
+# ファイルの同一性を判定するための指紋 (更新時刻[ns], サイズ[byte], inode)
+FileFingerprint = namedtuple("FileFingerprint", ["mtime_ns", "size", "inode"])
+
+# 1ファイル分のメタデータの記録
+AudioMetadata = namedtuple("AudioMetadata", ["samplerate", "channels", "subtype", "frames", "fingerprint"])
+
+
+def file_fingerprint(path):
+    """ファイルの指紋を取得します。ファイルの中身は読みません。
+
+    Args:
+        path (str): ファイルパス。
+
+    Returns:
+        FileFingerprint: ファイルの指紋。
+
+    Raises:
+        OSError: ファイルが存在しない場合など。
+    """
+    st = os.stat(path)
+    return FileFingerprint(st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def read_metadata(path):
+    """ファイルのヘッダーを読み、メタデータの記録を作成します。
+
+    指紋はヘッダーを読む前に取得するため、読み込み中にファイルが書き換えられた場合も
+    次回の検証で必ず無効と判定されます。
+
+    Args:
+        path (str): ファイルパス。
+
+    Returns:
+        AudioMetadata: メタデータの記録。
+    """
+    fingerprint = file_fingerprint(path)
+    info = read_wav_header(path)
+    if info is None:
+        info = sf.info(path)
+    return AudioMetadata(info.samplerate, info.channels, info.subtype, info.frames, fingerprint)
+
+
+def is_metadata_current(path, metadata):
+    """メタデータの記録が現在のファイルと一致しているかを stat のみで確認します。
+
+    Args:
+        path (str): ファイルパス。
+        metadata (AudioMetadata | None): 確認する記録。
+
+    Returns:
+        bool: 記録が有効な場合はTrue。ファイルが存在しない場合や書き換えられた場合はFalse。
+    """
+    if metadata is None:
+        return False
+    try:
+        return file_fingerprint(path) == metadata.fingerprint
+    except OSError:
+        return False
+
+
+class MetadataCache:
+    """ファイルパスごとのメタデータの記録を保持する、スレッドセーフなキャッシュです。"""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+        self.hits = 0 # 記録を再利用した回数
+        self.misses = 0 # ヘッダーを読み直した回数
+
+    def get(self, path):
+        """メタデータを返します。記録が有効ならヘッダーを読まずに再利用します。
+
+        Args:
+            path (str): ファイルの絶対パス。
+
+        Returns:
+            AudioMetadata: メタデータの記録。
+
+        Raises:
+            Exception: ファイルが存在しない場合や、WAVファイルとして読めない場合。
+        """
+        with self._lock:
+            metadata = self._records.get(path)
+        if is_metadata_current(path, metadata):
+            with self._lock:
+                self.hits += 1
+            return metadata
+
+        metadata = read_metadata(path)
+        with self._lock:
+            self._records[path] = metadata
+            self.misses += 1
+        return metadata
+
+    def peek(self, path):
+        """記録されているメタデータを、検証せずに返します。
+
+        GUIスレッドなど stat の待ち時間も避けたい場合に使用し、
+        検証は `is_metadata_current` でワーカー側に任せます。
+
+        Args:
+            path (str): ファイルの絶対パス。
+
+        Returns:
+            AudioMetadata | None: 記録。なければNone。
+        """
+        with self._lock:
+            return self._records.get(path)
+
+    def invalidate(self, path):
+        """指定ファイルの記録を破棄します。
+
+        Args:
+            path (str): ファイルの絶対パス。
+        """
+        with self._lock:
+            self._records.pop(path, None)
+
+    def clear(self):
+        """すべての記録を破棄します。"""
+        with self._lock:
+            self._records.clear()
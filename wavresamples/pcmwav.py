@@ -0,0 +1,250 @@
+"""PCM形式のWAVファイル (RIFF) を、コピーせずにメモリマップで読み込むリーダーです。
+
+入力の大半は非圧縮の PCM_16 / PCM_24 の RIFF ファイルです。ここでは RIFF ヘッダーを
+直接解析して `data` チャンクを `numpy.memmap` のビューとして公開し、float32 への変換は
+ブロックを取り出すときにだけ行います。ファイル全体を float32 に変換したバッファを作らないため、
+リサンプリングが不要な変換 (チャンネル数・ビット深度の変更のみ) はコピーとほぼ同じ速さで進みます。
+
+float32 への変換は libsndfile (soundfile) と同じ正規化 (PCM_16 は 1/32768、PCM_24 は
+上位に詰めた32bit整数の 1/2^31) を行うため、`soundfile` で読み込んだ場合と値は完全に一致します。
+
+対応していない形式 (RIFX・RF64・浮動小数点・8/32bit など) の場合、`open_pcm_wav` はNoneを返すため、
+呼び出し側は `soundfile` での読み込みに切り替えます (`open_audio_source` を参照)。
+"""
+import contextlib
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+import soundfile as sf
+
+
+# メモリマップで読み込めるサブタイプ
+MEMMAP_SUBTYPES = ("PCM_16", "PCM_24")
+
+# RIFF ヘッダーから読み取ったPCM形式の情報 (data_offset は data チャンクの先頭のバイト位置)
+PcmWavInfo = namedtuple("PcmWavInfo", ["samplerate", "channels", "subtype", "frames", "data_offset"])
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# ビット深度 -> soundfile のサブタイプ名
+_PCM_SUBTYPES = {8: "PCM_U8", 16: "PCM_16", 24: "PCM_24", 32: "PCM_32"}
+
+
+def parse_wav_header(f):
+    """開いたファイルから RIFF / WAVE ヘッダーを解析します。
+
+    `fmt ` チャンクと `data` チャンクの位置を探し、それ以外のチャンク (LIST など) は読み飛ばします。
+    `data` チャンクの大きさがファイルの実際の大きさを超える場合 (書き込み途中で止まったファイルなど) は、
+    libsndfile と同様にファイルの末尾までを有効なデータとします。
+
+    Args:
+        f (BinaryIO): 先頭にシーク済みのバイナリファイル。
+
+    Returns:
+        PcmWavInfo | None: PCM形式のWAVファイルの場合はその情報。RIFF / WAVE でない場合や、
+            PCM以外の形式 (浮動小数点など) の場合はNone。
+    """
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    file_size = os.fstat(f.fileno()).st_size
+    fmt = None
+    position = 12
+    while position + 8 <= file_size:
+        f.seek(position)
+        chunk_id, chunk_size = struct.unpack("<4sI", f.read(8))
+        if chunk_id == b"fmt ":
+            if chunk_size < 16:
+                return None
+            body = f.read(min(chunk_size, 40))
+            format_tag, channels, samplerate, _byte_rate, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+            if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                format_tag = struct.unpack("<H", body[24:26])[0] # SubFormat GUID の先頭2バイト
+            if format_tag != _WAVE_FORMAT_PCM or bits not in _PCM_SUBTYPES or not channels:
+                return None
+            if block_align != channels * (bits // 8):
+                return None
+            fmt = (samplerate, channels, _PCM_SUBTYPES[bits], block_align)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            samplerate, channels, subtype, block_align = fmt
+            data_offset = position + 8
+            data_size = min(chunk_size, file_size - data_offset)
+            return PcmWavInfo(samplerate, channels, subtype, data_size // block_align, data_offset)
+        position += 8 + chunk_size + (chunk_size & 1) # チャンクは2バイト境界に揃えられている
+    return None
+
+
+def read_wav_header(path):
+    """WAVファイルのヘッダーを、libsndfile を使わずに直接読みます。
+
+    Args:
+        path (str): ファイルパス。
+
+    Returns:
+        PcmWavInfo | None: PCM形式のWAVファイルの場合はその情報。それ以外はNone。
+
+    Raises:
+        OSError: ファイルを開けない場合。
+    """
+    with open(path, "rb") as f:
+        try:
+            return parse_wav_header(f)
+        except struct.error:
+            return None
+
+
+def _widen_24bit(raw):
+    """(frames, channels, 3) の24bitサンプルを、32bit整数の上位3バイトに詰めた int32 の配列に変換します。"""
+    widened = np.zeros(raw.shape[:2] + (4,), dtype=np.uint8)
+    widened[..., 1:] = raw
+    return widened.view("<i4")[..., 0]
+
+
+class PcmWavReader:
+    """PCM_16 / PCM_24 のWAVファイルの `data` チャンクをメモリマップで公開するリーダーです。
+
+    `soundfile.SoundFile` と同じ属性 (`samplerate` / `channels` / `subtype` / `frames`) と
+    `blocks` / `read` を持つため、読み込み側のコードはどちらでも同じように扱えます。
+    `open_pcm_wav` で作成してください。
+
+    Attributes:
+        bits (int): 元のビット深度 (16 / 24)。
+        data (np.ndarray): `data` チャンクのビュー (コピーしていません)。PCM_16 は (frames, channels) の int16、
+            PCM_24 は (frames, channels, 3) の uint8 です。
+    """
+
+    def __init__(self, path, info):
+        self.name = path
+        self.bits = 16 if info.subtype == "PCM_16" else 24
+        self.samplerate = info.samplerate
+        self.channels = info.channels
+        self.subtype = info.subtype
+        self.frames = info.frames
+        if info.frames == 0:
+            shape = (0, info.channels) if info.subtype == "PCM_16" else (0, info.channels, 3)
+            self.data = np.zeros(shape, dtype="<i2" if info.subtype == "PCM_16" else np.uint8)
+        elif info.subtype == "PCM_16":
+            self.data = np.memmap(path, dtype="<i2", mode="r", offset=info.data_offset, shape=(info.frames, info.channels))
+        else:
+            self.data = np.memmap(path, dtype=np.uint8, mode="r", offset=info.data_offset,
+                                  shape=(info.frames, info.channels, 3))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """メモリマップを解放します (ビューを参照している配列がなくなった時点でマップが閉じられます)。"""
+        self.data = None
+
+    def to_float32(self, start, stop):
+        """フレーム `start` から `stop` の手前までを float32 に変換します。
+
+        Args:
+            start (int): 先頭のフレーム。
+            stop (int): 末尾のフレーム (含まない)。
+
+        Returns:
+            np.ndarray: (frames, channels) 形式の float32 の配列 (新しく確保した配列)。
+        """
+        raw = self.data[start:stop]
+        if self.subtype == "PCM_16":
+            return np.multiply(raw, np.float32(1.0 / 0x8000), dtype=np.float32)
+        return np.multiply(_widen_24bit(raw), np.float32(1.0 / 0x80000000), dtype=np.float32)
+
+    def to_int32(self, start, stop):
+        """フレーム `start` から `stop` の手前までを、元のビット深度の値のまま int32 に変換します。
+
+        Args:
+            start (int): 先頭のフレーム。
+            stop (int): 末尾のフレーム (含まない)。
+
+        Returns:
+            np.ndarray: (frames, channels) 形式の int32 の配列 (新しく確保した配列)。
+        """
+        raw = self.data[start:stop]
+        if self.subtype == "PCM_16":
+            return raw.astype(np.int32)
+        widened = _widen_24bit(raw)
+        widened >>= 8 # 算術シフトで符号を保つ
+        return widened
+
+    def int_blocks(self, blocksize):
+        """`blocksize` フレームずつ、元のビット深度の値のまま int32 に変換して返します。
+
+        Args:
+            blocksize (int): 1ブロックあたりのフレーム数。
+
+        Yields:
+            np.ndarray: (frames, channels) 形式の int32 の配列。
+        """
+        for start in range(0, self.frames, blocksize):
+            yield self.to_int32(start, min(start + blocksize, self.frames))
+
+    def blocks(self, blocksize, dtype="float32", always_2d=True):
+        """`blocksize` フレームずつ float32 に変換して返します (`soundfile.SoundFile.blocks` 相当)。
+
+        Args:
+            blocksize (int): 1ブロックあたりのフレーム数。
+            dtype (str): 出力の型。"float32" のみ対応しています。
+            always_2d (bool): 常に (frames, channels) 形式で返します (Trueのみ対応しています)。
+
+        Yields:
+            np.ndarray: (frames, channels) 形式の float32 の配列。
+        """
+        if dtype != "float32" or not always_2d:
+            raise ValueError("PcmWavReader.blocks は dtype='float32', always_2d=True のみ対応しています。")
+        for start in range(0, self.frames, blocksize):
+            yield self.to_float32(start, min(start + blocksize, self.frames))
+
+    def read(self):
+        """ファイル全体を float32 に変換します。
+
+        Returns:
+            np.ndarray: (frames, channels) 形式の float32 の配列。
+        """
+        return self.to_float32(0, self.frames)
+
+
+def open_pcm_wav(path):
+    """PCM_16 / PCM_24 のWAVファイルをメモリマップで開きます。
+
+    Args:
+        path (str): ファイルパス。
+
+    Returns:
+        PcmWavReader | None: リーダー。メモリマップで読み込めない形式の場合はNone。
+
+    Raises:
+        OSError: ファイルを開けない場合。
+    """
+    info = read_wav_header(path)
+    if info is None or info.subtype not in MEMMAP_SUBTYPES:
+        return None
+    return PcmWavReader(path, info)
+
+
+@contextlib.contextmanager
+def open_audio_source(path):
+    """変換元のファイルを開きます。PCM_16 / PCM_24 のWAVファイルはメモリマップで、それ以外は soundfile で開きます。
+
+    Args:
+        path (str): ファイルパス。
+
+    Yields:
+        PcmWavReader | soundfile.SoundFile: `samplerate` / `channels` / `frames` / `blocks` を持つ読み込み元。
+    """
+    reader = open_pcm_wav(path)
+    if reader is None:
+        with sf.SoundFile(path) as src:
+            yield src
+        return
+    with reader:
+        yield reader
@@ -0,0 +1,236 @@
+"""読み込み・計算 (リサンプリング)・書き出しを重ねて実行するためのパイプライン部品です。
+
+1件の変換を「読み込み → リサンプリング → 書き出し」の順に逐次実行すると、
+ディスク (特にネットワーク上のストレージ) を待つ間はCPUが、計算の間はディスクが遊んでしまいます。
+ここでは段階の間を上限付きのキューでつなぎ、入出力を別スレッドで実行することで、
+所要時間を「入出力 + 計算」から「max(入出力, 計算)」に近づけます。
+
+* `prefetch_iter`: 読み込み (デコード) を別スレッドで先行させるイテレーターです。
+* `WriteBehind`: 書き出しを別スレッドで順番に実行します。計算側は書き出しの完了を待たずに次のブロックへ進みます。
+* `SourcePrefetcher`: これから変換するファイルを入出力用のスレッドで先読みし、OSのページキャッシュに載せます。
+  ワーカーでのデコードがストレージを待たずに済むよう、ディスパッチ側 (親プロセス) で使います。
+
+libsndfile (soundfile) の読み書きと soxr のリサンプリングはGILを解放するため、
+スレッドでも入出力と計算が並行して進みます。キューの長さに上限があるため、
+先行しすぎてメモリを使い果たすことはありません。
+"""
+import collections
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .stages import NULL_TIMER
+
+
+# 段階の間のキューに置けるブロック数
+DEFAULT_QUEUE_DEPTH = 4
+# 先読みでファイルを読み込む単位 (バイト)
+PREFETCH_CHUNK_SIZE = 1024 * 1024
+# これより大きなファイルは先読みしない (ストリーミング変換がブロック単位で先読みするため、ページキャッシュを追い出さない)
+PREFETCH_MAX_FILE_SIZE = 64 * 1024 * 1024
+# 先読み済みとして覚えておくファイル数 (同じファイルを何度も先読みしないため)
+_PREFETCH_HISTORY = 4096
+
+_END = object() # キューの終端の目印
+# キューへの出し入れの待ち時間 (秒)。中断の確認間隔を兼ねる
+_POLL_INTERVAL = 0.1
+
+
+class _Failure:
+    """別スレッドで発生した例外をキュー経由で受け渡すための入れ物です。"""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def prefetch_iter(iterable, depth=DEFAULT_QUEUE_DEPTH, timer=None, stage="decode"):
+    """`iterable` を別スレッドで先行して進め、要素を順番に返すイテレーターです。
+
+    読み込み側のスレッドは最大 `depth` 個まで先行します。読み込み中に発生した例外は、
+    その位置の要素を取り出したときに呼び出し側で送出されます。
+    途中でイテレーターを閉じた場合は、読み込み側のスレッドを止めてから戻ります
+    (`iterable` が参照するファイルを閉じる前に、読み込みが終わっていることが保証されます)。
+
+    Args:
+        iterable (Iterable): 先読みする要素の列 (例: `soundfile.SoundFile.blocks`)。
+        depth (int): 先行できる要素の最大数。
+        timer (StageTimer | None): 1要素の取得ごとに所要時間を計測する場合に指定します (読み込み側のスレッドで計測します)。
+        stage (str): 計測する段階の名前。
+
+    Yields:
+        object: `iterable` の要素。
+    """
+    if timer is None:
+        timer = NULL_TIMER
+    items = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            iterator = iter(iterable)
+            while not stop.is_set():
+                with timer.stage(stage):
+                    item = next(iterator, _END)
+                if not _put(item) or item is _END:
+                    return
+        except BaseException as e:
+            _put(_Failure(e))
+
+    thread = threading.Thread(target=_produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class WriteBehind:
+    """書き出し処理を別スレッドで、投入順に実行します。
+
+    `submit` はキューに空きがあればすぐに戻るため、計算側は書き出しの完了を待たずに次の処理へ進めます。
+    キューの長さに上限があるため、書き出しが追いつかない場合は `submit` が空きを待ちます。
+    書き出しで例外が発生した場合は、以降の書き出しを行わず、次の `submit` または `close` で送出します。
+
+    with 文で使うと、ブロックを抜けるときにすべての書き出しの完了を待ちます。
+    ブロック内で例外が発生した場合は、残りの書き出しを破棄してから抜けます。
+
+    Args:
+        depth (int): キューに置ける書き出しの最大数。
+        timer (StageTimer | None): 書き出しごとに所要時間を計測する場合に指定します (書き出し側のスレッドで計測します)。
+        stage (str): 計測する段階の名前。
+    """
+
+    def __init__(self, depth=DEFAULT_QUEUE_DEPTH, timer=None, stage="write"):
+        self._timer = timer if timer is not None else NULL_TIMER
+        self._stage = stage
+        self._queue = queue.Queue(maxsize=max(1, depth))
+        self._error = None
+        self._abort = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if self._error is not None or self._abort:
+                continue # 失敗・中断後は残りを捨てる
+            func, args = item
+            try:
+                with self._timer.stage(self._stage):
+                    func(*args)
+            except BaseException as e:
+                self._error = e
+
+    def submit(self, func, *args):
+        """書き出し処理 `func(*args)` をキューに追加します。
+
+        Args:
+            func (callable): 書き出しを行う関数。
+            *args: `func` に渡す引数。
+
+        Raises:
+            Exception: それまでの書き出しで発生した例外。
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((func, args))
+
+    def close(self):
+        """すべての書き出しの完了を待ちます。
+
+        Raises:
+            Exception: 書き出しで発生した例外。
+        """
+        if self._thread.is_alive():
+            self._queue.put(_END)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._abort = True
+            self._queue.put(_END)
+            self._thread.join()
+            return False
+        self.close()
+        return False
+
+
+class SourcePrefetcher:
+    """これから変換するファイルを入出力用のスレッドで先読みし、OSのページキャッシュに載せます。
+
+    ワーカーがデコードを始める時点でファイルの内容がキャッシュにあるため、
+    ネットワーク上のストレージでも読み込みを待たずに計算を始められます。
+    読み込んだ内容は捨てるため、このプロセスのメモリ使用量は増えません。
+    先読みに失敗したファイルはそのままにします (エラーの報告はワーカーに任せます)。
+
+    Args:
+        io_threads (int): 先読みに使うスレッド数。
+        max_file_size (int): 先読みするファイルの大きさの上限 (バイト)。
+    """
+
+    def __init__(self, io_threads=2, max_file_size=PREFETCH_MAX_FILE_SIZE):
+        self.max_file_size = max_file_size
+        self._executor = ThreadPoolExecutor(max_workers=max(1, io_threads), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._seen = collections.OrderedDict() # 先読み済み・先読み中のファイルパス (古い順)
+        self._closed = False
+
+    def prefetch(self, paths):
+        """ファイルの先読みを予約します。先読み済み・先読み中のファイルは無視します。
+
+        Args:
+            paths (Iterable[str]): 先読みするファイルのパス (変換する順)。
+        """
+        with self._lock:
+            if self._closed:
+                return
+            for path in paths:
+                if path in self._seen:
+                    continue
+                self._seen[path] = None
+                if len(self._seen) > _PREFETCH_HISTORY:
+                    self._seen.popitem(last=False)
+                self._executor.submit(self._read_through, path)
+
+    def _read_through(self, path):
+        try:
+            if self._closed or os.path.getsize(path) > self.max_file_size:
+                return
+            buffer = bytearray(PREFETCH_CHUNK_SIZE)
+            with open(path, "rb", buffering=0) as f:
+                while not self._closed and f.readinto(buffer):
+                    pass
+        except OSError:
+            pass
+
+    def shutdown(self):
+        """予約済みの先読みを取り消し、スレッドを終了します。"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False) # 予約済みの先読みは _closed を見てすぐに戻る
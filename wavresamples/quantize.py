@@ -0,0 +1,153 @@
+"""量子化 (ビット深度の変換) と TPDF ディザです。
+
+サンプリング周波数が変わらない変換 (チャンネル数・ビット深度の変更のみ) では、
+元ファイルの整数サンプルを float32 に変換せず、整数のままチャンネル変換と量子化を行います
+(`requantize`)。モノラルからステレオへの複製、多チャンネルからモノラルへの平均、
+ビット深度の変換 (PCM_24 → PCM_16 → PCM_U8 など) はいずれもブロック単位のNumPyの演算で、
+平均とビット深度の削減の丸めは1回にまとめます。ビット深度を増やす場合は値をそのまま上位に詰めるため、
+PCM_16 → PCM_24 などは元の値を正確に保ちます。
+
+丸めと飽和は、float32 の信号を libsndfile で書き出す場合と同じです。libsndfile (1.2) は float の値を
+2^31 倍して32bitの整数に丸め (範囲外は飽和)、下位のビットを切り捨てて目標のビット深度にします。
+元の値が整数の場合、これは目標のビット深度での切り捨て (負の無限大方向) と同じになるため、
+`requantize` の結果は float32 を経由して書き出した場合と完全に一致します
+(`benchmarks/bit_exactness.py` で確認できます)。
+
+ディザ (`dither=True`) を指定すると、ビット深度を減らす量子化の前に、目標のビット深度で
+±1LSB の三角分布 (TPDF) のノイズを加えます。量子化誤差が信号と相関しなくなるため、
+8bit への変換などで小さな音の歪みが雑音に置き換わります。ノイズの乱数は出力ファイルごとに
+固定の種から生成するため、同じ入力からは同じ出力が得られます。
+リサンプリングする変換 (float32 の信号) のディザは `quantize_float` で行います。
+
+量子化した整数は libsndfile の整数の書き込み (値を上位ビットに詰めた int16 / int32) で
+そのまま書き出すため、書き出し時に値が変わることはありません。
+"""
+import zlib
+
+import numpy as np
+
+from .channels import DEFAULT_CHANNEL_MAP, resolve_channel_map
+
+# 整数のまま変換できるサブタイプとそのビット深度
+SUBTYPE_BITS = {"PCM_U8": 8, "PCM_16": 16, "PCM_24": 24}
+# 整数のまま読み込めるサブタイプ (メモリマップで読み込めるもの)
+INTEGER_SOURCE_SUBTYPES = ("PCM_16", "PCM_24")
+
+
+def supports_integer_path(source_subtype, source_channels, outputs, channel_map=DEFAULT_CHANNEL_MAP):
+    """整数のままチャンネル変換・量子化できる組み合わせかどうかを判定します。
+
+    チャンネルの対応がそのまま・モノラルの複製・モノラルへの平均のいずれかの場合に限ります
+    (ダウンミックスなどの行列は float32 の経路で適用します)。
+
+    Args:
+        source_subtype (str): 元のビット深度(サブタイプ)。
+        source_channels (int): 元のチャンネル数。
+        outputs (Iterable[tuple[int, str]]): 出力ごとの (目標のチャンネル数, 目標のビット深度(サブタイプ))。
+        channel_map (str): チャンネルの対応 (`wavresamples.channels.parse_channel_map` を参照)。
+
+    Returns:
+        bool: 整数のまま変換できる場合はTrue。
+
+    Raises:
+        ValueError: 対応していないチャンネル数の組み合わせの場合。
+    """
+    if source_subtype not in INTEGER_SOURCE_SUBTYPES:
+        return False
+    return all(subtype in SUBTYPE_BITS and resolve_channel_map(source_channels, channels, channel_map).kind != "matrix"
+               for channels, subtype in outputs)
+
+
+def dither_rng(*key):
+    """ディザの乱数生成器を、`key` から決まる固定の種で作成します。
+
+    Args:
+        *key: 種を決める値 (出力ファイル名・出力形式など)。
+
+    Returns:
+        np.random.Generator: 乱数生成器。
+    """
+    return np.random.default_rng(zlib.crc32(repr(key).encode("utf-8")))
+
+
+def _to_container(values, bits, target_channels):
+    """目標のビット深度の整数を、libsndfile にそのまま書き込める型 (上位ビットに詰めた整数) に変換します。"""
+    if bits == 24:
+        dtype, shift = np.int32, 8
+    else:
+        dtype, shift = np.int16, 16 - bits
+    out = np.empty((values.shape[0], target_channels), dtype=dtype)
+    # 複製 (モノラル → 多チャンネル) はブロードキャストで直接書き込む
+    np.left_shift(values, shift, out=out, casting="unsafe")
+    return out
+
+
+def requantize(block, source_bits, target_bits, target_channels, rng=None):
+    """整数のサンプルのまま、チャンネル変換とビット深度の変換を行います。
+
+    多チャンネルからモノラルへの平均とビット深度の削減は、合計を1回だけ丸めて行います
+    (libsndfile と同じく、目標のビット深度での切り捨て)。
+    `rng` を指定すると、ビット深度を減らす場合に ±1LSB (目標のビット深度) の TPDF ディザを加えます。
+
+    Args:
+        block (np.ndarray): (frames, channels) 形式の int32 の配列 (元のビット深度の値)。
+        source_bits (int): 元のビット深度。
+        target_bits (int): 目標のビット深度 (8 / 16 / 24)。
+        target_channels (int): 目標のチャンネル数。
+        rng (np.random.Generator | None): ディザの乱数生成器。Noneの場合はディザを加えません。
+
+    Returns:
+        np.ndarray: (frames, target_channels) 形式の、libsndfile にそのまま書き込める整数の配列
+            (PCM_24 は int32、それ以外は int16 の上位ビットに詰めた値)。
+
+    Raises:
+        ValueError: 対応していないチャンネル数の組み合わせの場合。
+    """
+    channels = block.shape[1]
+    if channels == target_channels or channels == 1:
+        total, count = block, 1
+    elif target_channels == 1:
+        total, count = block.sum(axis=1, keepdims=True, dtype=np.int32), channels # 多チャンネルからモノラルへ (平均)
+    else:
+        raise ValueError(f"{channels}ch から {target_channels}ch への変換には対応していません。")
+
+    shift = source_bits - target_bits
+    if shift < 0:
+        total = np.left_shift(total, -shift) # ビット深度を増やす場合は上位に詰めるだけ (正確)
+    divisor = count << max(shift, 0)
+    if divisor > 1:
+        if rng is not None and shift > 0:
+            # 目標のビット深度で ±1LSB の三角分布のノイズ (一様分布2つの差)
+            noise = rng.integers(0, divisor, size=total.shape, dtype=np.int32)
+            noise -= rng.integers(0, divisor, size=total.shape, dtype=np.int32)
+            total = total + noise
+        total = total // divisor
+        limit = 1 << (target_bits - 1)
+        np.clip(total, -limit, limit - 1, out=total)
+    return _to_container(total, target_bits, target_channels)
+
+
+def quantize_float(block, subtype, rng):
+    """float32 の信号を、TPDF ディザを加えて目標のビット深度の整数に量子化します。
+
+    ディザを加えた値を libsndfile と同じ方法 (2^31 倍して32bitの整数に丸め、範囲外は飽和させてから
+    下位のビットを切り捨てる) で量子化するため、ディザを加えた float64 の信号を libsndfile で
+    書き出した場合と同じ値になります。
+
+    Args:
+        block (np.ndarray): (frames, channels) 形式の float32 の配列。
+        subtype (str): 目標のビット深度(サブタイプ) (`SUBTYPE_BITS` のいずれか)。
+        rng (np.random.Generator): ディザの乱数生成器。
+
+    Returns:
+        np.ndarray: libsndfile にそのまま書き込める整数の配列 (`requantize` と同じ形式)。
+    """
+    bits = SUBTYPE_BITS[subtype]
+    full_scale = float(1 << 31)
+    lsb = float(1 << (32 - bits)) # 目標のビット深度の1LSB (32bitの整数での大きさ)
+    wide = block.astype(np.float64) * full_scale
+    wide += rng.random(wide.shape) * lsb
+    wide -= rng.random(wide.shape) * lsb
+    np.rint(wide, out=wide)
+    np.clip(wide, -full_scale, full_scale - 1, out=wide)
+    return _to_container(np.right_shift(wide.astype(np.int64), 32 - bits), bits, block.shape[1])
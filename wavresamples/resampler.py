@@ -0,0 +1,165 @@
+"""リサンプリングのフィルタ設計を使い回すためのリサンプラーです。
+
+`librosa.resample` は呼び出しのたびにフィルタを設計し直し、引数の検証などの
+オーバーヘッドもあるため、同じ周波数比 (例: 48kHz→44.1kHz) の短いファイルを
+大量に変換するとその時間が支配的になります。
+ここでは (元の周波数, 目標の周波数, 品質) ごとに `ResamplePlan` を一度だけ作り、
+上限付きのLRUキャッシュで保持してファイル間で再利用します。
+各プランはスレッドごと・チャンネル数ごとに soxr のリサンプラー (設計済みのフィルタ) を保持し、
+ファイルごとに内部状態だけをリセットして使い回します。
+
+キャッシュはプロセスごとに持つため、プロセスプールでは各ワーカーが
+最初の1ファイルで一度だけフィルタを設計し、以降のファイルで再利用します。
+"""
+import functools
+import threading
+from math import gcd
+
+import numpy as np
+
+
+# 既定の品質 (librosa.resample の既定 res_type と同じ)
+DEFAULT_QUALITY = "soxr_hq"
+# librosa の res_type 名 -> soxr の品質指定
+SOXR_QUALITIES = {"soxr_vhq": "VHQ", "soxr_hq": "HQ", "soxr_mq": "MQ", "soxr_lq": "LQ", "soxr_qq": "QQ"}
+# 変換品質の段階 -> 品質 (`SOXR_QUALITIES` のキー)
+# hq: マスター用。librosa.resample の既定と同じ HQ フィルタ (SNR 130dB 程度)
+# fast: プレビュー・プロキシ用。soxr の Quick (3次補間) で HQ の1.5倍程度速いが、高域ほど誤差が大きい (SNR 30dB 程度)
+# 実測値は `python benchmarks/quality_tiers.py` で確認できる
+QUALITY_TIERS = {"hq": DEFAULT_QUALITY, "fast": "soxr_qq"}
+# 既定の変換品質の段階
+DEFAULT_QUALITY_TIER = "hq"
+# キャッシュするプランの最大数 (周波数比と品質の組み合わせの数)
+RESAMPLE_PLAN_CACHE_SIZE = 32
+
+
+class ResamplePlan:
+    """1つの (元の周波数, 目標の周波数, 品質) に対するリサンプリング計画です。
+
+    `get_resample_plan` から取得し、直接インスタンス化しないでください。
+    """
+
+    def __init__(self, orig_sr, target_sr, quality):
+        """リサンプリング計画を作成します。
+
+        Args:
+            orig_sr (int): 元のサンプリング周波数。
+            target_sr (int): 目標のサンプリング周波数。
+            quality (str): 品質 (`SOXR_QUALITIES` のキー)。
+
+        Raises:
+            ValueError: 対応していない品質の場合。
+        """
+        if quality not in SOXR_QUALITIES:
+            raise ValueError(f"無効なリサンプリング品質です: {quality}")
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self.quality = quality
+        # 有理数の変換比 (up / down)
+        divisor = gcd(orig_sr, target_sr)
+        self.up = target_sr // divisor
+        self.down = orig_sr // divisor
+        self._soxr_quality = SOXR_QUALITIES[quality]
+        self._local = threading.local() # スレッドごとのリサンプラー (チャンネル数 -> ResampleStream)
+
+    def stream(self, channels):
+        """内部状態をリセットした、このスレッド専用のストリーミング用リサンプラーを返します。
+
+        フィルタはスレッドとチャンネル数の組み合わせごとに一度だけ設計されます。
+        返されたリサンプラーは、同じスレッドで次に `stream` / `resample` を呼び出すまで有効です。
+
+        Args:
+            channels (int): チャンネル数。
+
+        Returns:
+            soxr.ResampleStream: `resample_chunk` でブロックを順に処理できるリサンプラー。
+        """
+        import soxr # librosa.resample と同じリサンプラー (起動時間短縮のため使用時に読み込む)
+
+        streams = getattr(self._local, "streams", None)
+        if streams is None:
+            streams = self._local.streams = {}
+        resampler = streams.get(channels)
+        if resampler is None:
+            resampler = soxr.ResampleStream(self.orig_sr, self.target_sr, channels, dtype="float32", quality=self._soxr_quality)
+            streams[channels] = resampler
+        else:
+            resampler.clear()
+        return resampler
+
+    def output_length(self, frames):
+        """入力フレーム数に対する出力フレーム数を返します。
+
+        librosa.resample と同じく ceil(frames * target_sr / orig_sr) です。
+
+        Args:
+            frames (int): 入力のフレーム数。
+
+        Returns:
+            int: 出力のフレーム数。
+        """
+        return int(np.ceil(frames * float(self.target_sr) / self.orig_sr))
+
+    def resample(self, y, fix_length=True):
+        """信号全体をリサンプリングします。
+
+        Args:
+            y (np.ndarray): (frames,) または (frames, channels) 形式の float32 配列。
+            fix_length (bool): Trueの場合、出力の長さを `output_length` に合わせます
+                (librosa.resample と同じく、不足分は無音で埋めます)。呼び出し側で
+                長さをそろえる場合は、余分なコピーを避けるために False を指定します。
+
+        Returns:
+            np.ndarray: 入力と同じ次元の、リサンプリング後の float32 配列。
+        """
+        y2d = y.reshape(-1, 1) if y.ndim == 1 else y
+        out = self.stream(y2d.shape[1]).resample_chunk(np.ascontiguousarray(y2d, dtype=np.float32), last=True)
+        n_out = self.output_length(y2d.shape[0]) if fix_length else len(out)
+        if len(out) < n_out:
+            out = np.concatenate([out, np.zeros((n_out - len(out), out.shape[1]), dtype=out.dtype)])
+        elif len(out) > n_out:
+            out = out[:n_out]
+        return out.reshape(-1) if y.ndim == 1 else out
+
+
+@functools.lru_cache(maxsize=RESAMPLE_PLAN_CACHE_SIZE)
+def get_resample_plan(orig_sr, target_sr, quality=DEFAULT_QUALITY):
+    """リサンプリング計画をキャッシュから取得します。なければ作成してキャッシュします。
+
+    Args:
+        orig_sr (int): 元のサンプリング周波数。
+        target_sr (int): 目標のサンプリング周波数。
+        quality (str): 品質 (`SOXR_QUALITIES` のキー)。
+
+    Returns:
+        ResamplePlan: リサンプリング計画。
+    """
+    return ResamplePlan(int(orig_sr), int(target_sr), quality)
+
+
+def quality_for_tier(tier):
+    """変換品質の段階に対応するリサンプリングの品質を返します。
+
+    Args:
+        tier (str): 変換品質の段階 (`QUALITY_TIERS` のキー)。
+
+    Returns:
+        str: 品質 (`SOXR_QUALITIES` のキー)。
+
+    Raises:
+        ValueError: 不明な段階の場合。
+    """
+    try:
+        return QUALITY_TIERS[tier]
+    except KeyError:
+        raise ValueError(f"不明な変換品質です: {tier} (選択肢: {', '.join(QUALITY_TIERS)})") from None
+
+
+def resample_plan_cache_info():
+    """このプロセスのリサンプリング計画キャッシュの統計を返します。
+
+    Returns:
+        dict: hits (再利用回数) / misses (新規作成回数) / size (現在の保持数) / maxsize (上限)。
+    """
+    info = get_resample_plan.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
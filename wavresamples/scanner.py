@@ -0,0 +1,54 @@
+"""ディレクトリツリーからWAVファイルを高速に列挙するスキャナーです。
+
+`os.scandir` はディレクトリエントリの種類をOSから直接受け取るため、
+ファイルごとに `stat` を呼び出す `os.walk` + `os.path.isfile` よりも高速です。
+列挙はジェネレーターで遅延的に行い、同時にメモリに保持するのは
+探索中のディレクトリ1つ分のエントリと、未探索のサブディレクトリのパスだけです。
+そのため、数十万エントリのツリーでも全体のリストを作らずに処理できます。
+"""
+import os
+
+from .core import is_wav_file
+
+
+def iter_wav_paths(root, recursive=True, on_error=None):
+    """ディレクトリ以下のWAVファイルの絶対パスを遅延的に列挙します。
+
+    各ディレクトリ内はファイル名順に、サブディレクトリは深さ優先で列挙します。
+    シンボリックリンクのディレクトリは、循環を避けるためたどりません。
+
+    Args:
+        root (str): 探索するディレクトリのパス。
+        recursive (bool): サブディレクトリも探索するか。
+        on_error (callable | None): 読み込めないディレクトリがあった場合に `on_error(path, exception)` で呼び出されます。
+
+    Yields:
+        str: WAVファイルの絶対パス。
+    """
+    # 未探索のディレクトリのスタック (後に積んだものから探索する)
+    pending_dirs = [os.path.abspath(root)]
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        files = []
+        sub_dirs = []
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and is_wav_file(entry.name):
+                            files.append(entry.name)
+                        elif recursive and entry.is_dir(follow_symlinks=False):
+                            sub_dirs.append(entry.path)
+                    except OSError: # エントリが途中で削除された場合など
+                        continue
+        except OSError as e:
+            if on_error is not None:
+                on_error(current_dir, e)
+            continue
+
+        files.sort()
+        for name in files:
+            yield os.path.join(current_dir, name)
+        # 名前順に探索するため、逆順にスタックへ積む
+        sub_dirs.sort(reverse=True)
+        pending_dirs.extend(sub_dirs)
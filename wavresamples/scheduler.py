@@ -0,0 +1,257 @@
+"""メモリ使用量の上限 (予算) の範囲でジョブを投入するスケジューラーです。
+
+ワーカープールに投入順のまま渡すと、巨大なファイルが複数同時にデコードされて
+メモリを使い果たすことがあります。逆に、大きなファイルを待たせるために投入全体を止めると、
+小さなファイルを処理できるコアが遊んでしまいます。
+
+ここでは各ジョブのピークメモリ使用量を、元ファイルのフレーム数・チャンネル数と
+目標周波数から見積もり (`estimate_job_memory`)、実行中のジョブの見積もりの合計が
+予算を超えない範囲でジョブを取り出します。
+
+* 先頭のジョブが予算に収まらない間は、後ろの収まるジョブ (小さなファイル) を先に取り出します。
+  ただし先頭のジョブが `MAX_BYPASS` 回追い越されたら、先頭のジョブが収まるまで待たせます (飢餓の防止)。
+* 見積もりが予算の `OVERSIZE_FRACTION` を超えるジョブは、ストリーミング変換に切り替えます
+  (`streaming` が自動 (None) の場合のみ)。ストリーミング変換のメモリ使用量はファイルの長さによらず一定です。
+* 実行中のジョブがない場合は、予算を超えるジョブでも取り出します (処理が止まらないようにするため)。
+
+見積もりは、変換処理が同時に保持する float32 の配列 (読み込んだ信号・リサンプリング結果・
+チャンネル変換結果) の大きさの合計で、ワーカープロセス自体のメモリ使用量は含みません。
+"""
+import collections
+import ctypes
+import itertools
+import math
+import os
+import sys
+import threading
+
+from .core import converts_by_blocks, job_targets, job_with_metadata
+from .metadata import read_metadata
+from .streaming import DEFAULT_BLOCKSIZE, PIPELINE_DEPTH
+
+
+# 予算のうち、1ジョブがファイル全体の読み込みで使ってよい割合。超えるジョブはストリーミングで変換する
+OVERSIZE_FRACTION = 0.5
+# 先頭のジョブを後ろのジョブが追い越せる回数
+MAX_BYPASS = 32
+# 物理メモリの大きさが分からない場合の既定の予算 (バイト)
+FALLBACK_MEMORY_BUDGET = 2 * 1024 ** 3
+# 物理メモリのうち、既定で変換に使う割合
+DEFAULT_BUDGET_FRACTION = 0.5
+# float32 の1サンプルのバイト数
+_FLOAT_BYTES = 4
+
+
+def physical_memory_bytes():
+    """物理メモリの大きさ (バイト) を返します。取得できない場合はNoneを返します。"""
+    if sys.platform == "win32":
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullTotalPhys)
+        return None
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_memory_budget():
+    """既定のメモリ予算 (物理メモリの `DEFAULT_BUDGET_FRACTION`) をバイト単位で返します。"""
+    total = physical_memory_bytes()
+    return int(total * DEFAULT_BUDGET_FRACTION) if total else FALLBACK_MEMORY_BUDGET
+
+
+def estimate_job_memory(job, streaming=False):
+    """変換ジョブのピークメモリ使用量 (バイト) を見積もります。
+
+    読み込んだ信号に加えて、目標周波数ごとのリサンプリング結果とチャンネル変換結果の合計を足します
+    (書き出しを別スレッドで重ねるため、前の周波数の結果を書き出している間に次の周波数を計算します)。
+    ストリーミング変換の場合は、ファイル全体の代わりに、読み込み・書き出しのキューに置かれる分を含めた
+    (`PIPELINE_DEPTH` + 1) ブロック分で見積もります。
+
+    Args:
+        job (ResampleJob): 元ファイルのメタデータ (フレーム数を含む) を埋め込んだ変換ジョブ。
+        streaming (bool): ストリーミング変換の場合の見積もりを返す場合はTrue。
+
+    Returns:
+        int: 見積もったバイト数。
+    """
+    frames = DEFAULT_BLOCKSIZE * (PIPELINE_DEPTH + 1) if streaming else job.original_frames
+    channels = job.original_channels
+    per_rate = collections.defaultdict(set) # 目標周波数 -> 目標チャンネル数の集合
+    for target in job_targets(job):
+        per_rate[target.sr].add(target.channels)
+    peak = sum(math.ceil(frames * sr / job.original_sr) * (channels + sum(target_channels))
+               for sr, target_channels in per_rate.items())
+    return (frames * channels + peak) * _FLOAT_BYTES
+
+
+class ScheduledJob:
+    """スケジューラーから取り出したジョブです。完了したら `MemoryBudgetScheduler.release` に渡します。
+
+    Attributes:
+        job (ResampleJob): 変換ジョブ (メタデータの埋め込みやストリーミングへの切り替え後のもの)。
+        context (object): `put` で渡された付加情報。
+        memory (int): 見積もったメモリ使用量 (バイト)。
+    """
+
+    __slots__ = ("job", "context", "memory", "bypassed")
+
+    def __init__(self, job, context, memory):
+        self.job = job
+        self.context = context
+        self.memory = memory
+        self.bypassed = 0 # 後ろのジョブに追い越された回数
+
+
+class MemoryBudgetScheduler:
+    """メモリ予算と同時実行数の範囲でジョブを取り出す、スレッドセーフなキューです。
+
+    Args:
+        memory_budget (int | None): メモリ予算 (バイト)。Noneの場合は `default_memory_budget()`。
+        max_running (int): 同時に実行するジョブの最大数 (ワーカー数)。
+    """
+
+    def __init__(self, memory_budget=None, max_running=1):
+        self.memory_budget = memory_budget if memory_budget else default_memory_budget()
+        self.max_running = max_running
+        self._cond = threading.Condition()
+        self._pending = collections.deque()
+        self._in_use = 0
+        self._running = 0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    @property
+    def memory_in_use(self):
+        """実行中のジョブの見積もりの合計 (バイト)。"""
+        with self._cond:
+            return self._in_use
+
+    def plan(self, job):
+        """ジョブのメモリ使用量を見積もり、必要ならストリーミング変換に切り替えます。
+
+        メタデータ (フレーム数) が埋め込まれていないジョブは、ここでヘッダーを読んで埋め込みます
+        (ワーカーでの読み直しは不要になります)。ヘッダーを読めないジョブは見積もりを0とし、
+        エラーの報告はワーカーに任せます。
+
+        Args:
+            job (ResampleJob): 変換ジョブ。
+
+        Returns:
+            tuple[ResampleJob, int]: (実行するジョブ, 見積もったメモリ使用量[バイト])。
+        """
+        if job.original_frames is None or job.original_sr is None:
+            try:
+                job = job_with_metadata(job, read_metadata(job.filepath))
+            except Exception:
+                return job, 0
+        if job.streaming or (job.streaming is None and converts_by_blocks(job.filepath, job.original_sr,
+                                                                           job.original_subtype, job_targets(job))):
+            # リサンプリングが不要なPCMのWAVファイルも、ワーカーがブロック単位で変換する
+            return job, estimate_job_memory(job, streaming=True)
+        memory = estimate_job_memory(job)
+        if job.streaming is None and memory > self.memory_budget * OVERSIZE_FRACTION:
+            return job._replace(streaming=True), estimate_job_memory(job, streaming=True)
+        return job, min(memory, self.memory_budget)
+
+    def put(self, job, context=None):
+        """ジョブを追加します。見積もりは `plan` で行います (ヘッダーの読み込みが発生する場合があります)。
+
+        Args:
+            job (ResampleJob): 変換ジョブ。
+            context (object): 取り出し時に一緒に返す付加情報。
+        """
+        job, memory = self.plan(job)
+        with self._cond:
+            self._pending.append(ScheduledJob(job, context, memory))
+            self._cond.notify_all()
+
+    def peek(self, n):
+        """次に取り出される見込みのジョブを、取り出し順に最大 `n` 件返します (先読みの対象を決めるために使います)。
+
+        Args:
+            n (int): 件数。
+
+        Returns:
+            list[ResampleJob]: ジョブのリスト。
+        """
+        with self._cond:
+            return [entry.job for entry in itertools.islice(self._pending, n)]
+
+    def _select(self):
+        if self._running >= self.max_running or not self._pending:
+            return None
+        free = self.memory_budget - self._in_use
+        head = self._pending[0]
+        if head.memory <= free or self._running == 0:
+            self._pending.popleft()
+            return head
+        if head.bypassed >= MAX_BYPASS:
+            return None
+        # 先頭のジョブが収まらない間は、収まる後ろのジョブを先に取り出す
+        for index in range(1, len(self._pending)):
+            entry = self._pending[index]
+            if entry.memory <= free:
+                del self._pending[index]
+                head.bypassed += 1
+                return entry
+        return None
+
+    def get(self, timeout=None):
+        """予算と同時実行数に収まるジョブを取り出します。なければ収まるまで待ちます。
+
+        Args:
+            timeout (float | None): 最大の待ち時間 (秒)。Noneの場合は無期限に待ちます。
+
+        Returns:
+            ScheduledJob | None: 取り出したジョブ。タイムアウトした場合はNone。
+        """
+        with self._cond:
+            entry = self._cond.wait_for(self._select, timeout=timeout)
+            if entry is not None:
+                self._in_use += entry.memory
+                self._running += 1
+            return entry
+
+    def release(self, entry):
+        """実行が完了したジョブの見積もりを予算に戻します。
+
+        Args:
+            entry (ScheduledJob): `get` で取り出したジョブ。
+        """
+        with self._cond:
+            self._in_use -= entry.memory
+            self._running -= 1
+            self._cond.notify_all()
+
+    def set_max_running(self, max_running):
+        """同時に実行するジョブの最大数を変更します。
+
+        Args:
+            max_running (int): 最大数。
+        """
+        with self._cond:
+            self.max_running = max_running
+            self._cond.notify_all()
+
+    def clear(self):
+        """取り出されていないジョブをすべて破棄します。
+
+        Returns:
+            list[ScheduledJob]: 破棄したジョブ。
+        """
+        with self._cond:
+            entries = list(self._pending)
+            self._pending.clear()
+            return entries
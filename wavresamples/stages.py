@@ -0,0 +1,95 @@
+"""変換処理の段階 (ステージ) ごとの所要時間の計測です。
+
+変換関数 (`run_resample_job` / `perform_multi_resample` / `stream_resample_to_targets`) は
+`timer` 引数で `StageTimer` を受け取り、各段階の処理を `timer.stage(名前)` で囲んで計測します。
+読み込んだファイル・書き出したファイルの大きさも `add_read` / `add_written` で記録します。
+`timer` を指定しない場合は何もしない `NULL_TIMER` を使うため、通常の変換への影響はありません。
+"""
+import contextlib
+import os
+import time
+
+
+# 計測する段階 (処理順)
+# probe: メタデータの確認・取得, decode: 元ファイルの読み込み, resample: サンプリング周波数変換,
+# channels: チャンネル数変換と長さの調整,
+# quantize: 整数のままのチャンネル変換・量子化 (サンプリング周波数が変わらない場合) とディザ,
+# write: 出力ファイルの書き出し (quantize で量子化していない場合は libsndfile による量子化を含む)
+STAGES = ("probe", "decode", "resample", "channels", "quantize", "write")
+
+
+class StageTimer:
+    """段階ごとの所要時間 (秒) と、読み書きしたバイト数を積算します。
+
+    同じ段階を複数回計測した場合 (ストリーミング変換のブロックごと、複数の出力形式など) は合計します。
+    """
+
+    __slots__ = ("times", "bytes_read", "bytes_written")
+
+    def __init__(self):
+        self.times = dict.fromkeys(STAGES, 0.0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ブロック内の処理時間を段階 `name` に加算します。
+
+        Args:
+            name (str): 段階の名前 (`STAGES` のいずれか)。
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
+
+    def add_read(self, path):
+        """読み込んだファイルの大きさを加算します。
+
+        Args:
+            path (str): 読み込んだファイルのパス。
+        """
+        self.bytes_read += os.path.getsize(path)
+
+    def add_written(self, path):
+        """書き出したファイルの大きさを加算します。
+
+        Args:
+            path (str): 書き出したファイルのパス。
+        """
+        self.bytes_written += os.path.getsize(path)
+
+    def merge(self, other):
+        """別の計測結果を加算します。
+
+        Args:
+            other (StageTimer | dict): 加算する計測結果 (または段階 -> 秒の辞書)。
+        """
+        if isinstance(other, StageTimer):
+            self.bytes_read += other.bytes_read
+            self.bytes_written += other.bytes_written
+            other = other.times
+        for name, seconds in other.items():
+            self.times[name] = self.times.get(name, 0.0) + seconds
+
+
+class _NullStageTimer:
+    """何も計測しないタイマーです。"""
+
+    __slots__ = ()
+
+    _context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def add_read(self, path):
+        pass
+
+    def add_written(self, path):
+        pass
+
+
+# 計測しない場合に使うタイマー
+NULL_TIMER = _NullStageTimer()
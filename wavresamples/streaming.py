@@ -0,0 +1,216 @@
+"""長時間のWAVファイルをブロック単位で変換するストリーミング処理です。
+
+ファイル全体をメモリに読み込む代わりに一定サイズのブロックを読み込み
+(PCM_16 / PCM_24 のWAVファイルはメモリマップから、それ以外は `soundfile.SoundFile.blocks` で)、
+フィルタの内部状態を引き継ぐ `soxr.ResampleStream` (`wavresamples.resampler` のキャッシュから取得) で
+リサンプリングしてから、ブロックごとに書き出します。
+複数の出力形式を指定した場合も、元ファイルの読み込みは1回だけです。
+そのため、ファイルの長さに関係なくピークメモリ使用量は
+`blocksize` とチャンネル数に比例する一定量に収まります。
+
+読み込み・リサンプリング・書き出しは上限付きのキューでつないだ別スレッドで重ねて実行します
+(`wavresamples.pipeline` を参照)。読み込み側は最大 `PIPELINE_DEPTH` ブロック先行し、
+書き出しはリサンプリングの完了を待たずに順番に行われるため、ネットワーク上のストレージでも
+所要時間は入出力と計算の合計ではなく、長い方に近づきます。
+
+許容誤差:
+    ファイル全体を一度に変換する場合と同じ soxr のフィルタ (既定は HQ) を
+    状態を引き継ぎながら適用するため、出力はファイル全体を一度に変換した場合と
+    float32 の段階で最大絶対誤差 `STREAMING_TOLERANCE` (1e-6) 以内で一致します。
+    これは PCM_16 の 1LSB (約3.05e-5) より十分小さく、量子化後の出力は同一になります。
+"""
+import contextlib
+import os
+
+import numpy as np
+import soundfile as sf
+
+from .atomic import atomic_output, soundfile_format
+from .resampler import DEFAULT_QUALITY_TIER, get_resample_plan, quality_for_tier
+from .channels import DEFAULT_CHANNEL_MAP, convert_channels
+from .pcmwav import PcmWavReader, open_audio_source
+from .pipeline import WriteBehind, prefetch_iter
+from .quantize import SUBTYPE_BITS, dither_rng, quantize_float, requantize, supports_integer_path
+from .stages import NULL_TIMER
+
+
+# 1ブロックあたりのフレーム数 (48kHz で約1.4秒)
+DEFAULT_BLOCKSIZE = 65536
+# ファイル全体を一度に変換した場合との最大絶対誤差 (float32, フルスケール1.0)
+STREAMING_TOLERANCE = 1e-6
+# この大きさ (バイト) 以上のファイルは、自動的にストリーミングで変換します
+STREAMING_MIN_FILE_SIZE = 256 * 1024 * 1024
+# 読み込み・書き出しのスレッドとの間のキューに置けるブロック数
+PIPELINE_DEPTH = 4
+
+
+def stream_resample_file(filepath, output_path, target_sr, target_channels, target_subtype, blocksize=DEFAULT_BLOCKSIZE,
+                         quality=DEFAULT_QUALITY_TIER, dither=False, channel_map=DEFAULT_CHANNEL_MAP):
+    """WAVファイルをブロック単位で読み込み・リサンプリング・書き出しします。
+
+    Args:
+        filepath (str): 処理対象のファイルパス。
+        output_path (str): 出力先のファイルパス。
+        target_sr (int): 目標のサンプリング周波数。
+        target_channels (int): 目標のチャンネル数。
+        target_subtype (str): 目標のビット深度(サブタイプ)。
+        blocksize (int): 1ブロックあたりのフレーム数。
+        quality (str): 変換品質の段階 (`QUALITY_TIERS` のキー)。
+        dither (bool): Trueの場合、ビット深度を減らす量子化の前に TPDF ディザを加えます。
+        channel_map (str): チャンネルの対応 (`wavresamples.channels.parse_channel_map` を参照)。
+
+    Returns:
+        int: 書き出したフレーム数。
+    """
+    return stream_resample_to_targets(filepath, [(output_path, target_sr, target_channels, target_subtype)],
+                                      blocksize=blocksize, quality=quality, dither=dither, channel_map=channel_map)[0]
+
+
+def stream_resample_to_targets(filepath, outputs, blocksize=DEFAULT_BLOCKSIZE, quality=DEFAULT_QUALITY_TIER, timer=None,
+                               overlap_io=True, dither=False, channel_map=DEFAULT_CHANNEL_MAP):
+    """WAVファイルを1回だけブロック単位で読み込み、複数の出力形式に同時に書き出します。
+
+    読み込んだブロックは目標サンプリング周波数ごとに1回だけリサンプリングし、
+    同じ周波数・チャンネル数の出力はチャンネル変換の結果も共有します。
+    サンプリング周波数が変わらず、元ファイルが PCM_16 / PCM_24 のWAVファイルの場合は、
+    float32 を経由せずに整数のままチャンネル変換と量子化を行います (`wavresamples.quantize` を参照)。
+
+    Args:
+        filepath (str): 処理対象のファイルパス。
+        outputs (list[tuple[str, int, int, str]]): (出力先のファイルパス, 目標のサンプリング周波数,
+            目標のチャンネル数, 目標のビット深度(サブタイプ)) のリスト。
+        blocksize (int): 1ブロックあたりのフレーム数。
+        quality (str): 変換品質の段階 (`QUALITY_TIERS` のキー)。
+        timer (StageTimer | None): 段階ごとの所要時間を計測する場合に指定します (ブロックごとに積算します)。
+            入出力を重ねて実行する場合、decode / write は別スレッドで計測するため、段階の合計は経過時間より長くなります。
+        overlap_io (bool): Falseの場合、読み込み・書き出しを別スレッドで重ねずに逐次実行します。
+        dither (bool): Trueの場合、ビット深度を減らす量子化の前に TPDF ディザを加えます。
+        channel_map (str): チャンネルの対応 (`wavresamples.channels.parse_channel_map` を参照)。
+            ダウンミックスなどの行列は、ブロックごとに1回の行列積で適用します。
+
+    Returns:
+        list[int]: 出力ごとの書き出したフレーム数 (`outputs` と同じ順)。
+    """
+    if timer is None:
+        timer = NULL_TIMER
+    resample_quality = quality_for_tier(quality)
+    with open_audio_source(filepath) as src, contextlib.ExitStack() as stack:
+        # 整数のまま変換するか (リサンプリングが不要で、元ファイルをメモリマップで読み込める場合)
+        integer_path = (isinstance(src, PcmWavReader)
+                        and all(target_sr == src.samplerate for _path, target_sr, _channels, _subtype in outputs)
+                        and supports_integer_path(src.subtype, src.channels,
+                                                  [(channels, subtype) for _path, _sr, channels, subtype in outputs],
+                                                  channel_map))
+
+        # 目標周波数ごとのリサンプラーと出力の長さ (ファイル全体を一度に変換した場合と同じ長さ)
+        resamplers = {}
+        expected_frames = {}
+        for _path, target_sr, _channels, _subtype in outputs:
+            if target_sr in expected_frames:
+                continue
+            if src.samplerate != target_sr:
+                plan = get_resample_plan(src.samplerate, target_sr, resample_quality)
+                resamplers[target_sr] = plan.stream(src.channels)
+                expected_frames[target_sr] = plan.output_length(src.frames)
+            else:
+                resamplers[target_sr] = None
+                expected_frames[target_sr] = src.frames
+        frames_written = dict.fromkeys(expected_frames, 0)
+
+        # 一時ファイルに書き出し、すべて完成してから出力先に置き換える
+        # (ExitStack は逆順に閉じるため、ファイルを閉じてから置き換えが行われる)
+        writers = [] # (目標周波数, 目標チャンネル数, 目標のビット深度, 書き出し先)
+        for output_path, target_sr, target_channels, target_subtype in outputs:
+            tmp_path = stack.enter_context(atomic_output(output_path))
+            dst = stack.enter_context(sf.SoundFile(tmp_path, "w", samplerate=target_sr, channels=target_channels,
+                                                   subtype=target_subtype, format=soundfile_format(output_path)))
+            writers.append((target_sr, target_channels, target_subtype, dst))
+        # ディザの乱数は (周波数, チャンネル数, ビット深度) ごとに固定の種から作る (同じ入力からは同じ出力になる)
+        rngs = {}
+        if dither:
+            for target_sr, target_channels, target_subtype, _dst in writers:
+                if target_subtype in SUBTYPE_BITS:
+                    rngs[(target_sr, target_channels, target_subtype)] = dither_rng(
+                        os.path.basename(filepath), target_sr, target_channels, target_subtype)
+
+        # 書き出しスレッドはファイルを閉じる前に終わらせる (ExitStack の最後に入れ、最初に抜ける)
+        # 書き出すブロックはリサンプラー・読み込みが毎回新しく確保するため、キューに置いたまま次の計算に進める
+        if integer_path:
+            source_blocks = src.int_blocks(blocksize)
+        else:
+            source_blocks = src.blocks(blocksize=blocksize, dtype="float32", always_2d=True)
+        if overlap_io:
+            write_behind = stack.enter_context(WriteBehind(depth=PIPELINE_DEPTH * len(writers), timer=timer))
+            blocks = stack.enter_context(contextlib.closing(prefetch_iter(source_blocks, depth=PIPELINE_DEPTH, timer=timer)))
+        else:
+            write_behind = None
+            blocks = _timed_iter(source_blocks, timer)
+
+        def _write(target_sr, block):
+            block = block[:expected_frames[target_sr] - frames_written[target_sr]]
+            if not len(block):
+                return
+            converted = {} # チャンネル数 -> チャンネル変換結果 (float32)
+            quantized = {} # (周波数, チャンネル数, ビット深度) -> 量子化した整数
+            for writer_sr, target_channels, target_subtype, dst in writers:
+                if writer_sr != target_sr:
+                    continue
+                key = (target_sr, target_channels, target_subtype)
+                if integer_path:
+                    # チャンネル変換と量子化を整数のまま1回で行う
+                    if key not in quantized:
+                        with timer.stage("quantize"):
+                            quantized[key] = requantize(block, src.bits, SUBTYPE_BITS[target_subtype], target_channels,
+                                                        rngs.get(key))
+                    data = quantized[key]
+                else:
+                    if target_channels not in converted:
+                        with timer.stage("channels"):
+                            converted[target_channels] = convert_channels(block, target_channels, channel_map=channel_map)
+                    data = converted[target_channels]
+                    if key in rngs:
+                        if key not in quantized:
+                            with timer.stage("quantize"):
+                                quantized[key] = quantize_float(data, target_subtype, rngs[key])
+                        data = quantized[key]
+                if write_behind is not None:
+                    write_behind.submit(dst.write, data)
+                else:
+                    with timer.stage("write"):
+                        dst.write(data)
+            frames_written[target_sr] += len(block)
+
+        for block in blocks:
+            for target_sr, resampler in resamplers.items():
+                if resampler is None:
+                    _write(target_sr, block)
+                    continue
+                with timer.stage("resample"):
+                    resampled = resampler.resample_chunk(block, last=False)
+                _write(target_sr, resampled)
+
+        for target_sr, resampler in resamplers.items():
+            if resampler is None:
+                continue
+            # フィルタ内に残っているサンプルを吐き出し、不足分は無音で埋める
+            with timer.stage("resample"):
+                tail = resampler.resample_chunk(np.zeros((0, src.channels), dtype=np.float32), last=True)
+            missing = expected_frames[target_sr] - frames_written[target_sr]
+            tail = tail[:missing]
+            if len(tail) < missing:
+                padding = np.zeros((missing - len(tail), src.channels), dtype=np.float32)
+                tail = np.concatenate([tail, padding])
+            _write(target_sr, tail)
+
+    return [frames_written[target_sr] for _path, target_sr, _channels, _subtype in outputs]
+
+
+def _timed_iter(iterable, timer):
+    """要素の取得ごとに所要時間を段階 decode に加算しながら、`iterable` の要素を返します。"""
+    iterator = iter(iterable)
+    while True:
+        with timer.stage("decode"):
+            item = next(iterator, None)
+        if item is None:
+            return
+        yield item
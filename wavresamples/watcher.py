@@ -0,0 +1,359 @@
+"""フォルダを監視し、新しく置かれたWAVファイルを書き込みの完了後に通知する監視処理です。
+
+監視フォルダ (ドロップフォルダ) にファイルが置かれると、書き込みが終わるのを待ってから
+`on_files` にパスを渡します。変換の投入は呼び出し側で行い、ドラッグ＆ドロップと同じ
+タスクキュー・ワーカープールを使います。
+
+* Linux では inotify (ctypes 経由で libc を直接呼び出すため、追加のライブラリは不要) でイベントを待ちます。
+  イベントがない間はスレッドが select で眠るため、待機中のCPU使用率はほぼ0です。
+* inotify を使えない環境 (Windows / macOS、監視数の上限に達した場合など) やネットワーク上のフォルダ
+  (他のマシンからの書き込みは inotify に届かない) では、`poll_interval` 秒ごとにフォルダを
+  `os.scandir` で走査し、大きさと更新日時の変化から新しいファイルを見つけます。
+
+書き込み中のファイルを変換しないよう、次の条件を満たしたファイルだけを通知します (デバウンス)。
+
+* 最後の変更から `settle` 秒間、変更がないこと (inotify では書き込みを閉じたイベント (IN_CLOSE_WRITE)・
+  名前の変更による移動 (IN_MOVED_TO) の後は `CLOSED_SETTLE_SECONDS` 秒で十分とみなします)。
+* 大きさが0でなく、読み込み用に開けること (Windows で書き込み中のファイルは開けない場合があります)。
+
+同じ内容 (大きさと更新日時が同じ) のファイルは2回通知しません。上書きされたファイルは再び通知します。
+変換結果のファイル (`build_output_filename` の名前) と隠しファイルは対象外のため、
+監視フォルダに変換結果を保存しても変換が繰り返されることはありません。
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+
+from .core import is_output_filename, is_wav_file
+
+
+# 最後の変更から、書き込みが完了したとみなすまでの時間 (秒)
+DEFAULT_SETTLE_SECONDS = 2.0
+# 書き込みを閉じた・移動されたイベントの後、書き込みが完了したとみなすまでの時間 (秒)
+CLOSED_SETTLE_SECONDS = 0.25
+# ポーリングでフォルダを走査する間隔 (秒)
+DEFAULT_POLL_INTERVAL = 1.0
+
+# inotify のイベント (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_ONLYDIR)
+# struct inotify_event の固定長部分 (wd, mask, cookie, len)
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+def _default_accept(path):
+    """変換対象のWAVファイルかどうか (変換結果・隠しファイルを除く) を判定します。"""
+    filename = os.path.basename(path)
+    return is_wav_file(filename) and not filename.startswith(".") and not is_output_filename(filename)
+
+
+class _Inotify:
+    """inotify のファイル記述子と、待機を中断するためのパイプです。"""
+
+    def __init__(self, libc, fd):
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+        self.fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+
+    @classmethod
+    def open(cls):
+        """inotify を開きます。利用できない場合はNoneを返します。"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def add_watch(self, path):
+        """フォルダの監視を追加し、監視記述子を返します。
+
+        Raises:
+            OSError: 監視を追加できない場合 (監視数の上限に達した場合など)。
+        """
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def wait(self, timeout):
+        """イベントが届くか、`wake` が呼ばれるか、`timeout` 秒が経過するまで待ちます。"""
+        readable, _, _ = select.select([self.fd, self._wake_r], [], [], timeout)
+        if self._wake_r in readable:
+            os.read(self._wake_r, 4096)
+
+    def wake(self):
+        """`wait` で待っているスレッドを起こします。"""
+        os.write(self._wake_w, b"\0")
+
+    def read_events(self):
+        """届いているイベントを (監視記述子, マスク, 名前) のリストで返します。"""
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].split(b"\0", 1)[0])
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        for fd in (self.fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class FolderWatcher:
+    """フォルダを監視し、書き込みが完了した新しいWAVファイルを `on_files` で通知します。
+
+    `on_files` は監視スレッドから呼び出されるため、GUIから使う場合はキューなどで受け渡してください。
+    with 文で使うと、ブロックの開始時に監視を始め、終了時に止めます。
+
+    Args:
+        root (str): 監視するフォルダ。
+        on_files (callable): 書き込みが完了したファイルの絶対パスのリスト (検出順) を受け取る関数。
+        recursive (bool): サブフォルダも監視するか (後から作られたサブフォルダも含みます)。
+        settle (float): 最後の変更から、書き込みが完了したとみなすまでの時間 (秒)。
+        poll_interval (float): ポーリングでフォルダを走査する間隔 (秒)。
+        include_existing (bool): 監視の開始時にあるファイルも通知するか。
+        polling (bool): Trueの場合、inotify を使わずにポーリングで監視します (ネットワーク上のフォルダなど)。
+        accept (callable | None): 通知するファイルかどうかをパスから判定する関数。
+            Noneの場合は変換結果・隠しファイルを除くWAVファイルです。
+
+    Attributes:
+        backend (str | None): 監視の方式 ("inotify" / "polling")。`start` を呼ぶまではNoneです。
+    """
+
+    def __init__(self, root, on_files, recursive=False, settle=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL,
+                 include_existing=False, polling=False, accept=None):
+        self.root = os.path.abspath(root)
+        self.on_files = on_files
+        self.recursive = recursive
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.include_existing = include_existing
+        self.polling = polling
+        self.accept = accept if accept is not None else _default_accept
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+        self._watch_dirs = {} # inotify の監視記述子 -> フォルダ
+        self._pending = {} # 書き込みの完了を待っているファイル -> [前回の (大きさ, 更新日時) | None, 確認する時刻]
+        self._notified = {} # 通知済みのファイル -> 通知時の (大きさ, 更新日時)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def start(self):
+        """監視を開始します。inotify を使える場合は、ここでフォルダの監視を登録し終えてから戻ります。
+
+        Raises:
+            NotADirectoryError: `root` がフォルダでない場合。
+        """
+        if not os.path.isdir(self.root):
+            raise NotADirectoryError(f"監視するフォルダが見つかりません: {self.root}")
+        if not self.polling:
+            self._inotify = _Inotify.open()
+        if self._inotify is not None:
+            try:
+                self._watch_tree(self.root)
+            except OSError as e:
+                print(f"inotify で監視できないため、ポーリングで監視します: {e}")
+                self._inotify.close()
+                self._inotify = None
+                self._watch_dirs.clear()
+        self.backend = "inotify" if self._inotify is not None else "polling"
+        target = self._run_inotify if self._inotify is not None else self._run_polling
+        self._thread = threading.Thread(target=target, name="folder-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """監視を止め、監視スレッドの終了を待ちます。"""
+        self._stop.set()
+        if self._thread is None:
+            return
+        if self._inotify is not None:
+            self._inotify.wake()
+        self._thread.join()
+        self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _iter_dirs(self, top):
+        yield top
+        if self.recursive:
+            for dirpath, dirnames, _filenames in os.walk(top):
+                for dirname in dirnames:
+                    yield os.path.join(dirpath, dirname)
+
+    def _iter_files(self, top):
+        """`top` 以下 (recursive の場合はサブフォルダも) の対象ファイルを (パス, os.stat_result) で返します。"""
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False): # シンボリックリンクはたどらない (循環を避ける)
+                                if self.recursive:
+                                    stack.append(entry.path)
+                            elif self.accept(entry.path) and entry.is_file():
+                                yield entry.path, entry.stat()
+                        except OSError:
+                            continue # 走査中に消えたファイルなど
+            except OSError:
+                continue
+
+    def _watch_tree(self, top):
+        for directory in self._iter_dirs(top):
+            self._watch_dirs[self._inotify.add_watch(directory)] = directory
+
+    def _mark(self, path, signature, delay):
+        """ファイルを、`delay` 秒後に書き込みの完了を確認する対象にします。"""
+        self._pending[path] = [signature, time.monotonic() + delay]
+
+    def _timeout(self, limit=None):
+        """次に確認するファイルの時刻 (と `limit`) までの秒数を返します。どちらもなければNoneです。"""
+        deadlines = [deadline for _signature, deadline in self._pending.values()]
+        if limit is not None:
+            deadlines.append(limit)
+        return max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+    def _notify_ready(self):
+        """確認する時刻を過ぎたファイルのうち、書き込みが完了したものを通知します。"""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, deadline) in list(self._pending.items()):
+            if deadline > now:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path] # 削除・移動されたファイル
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if not stat.S_ISREG(st.st_mode) or not st.st_size:
+                del self._pending[path] # 空のファイルは書き込まれたときに改めて検出する
+                continue
+            if (signature is not None and current != signature) or not _can_open(path):
+                self._pending[path] = [current if signature is not None else None, now + self.settle]
+                continue
+            del self._pending[path]
+            if self._notified.get(path) == current:
+                continue # 内容が変わっていない (書き込みなしで閉じられた場合など)
+            self._notified[path] = current
+            ready.append(path)
+        if ready:
+            try:
+                self.on_files(ready)
+            except Exception as e:
+                print(f"監視フォルダのファイルの通知でエラーが発生しました: {e}")
+
+    def _run_polling(self):
+        snapshot = {path: (st.st_size, st.st_mtime_ns) for path, st in self._iter_files(self.root)}
+        if self.include_existing:
+            for path, signature in snapshot.items():
+                self._mark(path, signature, self.settle)
+        next_scan = time.monotonic() + self.poll_interval
+        while not self._stop.wait(self._timeout(next_scan)):
+            if time.monotonic() >= next_scan:
+                current = {path: (st.st_size, st.st_mtime_ns) for path, st in self._iter_files(self.root)}
+                for path, signature in current.items():
+                    if snapshot.get(path) != signature: # 新しいファイル、または前回の走査から変更があったファイル
+                        self._mark(path, signature, self.settle)
+                for path in snapshot.keys() - current.keys():
+                    self._notified.pop(path, None)
+                snapshot = current
+                next_scan = time.monotonic() + self.poll_interval
+            self._notify_ready()
+
+    def _run_inotify(self):
+        if self.include_existing:
+            for path, _st in self._iter_files(self.root):
+                self._mark(path, None, self.settle)
+        while not self._stop.is_set():
+            self._inotify.wait(self._timeout()) # 確認するファイルがなければ、イベントが届くまで眠る
+            if self._stop.is_set():
+                break
+            for wd, mask, name in self._inotify.read_events():
+                self._handle_event(wd, mask, name)
+            self._notify_ready()
+
+    def _handle_event(self, wd, mask, name):
+        if mask & _IN_Q_OVERFLOW:
+            # イベントが溢れた場合は全体を走査し、通知済みの内容から変わったファイルを確認する
+            for path, st in self._iter_files(self.root):
+                if self._notified.get(path) != (st.st_size, st.st_mtime_ns):
+                    self._mark(path, None, self.settle)
+            return
+        if mask & _IN_IGNORED:
+            self._watch_dirs.pop(wd, None) # 監視していたフォルダが削除された
+            return
+        directory = self._watch_dirs.get(wd)
+        if directory is None or not name:
+            return
+        path = os.path.join(directory, name)
+        if mask & _IN_ISDIR:
+            if self.recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                # 新しいサブフォルダを監視し、監視を始める前に置かれたファイルも確認する
+                try:
+                    self._watch_tree(path)
+                except OSError as e:
+                    print(f"サブフォルダを監視できません: {path} - {e}")
+                for file_path, _st in self._iter_files(path):
+                    self._mark(file_path, None, self.settle)
+            return
+        if not self.accept(path):
+            return
+        if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+            self._mark(path, None, min(self.settle, CLOSED_SETTLE_SECONDS))
+        elif mask & (_IN_CREATE | _IN_MODIFY):
+            self._mark(path, None, self.settle)
+        elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+            self._pending.pop(path, None)
+            self._notified.pop(path, None)
+
+
+def _can_open(path):
+    """ファイルを読み込み用に開けるかどうかを返します (他のプロセスが書き込み用に排他的に開いている間は開けません)。"""
+    try:
+        with open(path, "rb"):
+            return True
+    except OSError:
+        return False